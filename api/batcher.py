@@ -0,0 +1,157 @@
+"""
+Micro-batcher na frente do Booster.predict
+Junta pedidos de score concorrentes por até `window_ms` (ou `max_rows` linhas),
+roda um único predict sobre a matriz concatenada e devolve a fatia de cada pedido.
+Cada pedido leva o próprio modelo: durante uma troca de versão, o lote é dividido
+por modelo e pedidos em andamento terminam na versão com que começaram.
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+
+
+class Histogram:
+    """Histograma de buckets fixos (limite superior inclusivo)"""
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        i = int(np.searchsorted(self.buckets, value, side="left"))
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> dict:
+        labels = [f"<={b:g}" for b in self.buckets] + [f">{self.buckets[-1]:g}"]
+        return {
+            "count": self.count,
+            "mean": round(self.sum / self.count, 4) if self.count else 0.0,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class _Pending:
+    __slots__ = ("X", "model", "enqueued", "done", "result", "error")
+
+    def __init__(self, X: np.ndarray, model: Any):
+        self.X = X
+        self.model = model
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """
+    Coalescência de pedidos de predict
+
+    Args:
+        predict_fn: função que recebe (modelo, matriz concatenada) e devolve os scores
+        window_ms: tempo máximo que o primeiro pedido do lote espera
+        max_rows: fecha o lote assim que atingir esse número de linhas
+    """
+
+    def __init__(self, predict_fn: Callable[[Any, np.ndarray], np.ndarray],
+                 window_ms: float = 2.0, max_rows: int = 4096):
+        self.predict_fn = predict_fn
+        self.window = window_ms / 1000.0
+        self.max_rows = max_rows
+        self.batch_requests = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
+        self.batch_rows = Histogram([64, 256, 1024, 4096, 16384])
+        self.queue_wait_ms = Histogram([0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100])
+        self.batches = 0
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="microbatcher", daemon=True)
+                    self._thread.start()
+
+    def predict(self, model: Any, X: np.ndarray) -> np.ndarray:
+        """Enfileira X (pontuado por `model`) e bloqueia até o lote que o contém ser pontuado"""
+        self._ensure_started()
+        item = _Pending(np.asarray(X), model)
+        self._queue.put(item)
+        item.done.wait()
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def close(self):
+        """Encerra a thread de coalescência (pedidos pendentes são atendidos antes)"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _collect(self, first: _Pending) -> List[_Pending]:
+        batch, rows = [first], len(first.X)
+        deadline = first.enqueued + self.window
+        while rows < self.max_rows:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # reprocessa o sinal de parada após o lote
+                break
+            batch.append(item)
+            rows += len(item.X)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            started = time.perf_counter()
+            # um predict por modelo (normalmente um só; dois durante a troca de versão)
+            groups = {}
+            for p in batch:
+                groups.setdefault(id(p.model), []).append(p)
+            for group in groups.values():
+                self._score(group)
+            for p in batch:
+                self.queue_wait_ms.observe((started - p.enqueued) * 1000)
+                p.done.set()
+
+    def _score(self, group: List[_Pending]):
+        try:
+            X = group[0].X if len(group) == 1 else np.vstack([p.X for p in group])
+            scores = self.predict_fn(group[0].model, X)
+            bounds = np.cumsum([len(p.X) for p in group])[:-1]
+            for p, s in zip(group, np.split(scores, bounds)):
+                p.result = s
+        except BaseException as e:  # propaga o erro para todos os pedidos do grupo
+            for p in group:
+                p.error = e
+        self.batches += 1
+        self.batch_requests.observe(len(group))
+        self.batch_rows.observe(sum(len(p.X) for p in group))
+
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "window_ms": self.window * 1000,
+            "max_rows": self.max_rows,
+            "batches": self.batches,
+            "batch_requests": self.batch_requests.to_dict(),
+            "batch_rows": self.batch_rows.to_dict(),
+            "queue_wait_ms": self.queue_wait_ms.to_dict(),
+        }
@@ -0,0 +1,164 @@
+"""
+Cache materializado de rankings por usuário
+LRU com TTL e teto de memória, chaveado por (user_id, variant, versão do
+modelo, versão das features) e invalidado por usuário quando chegam eventos
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Set, Tuple
+
+import numpy as np
+
+# (recipe_ids ordenados, scores ordenados)
+Ranking = Tuple[np.ndarray, np.ndarray]
+
+
+def ranking_nbytes(value: Ranking) -> int:
+    """Estimativa do tamanho em memória de um ranking"""
+    ids, scores = value
+    return int(scores.nbytes + ids.nbytes + sum(sys.getsizeof(r) for r in ids) + 200)
+
+
+class RecCache:
+    """
+    Args:
+        max_entries: número máximo de rankings
+        ttl_seconds: validade de cada entrada
+        max_bytes: teto de memória estimada; excedido, remove as menos usadas
+    """
+
+    def __init__(self, max_entries: int = 100_000, ttl_seconds: float = 300.0,
+                 max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.nbytes = 0
+        self._data: "OrderedDict[tuple, Tuple[float, Ranking, int]]" = OrderedDict()
+        self._by_user: Dict[str, Set[tuple]] = {}
+        self._lock = threading.Lock()
+
+    def _drop(self, key: tuple):
+        _, _, size = self._data.pop(key)
+        self.nbytes -= size
+        keys = self._by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[key[0]]
+
+    def get(self, key: tuple) -> Optional[Ranking]:
+        """key = (user_id, variant, model_version, feature_version)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: tuple, value: Ranking):
+        size = ranking_nbytes(value)
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (time.monotonic() + self.ttl, value, size)
+            self._by_user.setdefault(key[0], set()).add(key)
+            self.nbytes += size
+            while self._data and (len(self._data) > self.max_entries or self.nbytes > self.max_bytes):
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: str) -> Set[Hashable]:
+        """Remove os rankings do usuário; devolve as variantes que estavam em cache"""
+        with self._lock:
+            keys = self._by_user.pop(user_id, set())
+            for key in keys:
+                _, _, size = self._data.pop(key)
+                self.nbytes -= size
+            self.invalidations += len(keys)
+            return {key[1] for key in keys}
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._by_user.clear()
+            self.nbytes = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": True,
+            "entries": len(self._data),
+            "users": len(self._by_user),
+            "memory_bytes": self.nbytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+class CacheRefresher:
+    """
+    Recalcula em background os rankings invalidados, fora do caminho da requisição
+
+    Args:
+        compute: função (user_id, variant) -> None que recalcula e grava no cache
+    """
+
+    def __init__(self, compute: Callable[[str, str], None]):
+        self.compute = compute
+        self.refreshed = 0
+        self.errors = 0
+        self._pending: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="cache-refresher", daemon=True)
+        self._thread.start()
+
+    def submit(self, user_id: str, variants):
+        with self._cond:
+            for v in variants:
+                self._pending[(user_id, v)] = None
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                (user_id, variant), _ = self._pending.popitem(last=False)
+            try:
+                self.compute(user_id, variant)
+                self.refreshed += 1
+            except Exception:
+                self.errors += 1
+
+    def stats(self) -> dict:
+        return {"pending": len(self._pending), "refreshed": self.refreshed, "errors": self.errors}
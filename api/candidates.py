@@ -0,0 +1,290 @@
+"""
+Store de candidatos residente em memória
+Carrega as features de validação uma única vez, agrupa as linhas por usuário
+e responde lookups em O(1) via tabela de offsets sobre arrays NumPy contíguos
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from common.fs import file_signature
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+def frame_arrays(df: pd.DataFrame) -> Tuple[Dict[str, np.ndarray], Dict[str, str]]:
+    """Colunas ordenadas por usuário como arrays contíguos; datetimes com timezone viram UTC naive"""
+    df = df.sort_values("user_id", kind="stable").reset_index(drop=True)
+    arrays: Dict[str, np.ndarray] = {}
+    tz: Dict[str, str] = {}
+    for c in df.columns:
+        s = df[c]
+        if isinstance(s.dtype, pd.DatetimeTZDtype):
+            tz[c] = str(s.dt.tz)
+            s = s.dt.tz_convert("UTC").dt.tz_localize(None)
+        arrays[c] = np.ascontiguousarray(s.to_numpy())
+    return arrays, tz
+
+
+def _atomic_save(path: Path, arr: np.ndarray):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+def export_arrays(arrays: Dict[str, np.ndarray], tz: Dict[str, str], out: Path):
+    """
+    Grava as colunas como .npy (texto em largura fixa, ausentes = "") para abrir com mmap
+    Diretório montado à parte e renomeado: outro worker pode ter exportado o mesmo snapshot
+    """
+    if (out / "meta.json").exists():
+        return
+    tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+    tmp.mkdir(parents=True, exist_ok=True)
+    for i, (c, a) in enumerate(arrays.items()):
+        if a.dtype == object:
+            a = pd.Series(a).fillna("").astype(str).to_numpy(dtype=str)
+        np.save(tmp / f"col-{i:03d}.npy", a)
+    (tmp / "meta.json").write_text(json.dumps({"columns": list(arrays), "tz": tz}))
+    try:
+        os.rename(tmp, out)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def open_arrays(out: Path) -> Tuple[Dict[str, np.ndarray], Dict[str, str]]:
+    meta = json.loads((out / "meta.json").read_text())
+    arrays = {c: np.load(out / f"col-{i:03d}.npy", mmap_mode="r") for i, c in enumerate(meta["columns"])}
+    return arrays, meta["tz"]
+
+
+class CandidateSnapshot:
+    """
+    Snapshot imutável das features, ordenado e indexado por usuário
+    Com `mmap_dir`, os arrays são views de arquivos .npy mapeados em memória
+    (uma cópia física compartilhada por todos os workers)
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], tz: Dict[str, str], signature: Tuple[int, int],
+                 topn: int = 200, segment_cols: Optional[List[str]] = None, mmap_dir: Optional[Path] = None):
+        self.signature = signature
+        self.arrays = arrays
+        self.tz = tz
+        self.mmap_dir = mmap_dir
+        self.columns = list(arrays)
+        self.rows = len(arrays["user_id"])
+        self.nbytes = int(sum(a.nbytes for a in arrays.values()))
+
+        # tabela de offsets: user_id -> (início, fim) no array ordenado
+        users, starts = np.unique(self.arrays["user_id"], return_index=True)
+        ends = np.append(starts[1:], self.rows)
+        self.offsets: Dict[str, Tuple[int, int]] = {
+            u: (int(s), int(e)) for u, s, e in zip(users.tolist(), starts, ends)
+        }
+        self.users = len(self.offsets)
+        self.load_seconds = 0.0
+
+        # cold-start: top-n linhas por views, global e por segmento (ex.: ("diet_selected", "veg"))
+        order = np.argsort(-self.arrays["views"], kind="stable")
+        self.popular: Dict[Optional[Tuple[str, str]], np.ndarray] = {None: order[:topn].astype(np.int32)}
+        for c in segment_cols or []:
+            if c not in self.arrays:
+                continue
+            codes, values = pd.factorize(self.arrays[c][order])
+            by_code = np.argsort(codes, kind="stable")  # agrupa mantendo a ordem por views
+            bounds = np.searchsorted(codes[by_code], np.arange(len(values) + 1))
+            for i, v in enumerate(values):
+                if v == "":
+                    continue  # ausente (arrays mapeados guardam texto ausente como "")
+                rows = order[by_code[bounds[i]:bounds[i + 1]]][:topn]
+                self.popular[(c, v)] = rows.astype(np.int32)
+        # rankings pontuados do cold-start, iguais para todo usuário novo do segmento
+        self.cold_rankings: dict = {}
+        # matriz float32 de features por lista ordenada de colunas (montada uma vez)
+        self._matrices: Dict[Tuple[str, ...], np.ndarray] = {}
+        # receitas ordenadas e uma linha de cada (features por receita), montadas no primeiro uso
+        self._recipe_rows: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, signature: Tuple[int, int], topn: int = 200,
+                   segment_cols: Optional[List[str]] = None) -> "CandidateSnapshot":
+        arrays, tz = frame_arrays(df)
+        return cls(arrays, tz, signature, topn, segment_cols)
+
+    def feature_matrix(self, features: List[str], check=None) -> np.ndarray:
+        """
+        Linhas x features (na ordem do modelo) em float32 C-contíguo; fatias por usuário são views
+        `check(arrays)` valida o schema antes de montar a matriz (uma vez por snapshot)
+        Com mmap_dir, a matriz também vira um .npy mapeado (o primeiro worker grava)
+        """
+        key = tuple(features)
+        m = self._matrices.get(key)
+        if m is None:
+            if check is not None:
+                check(self.arrays)
+            path = None
+            if self.mmap_dir is not None:
+                path = self.mmap_dir / f"matrix-{hashlib.sha1(json.dumps(key).encode()).hexdigest()[:12]}.npy"
+            if path is not None and path.exists():
+                m = np.load(path, mmap_mode="r")
+            else:
+                m = np.empty((self.rows, len(key)), dtype=np.float32)
+                for j, c in enumerate(key):
+                    m[:, j] = self.arrays[c]
+                if path is not None:
+                    try:
+                        _atomic_save(path, m)
+                        m = np.load(path, mmap_mode="r")
+                    except OSError:
+                        pass  # export removido por um snapshot mais novo: fica a cópia local
+            self._matrices[key] = m
+        return m
+
+    def recipe_rows(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(recipe_ids ordenados, índice de uma linha de cada receita)"""
+        if self._recipe_rows is None:
+            self._recipe_rows = np.unique(self.arrays["recipe_id"], return_index=True)
+        return self._recipe_rows
+
+    def unseen_matrix(self, user_row: Optional[int], recipe_ids: np.ndarray, features: List[str],
+                      user_cols: List[str], recipe_cols: List[str], fill: Optional[dict] = None) -> np.ndarray:
+        """
+        Features float32 de pares User×Recipe ausentes do snapshot (candidatos de retrieval)
+        Colunas de usuário vêm da linha `user_row`, as de receita de uma linha da receita
+        (0 se ela não estiver no snapshot); as do par valem `fill.get(coluna, 0)`
+        """
+        m = self.feature_matrix(features)
+        recipes, rows = self.recipe_rows()
+        recipe_ids = np.asarray(recipe_ids, dtype=str)
+        pos = np.minimum(np.searchsorted(recipes, recipe_ids), max(len(recipes) - 1, 0))
+        found = (recipes[pos] == recipe_ids) if len(recipes) else np.zeros(len(recipe_ids), bool)
+        src = rows[pos[found]]
+        fill = fill or {}
+        out = np.zeros((len(recipe_ids), len(features)), dtype=np.float32)
+        for j, c in enumerate(features):
+            if c in user_cols:
+                out[:, j] = m[user_row, j] if user_row is not None else 0
+            elif c in recipe_cols:
+                out[found, j] = m[src, j]
+            else:
+                out[:, j] = fill.get(c, 0)
+        return out
+
+    def segment(self, **attrs) -> Optional[Tuple[str, str]]:
+        """Primeiro segmento pré-computado que casa com os atributos informados"""
+        for c, v in attrs.items():
+            if v is not None and (c, v) in self.popular:
+                return (c, v)
+        return None
+
+    def popular_rows(self, segment: Optional[Tuple[str, str]] = None) -> np.ndarray:
+        """Índices das top-n linhas por views do segmento (global se None)"""
+        return self.popular.get(segment, self.popular[None])
+
+
+class CandidateStore:
+    """
+    Mantém o snapshot atual de candidatos e faz hot-reload atômico
+    quando o mtime/tamanho do Parquet muda
+    """
+
+    def __init__(self, path: str, reload_interval: float = 5.0, topn: int = 200,
+                 segment_cols: Optional[List[str]] = None, mmap_dir: str = ""):
+        self.path = path
+        self.mmap_dir = Path(mmap_dir) if mmap_dir else None
+        self.reload_interval = reload_interval
+        self.topn = topn
+        self.segment_cols = segment_cols or []
+        self.loaded_at: Optional[float] = None
+        self.reloads = 0
+        self._snap: Optional[CandidateSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self) -> Optional[CandidateSnapshot]:
+        """Lê o Parquet e troca o snapshot atual (no-op se o arquivo não existir)"""
+        with self._lock:
+            sig = file_signature(self.path)
+            if sig is None:
+                return self._snap
+            if self._snap is not None and self._snap.signature == sig:
+                return self._snap
+            t0 = time.perf_counter()
+            try:
+                snap = self._build(sig)
+            except Exception:
+                # arquivo sendo reescrito: mantém o snapshot atual e tenta depois
+                if self._snap is None:
+                    raise
+                return self._snap
+            snap.load_seconds = time.perf_counter() - t0
+            # troca atômica: requisições em andamento seguem com o snapshot antigo
+            self._snap = snap
+            self.loaded_at = time.time()
+            self.reloads += 1
+            return snap
+
+    def _build(self, sig: Tuple[int, int]) -> CandidateSnapshot:
+        if self.mmap_dir is None:
+            return CandidateSnapshot.from_frame(pd.read_parquet(self.path), sig, self.topn, self.segment_cols)
+        # snapshot exportado uma vez por assinatura do Parquet; os workers só mapeiam os .npy
+        out = self.mmap_dir / f"{sig[0]}-{sig[1]}"
+        if not (out / "meta.json").exists():
+            self.mmap_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.mmap_dir / ".lock", "w") as lock:
+                # um worker exporta; os outros esperam e só mapeiam (sem fcntl, ex. Windows: cada um tenta)
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                if not (out / "meta.json").exists():
+                    export_arrays(*frame_arrays(pd.read_parquet(self.path)), out)
+                    self._prune(out)
+        arrays, tz = open_arrays(out)
+        return CandidateSnapshot(arrays, tz, sig, self.topn, self.segment_cols, mmap_dir=out)
+
+    def _prune(self, keep: Path):
+        # exports de assinaturas antigas (workers que ainda os mapeiam seguem válidos até fechar)
+        for p in self.mmap_dir.iterdir():
+            if p != keep and not p.name.startswith("."):
+                shutil.rmtree(p, ignore_errors=True)
+
+    def snapshot(self) -> Optional[CandidateSnapshot]:
+        """Snapshot atual, verificando mudanças no arquivo a cada reload_interval"""
+        now = time.monotonic()
+        if self._snap is None or now - self._checked_at >= self.reload_interval:
+            self._checked_at = now
+            snap = self._snap
+            if snap is None or file_signature(self.path) != snap.signature:
+                # outra thread já está recarregando: segue com o snapshot atual
+                if self._lock.locked() and snap is not None:
+                    return snap
+                return self.load()
+        return self._snap
+
+    def stats(self) -> dict:
+        snap = self._snap
+        if snap is None:
+            return {"loaded": False, "path": self.path}
+        return {
+            "loaded": True,
+            "path": self.path,
+            "rows": snap.rows,
+            "users": snap.users,
+            "cold_segments": len(snap.popular),
+            "memory_bytes": snap.nbytes,
+            "mmap": str(snap.mmap_dir) if snap.mmap_dir is not None else None,
+            "load_seconds": round(snap.load_seconds, 4),
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+        }
@@ -1,11 +1,85 @@
-from fastapi import FastAPI, HTTPException, Query
-from common.schemas import Event, RecResponse, RecItem, RecipeGenerated, RecipeFavorited, FirebaseEvent
-from common.config import DATA_EVENTS_PATH, MODEL_PATH, TOP_K, CANDIDATES_TOPN
-import json, os, pandas as pd, lightgbm as lgb
+from fastapi import FastAPI, HTTPException, Query, Header, Depends
+from fastapi.responses import StreamingResponse
+from common.schemas import Event, RecResponse, RecItem, RecipeGenerated, RecipeFavorited, FirebaseEvent, BatchRecRequest
+from common.config import DATA_EVENTS_PATH, MODEL_PATH, TOP_K, CANDIDATES_TOPN, FEATURES_VAL_PATH, CANDIDATES_RELOAD_INTERVAL, BATCH_CHUNK_USERS, SEGMENT_COLS
+from common.config import MICROBATCH_ENABLED, MICROBATCH_WINDOW_MS, MICROBATCH_MAX_ROWS
+from common.config import REC_CACHE_ENABLED, REC_CACHE_MAX_ENTRIES, REC_CACHE_TTL_SECONDS, REC_CACHE_MAX_MB, REC_CACHE_REFRESH
+from common.eventlog import get_event_log, close_event_logs
+from common.event_store import get_event_store
+from common.config import EVENT_STORE_COMPACT_INTERVAL, SERVING_MMAP_DIR, MODEL_SCORER, MODEL_REGISTRY_DIR, MODEL_WATCH_INTERVAL, ADMIN_TOKEN
+from common.config import ITEM_NEIGHBORS_DIR, ITEM_NEIGHBORS_SEEDS, ITEM_NEIGHBORS_CANDIDATES, ALS_DIR, ALS_CANDIDATES
+from common.config import CONTENT_NEIGHBORS_DIR, CONTENT_NEIGHBORS_SEEDS, CONTENT_NEIGHBORS_CANDIDATES
+from common.config import SEARCH_CANDIDATES, SEARCH_REFRESH_INTERVAL, RECIPE_MAP_DIR
+from common.recipe_ids import RecipeMap, recipe_id as name_recipe_id
+from common.recipe_catalog import get_recipe_catalog
+from api.candidates import CandidateStore
+from api.batcher import MicroBatcher
+from api.cache import RecCache, CacheRefresher
+from api.model_store import ModelStore
+from api.retrieval import IndexWatcher
+from api.search import QueryIndex
+from models.bundle import ModelBundle
+from models.registry import ModelRegistry
+from models.item_neighbors import NeighborIndex
+from models.als import FactorIndex
+from pipelines.feature_engine import LEVEL_COLS, UNSEEN_PAIR
+from contextlib import asynccontextmanager
+from typing import Optional
+import os, numpy as np
 from datetime import datetime
 from pathlib import Path
 
-app = FastAPI(title="Prato do Dia - Reco API", version="1.0.0")
+# candidatos residentes em memória (carregados uma vez, hot-reload por mtime/tamanho)
+# com SERVING_MMAP_DIR, os arrays vêm de .npy mapeados: N workers compartilham uma cópia física
+_candidates = CandidateStore(FEATURES_VAL_PATH, reload_interval=CANDIDATES_RELOAD_INTERVAL,
+                             topn=CANDIDATES_TOPN, segment_cols=SEGMENT_COLS,
+                             mmap_dir=os.path.join(SERVING_MMAP_DIR, "candidates") if SERVING_MMAP_DIR else "")
+
+# vizinhos item-item dos saves recentes do usuário (models/item_neighbors.py), reabertos quando o índice muda
+_neighbors = IndexWatcher(ITEM_NEIGHBORS_DIR, NeighborIndex, CANDIDATES_RELOAD_INTERVAL)
+# vizinhos por conteúdo (models/content_neighbors.py): mesmo formato, receitas sem interações incluídas
+_content = IndexWatcher(CONTENT_NEIGHBORS_DIR, NeighborIndex, CANDIDATES_RELOAD_INTERVAL)
+# fatores do ALS implícito (models/als.py): top receitas do usuário por produto interno
+_als = IndexWatcher(ALS_DIR, FactorIndex, CANDIDATES_RELOAD_INTERVAL)
+# IDs de receitas quase duplicadas -> canônico (pipelines/recipe_dedup.py), aplicado aos IDs gerados aqui
+_recipe_map = IndexWatcher(RECIPE_MAP_DIR, RecipeMap, CANDIDATES_RELOAD_INTERVAL)
+# busca BM25 por nome/busca das receitas (parâmetro `q`), carregada do log e atualizada incrementalmente
+# (IDs dos eventos passam pelo mapeamento de quase duplicatas; mapeamento novo = reconstrução)
+_search = QueryIndex(DATA_EVENTS_PATH, SEARCH_REFRESH_INTERVAL, recipe_map=_recipe_map.get)
+
+# rankings materializados por (user_id, variant, versão do modelo, versão das features)
+_rec_cache = RecCache(REC_CACHE_MAX_ENTRIES, REC_CACHE_TTL_SECONDS, int(REC_CACHE_MAX_MB * 1024 * 1024)) if REC_CACHE_ENABLED else None
+_refresher = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _refresher
+    _candidates.load()
+    _neighbors.get()
+    _content.get()
+    _als.get()
+    _recipe_map.get()
+    _search.start()  # carga em background: até ficar pronta, `q` cai no ranking normal
+    # carrega o bundle no startup (sem pico de latência no primeiro request) e acompanha o registro
+    try:
+        _models.load()
+    except Exception:
+        pass  # erro fica em /health; get_model() responde 500 até existir um modelo válido
+    _models.start(MODEL_WATCH_INTERVAL)
+    if get_event_store() is not None and EVENT_STORE_COMPACT_INTERVAL > 0:
+        get_event_store().start_compactor(EVENT_STORE_COMPACT_INTERVAL)
+    if _rec_cache is not None and REC_CACHE_REFRESH:
+        _refresher = CacheRefresher(lambda user_id, variant: cached_ranking(user_id, variant))
+    yield
+    if _refresher is not None:
+        _refresher.close()
+    if _batcher is not None:
+        _batcher.close()
+    _models.close()
+    _search.close()
+    close_event_logs()
+
+app = FastAPI(title="Prato do Dia - Reco API", version="1.0.0", lifespan=lifespan)
 
 @app.get("/")
 def root():
@@ -19,7 +93,9 @@ def root():
             "firebase_sync": "POST /firebase/sync - Sincronização de eventos do Firebase",
             "recipe_generated": "POST /firebase/recipe-generated - Evento de receita gerada",
             "recipe_favorited": "POST /firebase/recipe-favorited - Evento de receita favoritada",
-            "recommendations": "GET /recommendations - Recomendações personalizadas"
+            "recommendations": "GET /recommendations - Recomendações personalizadas",
+            "recommendations_batch": "POST /recommendations/batch - Recomendações em lote (NDJSON)",
+            "admin_models": "GET /admin/models | POST /admin/models/{pin,unpin,rollback} - Versões do modelo"
         }
     }
 
@@ -27,34 +103,103 @@ def root():
 def health():
     return {
         "status": "healthy",
-        "model_loaded": _model is not None,
-        "events_file_exists": Path(DATA_EVENTS_PATH).exists()
+        "model_loaded": _models.get() is not None,
+        "model": _models.stats(),
+        "events_file_exists": Path(DATA_EVENTS_PATH).exists(),
+        "candidates": _candidates.stats(),
+        "item_neighbors": _neighbors.stats(),
+        "content_neighbors": _content.stats(),
+        "als": _als.stats(),
+        "recipe_map": _recipe_map.stats(),
+        "recipe_catalog": get_recipe_catalog().stats(),
+        "search": _search.stats(),
+        "microbatch": _batcher.stats() if _batcher is not None else {"enabled": False},
+        "rec_cache": rec_cache_stats(),
+        "event_log": get_event_log().stats(),
+        "event_store": get_event_store().stats() if get_event_store() is not None else {"enabled": False}
     }
 
-# lazy load do modelo
-_model = None
-def get_model():
-    global _model
-    if _model is None:
-        if not os.path.exists(MODEL_PATH):
+# aquecimento de uma versão nova: predicts de alguns usuários reais, do cold-start e de um lote
+WARMUP_USERS = 20
+WARMUP_BATCH_ROWS = 10_000
+
+def warmup_model(bundle: ModelBundle):
+    """Valida o schema e roda predicts em candidatos reais antes da troca de versão"""
+    snap = _candidates.snapshot()
+    if snap is None:
+        return
+    matrix = snap.feature_matrix(bundle.features, check=bundle.check_columns)
+    for span in list(snap.offsets.values())[:WARMUP_USERS]:
+        bundle.predict(matrix[slice(*span)])
+    bundle.predict(matrix[snap.popular_rows()])
+    bundle.predict(matrix[:WARMUP_BATCH_ROWS])
+
+# bundle servido: CURRENT do registro (ou MODEL_PATH), carregado no startup e trocado a quente
+_models = ModelStore(ModelRegistry(MODEL_REGISTRY_DIR), MODEL_PATH, MODEL_SCORER, CANDIDATES_TOPN, warmup_model)
+
+def get_model() -> ModelBundle:
+    """Bundle atual; quem pontua deve pegar uma referência e usá-la até o fim do request"""
+    model = _models.get()
+    if model is None:
+        try:
+            model = _models.load()
+        except Exception as e:
+            raise HTTPException(500, f"Modelo inválido: {e}")
+        if model is None:
             raise HTTPException(500, "Modelo não encontrado. Treine primeiro.")
-        _model = lgb.Booster(model_file=MODEL_PATH)
-    return _model
+    return model
+
+def feature_matrix(snap, model: ModelBundle) -> np.ndarray:
+    """Matriz float32 das features do modelo sobre o snapshot (schema validado ao montar)"""
+    try:
+        return snap.feature_matrix(model.features, check=model.check_columns)
+    except ValueError as e:
+        raise HTTPException(500, str(e))
+
+# micro-batcher opcional: junta predicts pequenos de requisições concorrentes
+# (cada pedido é pontuado pelo bundle com que começou, mesmo durante uma troca de versão)
+_batcher = MicroBatcher(lambda model, X: model.predict(X), MICROBATCH_WINDOW_MS, MICROBATCH_MAX_ROWS) if MICROBATCH_ENABLED else None
+
+def score_candidates(model: ModelBundle, X: np.ndarray):
+    # o bundle vai junto do pedido: o lote nunca pontua com uma versão diferente da do request
+    if _batcher is None:
+        return model.predict(X)
+    return _batcher.predict(model, X)
+
+def canonical_recipe_id(recipe_id: str) -> str:
+    """ID canônico da receita (o próprio ID se não houver mapeamento)"""
+    rmap = _recipe_map.get()
+    return rmap.get(recipe_id) if rmap is not None else recipe_id
+
+def invalidate_users(user_ids):
+    """Descarta rankings em cache de usuários que receberam eventos novos (só neste worker)"""
+    if _rec_cache is None:
+        return
+    for user_id in set(user_ids):
+        variants = _rec_cache.invalidate_user(user_id)
+        if _refresher is not None and variants:
+            _refresher.submit(user_id, variants)
+
+def rec_cache_stats():
+    if _rec_cache is None:
+        return {"enabled": False}
+    stats = _rec_cache.stats()
+    if _refresher is not None:
+        stats["refresher"] = _refresher.stats()
+    return stats
 
 @app.post("/events", status_code=202)
 def ingest(ev: Event):
     """Ingestão de eventos genéricos (formato de simulação)"""
-    with open(DATA_EVENTS_PATH, "a") as f:
-        f.write(json.dumps(ev.model_dump(mode="json")) + "\n")
+    get_event_log().append(ev.model_dump(mode="json"))
+    invalidate_users([ev.user_id])
     return {"status": "accepted"}
 
 @app.post("/firebase/recipe-generated", status_code=202)
 def recipe_generated(event: RecipeGenerated):
     """Endpoint para receber eventos de receitas geradas no app"""
-    import hashlib
-    
-    # Gerar recipe_id baseado no nome da receita
-    recipe_id = f"rec_{hashlib.md5(event.recipe_name.lower().encode()).hexdigest()[:8]}"
+    # Gerar recipe_id baseado no nome da receita (quase duplicatas já conhecidas -> ID canônico)
+    recipe_id = canonical_recipe_id(name_recipe_id(event.recipe_name))
     
     # Converter para formato interno
     internal_event = {
@@ -64,14 +209,17 @@ def recipe_generated(event: RecipeGenerated):
         "recipe_id": recipe_id,
         "recipe_name": event.recipe_name,
         "query": event.query,
-        "full_recipe": event.full_recipe,
         "platform": "mobile",
         "source": "app"
     }
     
+    # Texto completo e metadados vão uma vez para o catálogo; o evento leva só o ID
+    get_recipe_catalog().put(recipe_id, event.recipe_name, event.query, event.full_recipe,
+                             event.calories, event.preparation_time)
     # Salvar evento
-    with open(DATA_EVENTS_PATH, "a") as f:
-        f.write(json.dumps(internal_event) + "\n")
+    get_event_log().append(internal_event)
+    invalidate_users([event.user_id])
+    _search.index.add(recipe_id, event.recipe_name, event.query)
     
     return {
         "status": "accepted",
@@ -82,10 +230,8 @@ def recipe_generated(event: RecipeGenerated):
 @app.post("/firebase/recipe-favorited", status_code=202)
 def recipe_favorited(event: RecipeFavorited):
     """Endpoint para receber eventos de receitas favoritadas no app"""
-    import hashlib
-    
-    # Gerar recipe_id baseado no nome da receita
-    recipe_id = f"rec_{hashlib.md5(event.name.lower().encode()).hexdigest()[:8]}"
+    # Gerar recipe_id baseado no nome da receita (quase duplicatas já conhecidas -> ID canônico)
+    recipe_id = canonical_recipe_id(name_recipe_id(event.name))
     
     # Converter para formato interno
     internal_event = {
@@ -99,9 +245,11 @@ def recipe_favorited(event: RecipeFavorited):
         "source": "app"
     }
     
+    get_recipe_catalog().put(recipe_id, event.name, event.query, event.response)
     # Salvar evento
-    with open(DATA_EVENTS_PATH, "a") as f:
-        f.write(json.dumps(internal_event) + "\n")
+    get_event_log().append(internal_event)
+    invalidate_users([event.user_id])
+    _search.index.add(recipe_id, event.name, event.query)
     
     return {
         "status": "accepted",
@@ -115,22 +263,29 @@ def firebase_sync(events: list[FirebaseEvent]):
     Sincronização em lote de eventos do Firebase
     Aceita múltiplos eventos de uma vez
     """
-    from data.firebase_sync import firebase_to_event
+    from data.firebase_sync import firebase_to_event, catalog_entry
     
-    processed = 0
-    with open(DATA_EVENTS_PATH, "a") as f:
-        for fb_event in events:
-            event_dict = {
-                "event_type": fb_event.event_type,
-                "user_id": fb_event.user_id,
-                "timestamp": fb_event.timestamp.isoformat() + "Z",
-                "data": fb_event.data
-            }
-            
-            internal_event = firebase_to_event(event_dict)
-            if internal_event:
-                f.write(json.dumps(internal_event) + "\n")
-                processed += 1
+    internal_events, entries = [], []
+    for fb_event in events:
+        event_dict = {
+            "event_type": fb_event.event_type,
+            "user_id": fb_event.user_id,
+            "timestamp": fb_event.timestamp.isoformat() + "Z",
+            "data": fb_event.data
+        }
+        
+        internal_event = firebase_to_event(event_dict)
+        if internal_event:
+            if internal_event.get("recipe_id"):
+                internal_event["recipe_id"] = canonical_recipe_id(internal_event["recipe_id"])
+            internal_events.append(internal_event)
+            entries.append(catalog_entry(event_dict, internal_event["recipe_id"]))
+    get_recipe_catalog().put_many(entries)
+    get_event_log().extend(internal_events)
+    processed = len(internal_events)
+    invalidate_users(ev.user_id for ev in events)
+    for ev in internal_events:
+        _search.index.add(ev.get("recipe_id"), ev.get("recipe_name"), ev.get("query"))
     
     return {
         "status": "accepted",
@@ -139,31 +294,250 @@ def firebase_sync(events: list[FirebaseEvent]):
         "message": f"{processed} eventos sincronizados com sucesso"
     }
 
-def load_candidates(user_id: str) -> pd.DataFrame:
-    # KISS: usar features de validação como candidatos (em produção: gerar topN por dieta/popularidade/similares)
-    from common.config import FEATURES_VAL_PATH
-    if not os.path.exists(FEATURES_VAL_PATH):
+def load_candidates(user_id: str, snap=None, segment=None):
+    """
+    Candidatos do usuário: (linhas do snapshot, receitas de retrieval fora dele ou None)
+    Linhas = as do usuário (slice) ou as populares do segmento no cold-start
+    """
+    snap = snap or _candidates.snapshot()
+    if snap is None:
         raise HTTPException(500, "Gere features primeiro.")
-    df = pd.read_parquet(FEATURES_VAL_PATH)
-    # pegar subset do usuário; se muito pequeno, usar top por views
-    du = df[df.user_id == user_id]
-    if du.empty:
-        du = df.sort_values("views", ascending=False).head(CANDIDATES_TOPN).copy()
-        du["user_id"] = user_id
-    return du
+    span = snap.offsets.get(user_id)
+    rows = slice(*span) if span is not None else snap.popular_rows(segment)
+    return rows, retrieval_candidates(user_id, snap, rows)
 
-@app.get("/recommendations", response_model=RecResponse)
-def recommendations(user_id: str, k: int = TOP_K, variant: str = Query("model_v1", enum=["baseline","model_v1"])):
-    df = load_candidates(user_id)
-    # baseline = ordenar por saves/views/pop
-    if variant == "baseline":
-        df = df.assign(score=(df["saves"] / (df["views"].clip(lower=1)))).sort_values("score", ascending=False)
+def has_factors(user_id: str) -> bool:
+    als = _als.get() if ALS_CANDIDATES > 0 else None
+    return als is not None and als.user_row(user_id) is not None
+
+def retrieval_candidates(user_id: str, snap, rows) -> Optional[np.ndarray]:
+    """Receitas fora das linhas candidatas: top do ALS + vizinhos item-item e de conteúdo (sem repetição)"""
+    own = snap.arrays["recipe_id"][rows]
+    parts = []
+    als = _als.get() if ALS_CANDIDATES > 0 else None
+    if als is not None:
+        parts.append(als.recommend(user_id, ALS_CANDIDATES, exclude=own)[0])
+    span = snap.offsets.get(user_id)
+    if span is not None:
+        # item-item a partir dos saves; conteúdo a partir de qualquer interação (inclui receitas geradas)
+        parts.append(neighbor_candidates(_neighbors, snap, span, ITEM_NEIGHBORS_SEEDS, ITEM_NEIGHBORS_CANDIDATES, saved=True))
+        parts.append(neighbor_candidates(_content, snap, span, CONTENT_NEIGHBORS_SEEDS, CONTENT_NEIGHBORS_CANDIDATES))
+    extra = np.concatenate(parts) if parts else np.empty(0, dtype=str)
+    if len(extra) == 0:
+        return None
+    _, first = np.unique(extra, return_index=True)
+    return extra[np.sort(first)]
+
+def neighbor_candidates(watcher: IndexWatcher, snap, span, seeds: int, limit: int,
+                        saved: bool = False) -> np.ndarray:
+    """Vizinhos (índice item-item ou de conteúdo) das receitas mais recentes do usuário"""
+    index = watcher.get() if limit > 0 else None
+    if index is None:
+        return np.empty(0, dtype=str)
+    rows = np.arange(*span)
+    if saved:
+        rows = rows[snap.arrays["saves"][rows] > 0]
+    rows = rows[np.argsort(snap.arrays["last_ts"][rows], kind="stable")[::-1][:seeds]]
+    recipe_ids, _ = index.neighbors(snap.arrays["recipe_id"][rows], limit,
+                                    exclude=snap.arrays["recipe_id"][slice(*span)])
+    return recipe_ids
+
+def candidate_matrix(snap, rows, model: Optional[ModelBundle], extra: Optional[np.ndarray] = None,
+                     user_row: Optional[int] = None):
+    """
+    (recipe_ids, matriz de features) dos candidatos, na ordem linhas + extras
+    Sem modelo (baseline), a "matriz" já é o score: saves/views, com 0 para as receitas extras
+    `extra`: receitas de retrieval fora do snapshot para o usuário de `rows`
+    (slice ou `user_row`; nas linhas populares do cold-start as features de usuário ficam zeradas)
+    """
+    recipe_ids = snap.arrays["recipe_id"][rows]
+    if model is None:
+        X = snap.arrays["saves"][rows] / np.clip(snap.arrays["views"][rows], 1, None)
+        if extra is not None:
+            X = np.concatenate([X, np.zeros(len(extra))])
     else:
-        model = get_model()
-        X = df.drop(columns=["user_id","recipe_id","last_ts","label"], errors="ignore")
-        df = df.assign(score=model.predict(X)).sort_values("score", ascending=False)
+        X = feature_matrix(snap, model)[rows]
+        if extra is not None:
+            if user_row is None and isinstance(rows, slice):
+                user_row = rows.start
+            X = np.vstack([X, snap.unseen_matrix(user_row, extra, model.features,
+                                                 LEVEL_COLS["user"], LEVEL_COLS["recipe"], UNSEEN_PAIR)])
+    if extra is not None:
+        recipe_ids = np.concatenate([recipe_ids, extra])
+    return recipe_ids, X
+
+def sort_ranking(recipe_ids: np.ndarray, scores: np.ndarray):
+    order = np.argsort(-scores, kind="stable")
+    return recipe_ids[order], scores[order]
+
+def rank_rows(snap, rows, model: Optional[ModelBundle], extra: Optional[np.ndarray] = None,
+              user_row: Optional[int] = None):
+    """Pontua e ordena candidatos: (recipe_ids, scores) em ordem decrescente"""
+    recipe_ids, X = candidate_matrix(snap, rows, model, extra, user_row)
+    return sort_ranking(recipe_ids, X if model is None else score_candidates(model, X))
+
+def variant_model(variant: str) -> Optional[ModelBundle]:
+    return None if variant == "baseline" else get_model()
+
+def rank_candidates(user_id: str, variant: str, snap=None, segment=None, model=None):
+    """Ranking completo dos candidatos do usuário"""
+    snap = snap or _candidates.snapshot()
+    model = model or variant_model(variant)
+    rows, extra = load_candidates(user_id, snap, segment)
+    return rank_rows(snap, rows, model, extra)
+
+def cold_ranking(snap, segment, variant: str, model: Optional[ModelBundle] = None):
+    """Ranking do cold-start, pontuado uma vez por segmento/variante/versão do modelo"""
+    model = model or variant_model(variant)
+    key = (segment, variant, model.version if model is not None else None)
+    ranking = snap.cold_rankings.get(key)
+    if ranking is None:
+        ranking = rank_rows(snap, snap.popular_rows(segment), model)
+        snap.cold_rankings[key] = ranking
+    return ranking
+
+def cached_ranking(user_id: str, variant: str, segment=None):
+    """Ranking do usuário via cache materializado (recalcula em caso de miss)"""
+    snap = _candidates.snapshot()
+    # sem linhas no snapshot: ranking compartilhado do cold-start, a menos que o ALS conheça o usuário
+    if snap is not None and user_id not in snap.offsets and not has_factors(user_id):
+        return cold_ranking(snap, segment, variant)
+    if _rec_cache is None or snap is None:
+        return rank_candidates(user_id, variant, snap, segment)
+    model = variant_model(variant)
+    # o segmento só muda os candidatos de quem não tem linhas no snapshot
+    cold_segment = segment if user_id not in snap.offsets else None
+    key = (user_id, variant, model.version if model is not None else None, snap.signature,
+           _neighbors.signature, _content.signature, _als.signature, cold_segment)
+    ranking = _rec_cache.get(key)
+    if ranking is None:
+        ranking = rank_candidates(user_id, variant, snap, model=model)
+        _rec_cache.put(key, ranking)
+    return ranking
+
+def search_ranking(user_id: str, variant: str, q: str, snap=None):
+    """
+    Ranking restrito às receitas que casam com a busca `q` (top SEARCH_CANDIDATES por BM25)
+    Linhas do usuário para as receitas já vistas, o resto entra como extra; None se nada casar
+    """
+    matches, _ = _search.index.search(q, SEARCH_CANDIDATES)
+    snap = snap or _candidates.snapshot()
+    if len(matches) == 0 or snap is None:
+        return None
+    span = snap.offsets.get(user_id)
+    rows, user_row = np.empty(0, dtype=np.int64), None
+    if span is not None:
+        own = np.arange(*span)
+        rows = own[np.isin(snap.arrays["recipe_id"][own], matches)]
+        matches = matches[~np.isin(matches, snap.arrays["recipe_id"][rows])]
+        user_row = span[0]
+    return rank_rows(snap, rows, variant_model(variant), matches if len(matches) else None, user_row)
+
+@app.get("/recommendations", response_model=RecResponse)
+def recommendations(user_id: str, k: int = TOP_K, variant: str = Query("model_v1", enum=["baseline","model_v1"]),
+                    diet_selected: Optional[str] = None, platform: Optional[str] = None,
+                    q: Optional[str] = None):
+    # diet_selected/platform só afetam o cold-start (usuário sem histórico)
+    snap = _candidates.snapshot()
+    # busca textual: ranking só entre as receitas casadas (fora do cache); sem resultado, ranking normal
+    ranking = search_ranking(user_id, variant, q, snap) if q else None
+    reason = "search" if ranking is not None else "model"
+    if ranking is None:
+        segment = snap.segment(diet_selected=diet_selected, platform=platform) if snap is not None else None
+        ranking = cached_ranking(user_id, variant, segment)
+    recipe_ids, scores = ranking
+    return RecResponse(user_id=user_id, items=rec_items(recipe_ids[:k], scores[:k], reason))
+
+def rec_items(recipe_ids, scores, reason: str = "model", labels: Optional[dict] = None) -> list:
+    """RecItems com nome e busca vindos do catálogo (consulta por chave primária, sem ler eventos)"""
+    if labels is None:
+        labels = get_recipe_catalog().lookup(recipe_ids)
+    items = []
+    for r, s in zip(recipe_ids, scores):
+        name, query = labels.get(r, (None, None))
+        items.append(RecItem(recipe_id=r, score=float(s), reason=reason, recipe_name=name, query=query))
+    return items
+
+def _batch_lines(snap, user_ids: list, k: int, variant: str, model: Optional[ModelBundle]):
+    """
+    Gera as linhas NDJSON do lote: mesmos candidatos do /recommendations (snapshot + ALS +
+    vizinhos; cold-start compartilhado), com um predict por bloco de usuários
+    """
+    for i in range(0, len(user_ids), BATCH_CHUNK_USERS):
+        chunk = user_ids[i:i + BATCH_CHUNK_USERS]
+        rankings, warm, blocks = {}, [], []
+        for user_id in chunk:
+            if user_id not in snap.offsets and not has_factors(user_id):
+                rankings[user_id] = cold_ranking(snap, None, variant, model)
+                continue
+            rows, extra = load_candidates(user_id, snap)
+            recipe_ids, X = candidate_matrix(snap, rows, model, extra)
+            warm.append((user_id, recipe_ids))
+            blocks.append(X)
+        if warm:
+            X = np.concatenate(blocks)
+            scores = X if model is None else model.predict(X)
+            bounds = np.cumsum([len(ids) for _, ids in warm])[:-1]
+            for (user_id, recipe_ids), sc in zip(warm, np.split(scores, bounds)):
+                rankings[user_id] = sort_ranking(recipe_ids, sc)
+        # uma consulta ao catálogo por bloco de usuários
+        labels = get_recipe_catalog().lookup(np.concatenate([r[0][:k] for r in rankings.values()]))
+        for user_id in chunk:
+            recipe_ids, scores = rankings[user_id]
+            items = rec_items(recipe_ids[:k], scores[:k], labels=labels)
+            yield RecResponse(user_id=user_id, items=items).model_dump_json() + "\n"
+
+@app.post("/recommendations/batch")
+def recommendations_batch(req: BatchRecRequest):
+    """
+    Recomendações para vários usuários de uma vez
+    Monta uma única matriz de features por bloco (candidatos iguais aos do
+    /recommendations), roda um predict e devolve NDJSON em streaming
+    (uma linha RecResponse por usuário)
+    """
+    snap = _candidates.snapshot()
+    if snap is None:
+        raise HTTPException(500, "Gere features primeiro.")
+    # modelo resolvido antes do streaming: falha cedo e o lote inteiro usa a mesma versão
+    model = get_model() if req.variant == "model_v1" else None
+    k = req.k or TOP_K
+    return StreamingResponse(_batch_lines(snap, req.user_ids, k, req.variant, model), media_type="application/x-ndjson")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(403, "Token de admin inválido")
+
+def _admin_status():
+    return {"registry": _models.registry.status(), "serving": _models.stats()}
+
+def _admin_apply(action):
+    """Aplica a mudança de ponteiro no registro e carrega a versão na hora"""
+    try:
+        action()
+    except KeyError as e:
+        raise HTTPException(404, str(e.args[0]))
+    try:
+        _models.load()
+    except Exception as e:
+        raise HTTPException(500, f"Falha ao carregar/aquecer o modelo (segue a versão anterior): {e}")
+    return _admin_status()
+
+@app.get("/admin/models", dependencies=[Depends(require_admin)])
+def admin_models():
+    """Versões no registro, ponteiros CURRENT/PINNED e o bundle servido"""
+    return _admin_status()
+
+@app.post("/admin/models/pin", dependencies=[Depends(require_admin)])
+def admin_pin(version: str):
+    """Fixa uma versão (publicações novas não a trocam)"""
+    return _admin_apply(lambda: _models.registry.pin(version))
 
-    out = df.head(k)
-    items = [RecItem(recipe_id=r.recipe_id, score=float(r.score)) for r in out.itertuples()]
-    return RecResponse(user_id=user_id, items=items)
+@app.post("/admin/models/unpin", dependencies=[Depends(require_admin)])
+def admin_unpin():
+    """Remove o pin e volta para a versão mais recente"""
+    return _admin_apply(_models.registry.unpin)
 
+@app.post("/admin/models/rollback", dependencies=[Depends(require_admin)])
+def admin_rollback():
+    """Fixa a versão anterior à atual"""
+    return _admin_apply(_models.registry.rollback)
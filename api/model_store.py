@@ -0,0 +1,114 @@
+"""
+Modelo servido pela API com hot-swap atômico
+Segue o CURRENT do registro de modelos (ou o MODEL_PATH, se o registro estiver
+vazio); uma thread verifica o ponteiro a cada `interval` segundos, carrega a
+versão nova em background, aquece com predicts em candidatos reais e só então
+troca a referência. Requisições em andamento terminam com o bundle que já pegaram.
+"""
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from common.fs import file_signature
+from models.bundle import ModelBundle, manifest_path
+from models.registry import ModelRegistry
+
+
+class ModelStore:
+    def __init__(self, registry: ModelRegistry, fallback_path: str, scorer: str = "lightgbm",
+                 warmup_rows: int = 200, warmup: Optional[Callable[[ModelBundle], None]] = None):
+        self.registry = registry
+        self.fallback_path = fallback_path
+        self.scorer = scorer
+        self.warmup_rows = warmup_rows
+        self.warmup = warmup
+        self.loaded_at: Optional[float] = None
+        self.swaps = 0
+        self.last_error: Optional[str] = None
+        self.warmup_seconds = 0.0
+        self._bundle: Optional[ModelBundle] = None
+        self._key = None
+        self._failed_key = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get(self) -> Optional[ModelBundle]:
+        return self._bundle
+
+    def _target(self) -> Optional[Tuple[Path, tuple]]:
+        """(caminho do modelo, chave de identidade) que deveria estar servido"""
+        version = self.registry.current()
+        if version is not None:
+            return self.registry.model_path(version), ("registry", version)
+        sig = file_signature(self.fallback_path)
+        if sig is None:
+            return None
+        # modelo e manifesto: a troca de qualquer um dos dois gera uma chave nova (e nova tentativa)
+        return Path(self.fallback_path), ("path", self.fallback_path, sig, file_signature(manifest_path(self.fallback_path)))
+
+    def load(self, force: bool = False) -> Optional[ModelBundle]:
+        """
+        Carrega e aquece o alvo atual se ele mudou; falhas mantêm o modelo em uso
+        Sem modelo em uso, um alvo que já falhou repete o erro guardado (não some como "sem modelo")
+        """
+        with self._lock:
+            target = self._target()
+            if target is None:
+                return self._bundle
+            path, key = target
+            if not force and key == self._failed_key and self._bundle is None:
+                raise RuntimeError(self.last_error)
+            if not force and key in (self._key, self._failed_key):
+                return self._bundle
+            try:
+                bundle = ModelBundle(path, self.scorer, self.warmup_rows)
+                t0 = time.perf_counter()
+                if self.warmup is not None:
+                    self.warmup(bundle)
+                self.warmup_seconds = time.perf_counter() - t0
+            except Exception as e:
+                self._failed_key = key
+                self.last_error = f"{key}: {e}"
+                raise
+            # troca atômica da referência
+            self._bundle, self._key = bundle, key
+            self._failed_key, self.last_error = None, None
+            self.loaded_at = time.time()
+            self.swaps += 1
+            return bundle
+
+    def start(self, interval: float):
+        """Thread que acompanha o ponteiro CURRENT (interval <= 0: desligado)"""
+        if interval <= 0 or self._thread is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.load()
+                except Exception:
+                    pass  # erro fica em last_error; segue com o modelo atual
+
+        self._thread = threading.Thread(target=run, name="model-watcher", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        bundle = self._bundle
+        return {
+            "loaded": bundle is not None,
+            **(bundle.info() if bundle is not None else {}),
+            "source": self._key[0] if self._key else None,
+            "swaps": self.swaps,
+            "loaded_at": self.loaded_at,
+            "warmup_seconds": round(self.warmup_seconds, 4),
+            "watching": self._thread is not None,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,58 @@
+"""
+Índices de retrieval servidos pela API (candidatos além das linhas do snapshot)
+Cada índice é um diretório de .npy + meta.json gravado offline; a API reabre o
+índice quando a assinatura do meta.json muda, sem bloquear requisições.
+"""
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from common.fs import file_signature
+
+
+class IndexWatcher:
+    def __init__(self, path: str, opener: Callable, reload_interval: float = 5.0):
+        self.path = Path(path)
+        self.opener = opener
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self._index = None
+        self._sig = None
+        self._checked_at = -float("inf")
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Índice atual (None se ainda não foi construído)"""
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval or not self._lock.acquire(blocking=False):
+            return self._index
+        try:
+            self._checked_at = now
+            sig = file_signature(str(self.path / "meta.json"))
+            # sem meta.json (ainda não construído ou no meio da troca de diretório): mantém o atual
+            if sig is not None and sig != self._sig:
+                try:
+                    self._index, self._sig = self.opener(self.path), sig
+                    self.reloads += 1
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = str(e)  # tenta de novo no próximo intervalo
+            return self._index
+        finally:
+            self._lock.release()
+
+    @property
+    def signature(self):
+        return self._sig
+
+    def stats(self) -> dict:
+        index = self._index
+        return {
+            "loaded": index is not None,
+            "path": str(self.path),
+            **({k: v for k, v in index.meta.items() if not isinstance(v, (list, dict))} if index is not None else {}),
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,259 @@
+"""
+Índice invertido BM25 em memória sobre nomes e buscas das receitas
+
+Documento = nome da receita + buscas (`query`) distintas que levaram a ela,
+tokenizados sem acentos (common/text.py). As postings ficam em CSR por termo
+(ids de documento int32 ordenados + frequências), mais um delta pequeno com
+as adições recentes; o delta é fundido no CSR quando passa de uma fração do
+índice, então carga inicial e atualizações incrementais custam O(n log n)
+amortizado. `add` é idempotente (mesma receita + mesma busca não conta duas vezes),
+o que permite indexar pelo endpoint e depois reler o mesmo evento do log.
+Os IDs dos eventos passam pelo mapeamento de receitas quase duplicadas
+(common/recipe_ids.py); quando o mapeamento muda, o índice é reconstruído.
+"""
+import math
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from common.event_store import StoreCursor, get_event_store, iter_event_chunks, last_complete_offset
+from common.text import tokenize
+
+COLUMNS = ["recipe_id", "recipe_name", "query"]
+
+
+class BM25Index:
+    """Índice invertido receita -> termos com ranking BM25 (k1, b) e adições incrementais"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, merge_min: int = 4096):
+        self.k1 = k1
+        self.b = b
+        self.merge_min = merge_min
+        self.vocab: Dict[str, int] = {}
+        self.recipe_ids: List[str] = []
+        self.doc_of: Dict[str, int] = {}
+        self._queries: List[Set[str]] = []
+        self._len = np.zeros(1024, dtype=np.float32)
+        self._total_len = 0.0
+        # postings fundidas: docs do termo t em post_docs[term_ptr[t]:term_ptr[t + 1]]
+        self.term_ptr = np.zeros(1, dtype=np.int64)
+        self.post_docs = np.zeros(0, dtype=np.int32)
+        self.post_tf = np.zeros(0, dtype=np.float32)
+        # delta ainda não fundido: termo -> (docs, tf) em arrays de append
+        self._delta: Dict[int, Tuple[array, array]] = {}
+        self._delta_size = 0
+        self.merges = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.recipe_ids)
+
+    def add(self, recipe_id: str, name: Optional[str] = None, query: Optional[str] = None) -> bool:
+        """Indexa a receita (nome na primeira vez) e a busca, se for nova; False = nada mudou"""
+        if not recipe_id:
+            return False
+        query = (query or "").strip()
+        with self._lock:
+            doc = self.doc_of.get(recipe_id)
+            text = []
+            if doc is None:
+                if not (name or query):
+                    return False
+                doc = len(self.recipe_ids)
+                self.doc_of[recipe_id] = doc
+                self.recipe_ids.append(recipe_id)
+                self._queries.append(set())
+                if doc >= len(self._len):
+                    self._len = np.concatenate([self._len, np.zeros(len(self._len), dtype=np.float32)])
+                text.append(name or "")
+            if query and query not in self._queries[doc]:
+                self._queries[doc].add(query)
+                text.append(query)
+            tokens = tokenize(" ".join(text))
+            if not tokens:
+                return bool(text)
+            for term, tf in Counter(self.vocab.setdefault(t, len(self.vocab)) for t in tokens).items():
+                docs, tfs = self._delta.setdefault(term, (array("i"), array("f")))
+                docs.append(doc)
+                tfs.append(tf)
+            self._delta_size += len(set(tokens))
+            self._len[doc] += len(tokens)
+            self._total_len += len(tokens)
+            # fusão geométrica: o delta cresce junto com o índice (custo amortizado constante)
+            if self._delta_size >= max(self.merge_min, len(self.post_docs) // 8):
+                self.merge()
+            return True
+
+    def merge(self):
+        """Funde o delta nas postings CSR (somando tf de termo×doc repetidos)"""
+        with self._lock:
+            if not self._delta:
+                return
+            n_terms = len(self.vocab)
+            base_terms = np.repeat(np.arange(len(self.term_ptr) - 1, dtype=np.int64), np.diff(self.term_ptr))
+            d_terms = [np.full(len(d), t, dtype=np.int64) for t, (d, _) in self._delta.items()]
+            terms = np.concatenate([base_terms] + d_terms)
+            docs = np.concatenate([self.post_docs] + [np.frombuffer(d, dtype=np.int32) for d, _ in self._delta.values()])
+            tf = np.concatenate([self.post_tf] + [np.frombuffer(f, dtype=np.float32) for _, f in self._delta.values()])
+            keys, inv = np.unique(terms * (len(self.recipe_ids) + 1) + docs, return_inverse=True)
+            self.post_tf = np.bincount(inv, weights=tf).astype(np.float32)
+            terms = keys // (len(self.recipe_ids) + 1)
+            self.post_docs = (keys % (len(self.recipe_ids) + 1)).astype(np.int32)
+            self.term_ptr = np.zeros(n_terms + 1, dtype=np.int64)
+            np.cumsum(np.bincount(terms, minlength=n_terms), out=self.term_ptr[1:])
+            self._delta, self._delta_size = {}, 0
+            self.merges += 1
+
+    def _postings(self, term: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(docs, tf) do termo: CSR fundido + delta"""
+        # termos novos (ainda só no delta) ficam fora do term_ptr
+        lo, hi = (self.term_ptr[term], self.term_ptr[term + 1]) if term < len(self.term_ptr) - 1 else (0, 0)
+        docs, tf = self.post_docs[lo:hi], self.post_tf[lo:hi]
+        if term not in self._delta:
+            return docs, tf
+        d, f = self._delta[term]
+        d, inv = np.unique(np.frombuffer(d, dtype=np.int32), return_inverse=True)
+        f = np.bincount(inv, weights=np.frombuffer(f, dtype=np.float32))
+        # doc já presente no CSR (busca nova de uma receita antiga): soma o tf na posição dele
+        pos = np.minimum(np.searchsorted(docs, d), max(len(docs) - 1, 0))
+        hit = (docs[pos] == d) if len(docs) else np.zeros(len(d), dtype=bool)
+        if hit.any():
+            tf = tf.copy()
+            tf[pos[hit]] += f[hit]
+        return np.concatenate([docs, d[~hit]]), np.concatenate([tf, f[~hit].astype(np.float32)])
+
+    def search(self, q: str, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-n receitas por BM25 para o texto `q`
+
+        Returns:
+            (recipe_ids, scores) em ordem decrescente (vazios se nenhum termo casar)
+        """
+        with self._lock:
+            n_docs = len(self.recipe_ids)
+            terms = {self.vocab[t] for t in tokenize(q) if t in self.vocab}
+            if not terms or n <= 0 or n_docs == 0:
+                return np.empty(0, dtype=str), np.empty(0, dtype=np.float32)
+            avgdl = self._total_len / n_docs
+            # acumulador denso (um float por receita): soma por bincount, sem ordenar as postings
+            scores = np.zeros(n_docs)
+            for term in terms:
+                docs, tf = self._postings(term)
+                if len(docs) == 0:
+                    continue
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * self._len[docs] / avgdl)
+                scores += np.bincount(docs, weights=idf * tf * (self.k1 + 1) / (tf + norm), minlength=n_docs)
+            docs = np.flatnonzero(scores)  # idf > 0: toda receita casada tem score positivo
+            scores = scores[docs].astype(np.float32)
+            if len(docs) == 0:
+                return np.empty(0, dtype=str), np.empty(0, dtype=np.float32)
+            if len(docs) > n:
+                top = np.argpartition(-scores, n - 1)[:n]
+                docs, scores = docs[top], scores[top]
+            order = np.lexsort((docs, -scores))
+            ids = np.array([self.recipe_ids[d] for d in docs[order]], dtype=str)
+            return ids, scores[order]
+
+    def stats(self) -> dict:
+        return {"recipes": len(self.recipe_ids), "terms": len(self.vocab), "postings": int(len(self.post_docs)),
+                "delta": self._delta_size, "merges": self.merges}
+
+
+class QueryIndex:
+    """
+    BM25Index alimentado pelo log de eventos: carga inicial e leitura incremental
+    dos eventos novos (offset do NDJSON; no event store, partes novas e offset por segmento),
+    em background
+
+    `recipe_map`: devolve o RecipeMap atual (ou None); IDs dos eventos viram canônicos
+    e um `digest` novo reconstrói o índice do zero (o antigo atende até a troca)
+    """
+
+    def __init__(self, path: str, refresh_interval: float = 2.0, recipe_map: Optional[Callable] = None):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.recipe_map = recipe_map
+        self.index = BM25Index()
+        self.ready = False
+        self.build_seconds = 0.0
+        self.rebuilds = 0
+        self.last_error: Optional[str] = None
+        self._offset = 0
+        self._cursor: Optional[StoreCursor] = None
+        self._digest = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> int:
+        """Indexa os eventos com nome/busca de receita ainda não lidos; devolve quantos leu"""
+        rmap = self.recipe_map() if self.recipe_map is not None else None
+        digest = rmap.digest if rmap is not None else None
+        rebuild = digest != self._digest
+        # mapeamento novo: relê tudo num índice à parte e troca no fim
+        index, offset, cursor = (BM25Index(), 0, None) if rebuild else (self.index, self._offset, self._cursor)
+        store = get_event_store()
+        if store is not None:
+            # cópia: só vira a posição atual se a leitura terminar (eventos compactados relidos: add é idempotente)
+            cursor = cursor.copy() if cursor is not None else StoreCursor()
+            chunks = store.iter_new(COLUMNS, cursor)
+        else:
+            end = last_complete_offset(self.path)
+            if end < offset:
+                offset = 0  # arquivo truncado/recriado
+            chunks = iter_event_chunks(COLUMNS, path=self.path, start=offset, end=end)
+        read = 0
+        for ch in chunks:
+            ch = ch.loc[ch["recipe_name"].notna() | ch["query"].notna(), COLUMNS].fillna("")
+            if rmap is not None:
+                rmap.apply(ch)  # variantes de uma receita indexadas no canônico
+            for rid, name, q in zip(ch["recipe_id"], ch["recipe_name"], ch["query"]):
+                index.add(rid, name, q)
+            read += len(ch)
+        if rebuild:
+            index.merge()
+            self.index, self._digest = index, digest
+            self.rebuilds += 1
+        if store is None:
+            self._offset = end
+        else:
+            self._cursor = cursor
+        return read
+
+    def start(self):
+        """Carga inicial + leitura incremental a cada refresh_interval (0 = só a carga inicial)"""
+        if self._thread is not None:
+            return
+
+        def run():
+            t0 = time.perf_counter()
+            try:
+                self.refresh()
+                self.index.merge()
+            except Exception as e:
+                self.last_error = str(e)
+            self.build_seconds = time.perf_counter() - t0
+            self.ready = True
+            while self.refresh_interval > 0 and not self._stop.wait(self.refresh_interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    self.last_error = str(e)  # tenta de novo no próximo intervalo
+
+        self._thread = threading.Thread(target=run, name="query-index", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {"ready": self.ready, **self.index.stats(), "build_seconds": round(self.build_seconds, 3),
+                "rebuilds": self.rebuilds, "recipe_map_digest": self._digest,
+                "refresh_interval": self.refresh_interval, "last_error": self.last_error}
@@ -0,0 +1,108 @@
+"""
+Benchmark: retrieval por ALS implícito (models/als.py)
+
+Gera interações sintéticas com gosto latente (cada usuário prefere alguns
+"estilos" de receita), separa uma interação por usuário como teste, treina o
+ALS e compara o recall@n do retrieval com o de popularidade. Mede também o
+tempo de treino e a latência p50/p99 de `recommend()` (fatores mapeados).
+
+Uso:
+    PYTHONPATH=. python benchmarks/bench_als.py --users 200000 --recipes 20000
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+from models.als import FactorIndex, train_als
+from models.item_neighbors import save_arrays
+
+
+def synthetic(users: int, recipes: int, per_user: int, styles: int = 50, seed: int = 0) -> sp.csr_matrix:
+    rng = np.random.default_rng(seed)
+    style = rng.integers(0, styles, recipes)
+    by_style = np.argsort(style, kind="stable")
+    starts = np.searchsorted(style[by_style], np.arange(styles))
+    sizes = np.bincount(style, minlength=styles)
+    pop = rng.zipf(1.5, recipes).astype(float)
+    fav = rng.integers(0, styles, (users, 2))  # dois estilos preferidos por usuário
+    u = np.repeat(np.arange(users), per_user)
+    # 70% das interações nos estilos preferidos, 30% pela popularidade global
+    s = fav[u, rng.integers(0, 2, len(u))]
+    r = by_style[starts[s] + (rng.random(len(s)) * sizes[s]).astype(int)]
+    noise = rng.random(len(u)) < 0.3
+    r[noise] = rng.choice(recipes, noise.sum(), p=pop / pop.sum())
+    w = np.where(rng.random(len(u)) < 0.1, 4.0, 1.0)  # ~10% saves
+    R = sp.csr_matrix((w, (u, r)), shape=(users, recipes), dtype="float32")
+    R.sum_duplicates()
+    return R
+
+
+def holdout(R: sp.csr_matrix, seed: int = 1):
+    """Separa uma interação aleatória de cada usuário com 2+ interações"""
+    rng = np.random.default_rng(seed)
+    counts = np.diff(R.indptr)
+    users = np.flatnonzero(counts >= 2)
+    pick = R.indptr[users] + rng.integers(0, counts[users])
+    test = R.indices[pick]
+    train = R.copy()
+    train.data[pick] = 0
+    train.eliminate_zeros()
+    return train, users, test
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=200_000)
+    ap.add_argument("--recipes", type=int, default=20_000)
+    ap.add_argument("--per-user", type=int, default=15)
+    ap.add_argument("--factors", type=int, default=32)
+    ap.add_argument("--iterations", type=int, default=15)
+    ap.add_argument("--n", type=int, default=200, help="candidatos por usuário (CANDIDATES_TOPN)")
+    ap.add_argument("--eval-users", type=int, default=5000)
+    args = ap.parse_args()
+
+    R = synthetic(args.users, args.recipes, args.per_user)
+    train, users, test = holdout(R)
+    t0 = time.perf_counter()
+    X, Y = train_als(train, args.factors, args.iterations)
+    t_train = time.perf_counter() - t0
+    print(f"{train.nnz:,} interações | {args.users:,} usuários | {args.recipes:,} receitas "
+          f"| {args.factors} fatores x {args.iterations} iterações | treino {t_train:.1f}s")
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench-als-"))
+    try:
+        ids = np.char.add("u", np.arange(args.users).astype(str))
+        recipes = np.char.add("rec_", np.arange(args.recipes).astype(str))
+        u_order, r_order = np.argsort(ids), np.argsort(recipes)
+        save_arrays(tmp / "als", {"users": ids[u_order], "user_factors": X[u_order],
+                                  "recipes": recipes[r_order], "item_factors": Y[r_order]}, {})
+        ix = FactorIndex(tmp / "als")
+
+        rng = np.random.default_rng(2)
+        sample = rng.choice(len(users), min(args.eval_users, len(users)), replace=False)
+        popular = recipes[np.argsort(-np.asarray(train.sum(axis=0)).ravel())]
+        hits_als, hits_pop, lat = 0, 0, []
+        for j in sample:
+            u = users[j]
+            seen = recipes[train.indices[train.indptr[u]:train.indptr[u + 1]]]
+            t0 = time.perf_counter()
+            got, _ = ix.recommend(ids[u], args.n, exclude=seen)
+            lat.append(time.perf_counter() - t0)
+            target = recipes[test[j]]
+            hits_als += target in set(got)
+            hits_pop += target in set(popular[~np.isin(popular, seen)][:args.n])
+        lat = np.array(lat) * 1000
+        print(f"recall@{args.n} (1 interação separada por usuário, {len(sample):,} usuários): "
+              f"ALS {hits_als / len(sample):.3f} | popularidade {hits_pop / len(sample):.3f}")
+        print(f"recommend(): p50 {np.percentile(lat, 50):.3f}ms | p99 {np.percentile(lat, 99):.3f}ms")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: append por evento (open/write/close) vs EventLog com group commit
+
+Uso:
+    PYTHONPATH=. python benchmarks/bench_eventlog.py --events 20000 --threads 8
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from common.eventlog import EventLog
+
+
+def make_event(i: int) -> dict:
+    return {
+        "event_time": "2025-10-05T18:00:00Z",
+        "user_id": f"user_{i % 500}",
+        "event_name": "recipe_view",
+        "recipe_id": f"rec_{i % 1000}",
+        "platform": "mobile",
+        "source": "app",
+    }
+
+
+def run_threads(fn, n_events: int, n_threads: int) -> float:
+    per_thread = n_events // n_threads
+
+    def worker(t):
+        for i in range(per_thread):
+            fn(make_event(t * per_thread + i))
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(n_threads)]
+    t0 = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    return time.perf_counter() - t0
+
+
+def bench_per_event_open(path: str, n_events: int, n_threads: int) -> float:
+    def write(ev):
+        with open(path, "a") as f:
+            f.write(json.dumps(ev) + "\n")
+    return run_threads(write, n_events, n_threads)
+
+
+def bench_eventlog(path: str, n_events: int, n_threads: int, fsync: str) -> float:
+    log = EventLog(path, flush_events=256, flush_ms=50, fsync=fsync)
+    t0 = time.perf_counter()
+    run_threads(log.append, n_events, n_threads)
+    log.close()  # inclui o flush final no tempo medido
+    return time.perf_counter() - t0
+
+
+def count_lines(path: str) -> int:
+    with open(path) as f:
+        return sum(1 for _ in f)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=20000)
+    ap.add_argument("--threads", type=int, default=8)
+    args = ap.parse_args()
+    n = args.events - args.events % args.threads
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [("open por evento", lambda p: bench_per_event_open(p, n, args.threads))]
+        for fsync in ("none", "batch"):
+            cases.append((f"EventLog fsync={fsync}", lambda p, fs=fsync: bench_eventlog(p, n, args.threads, fs)))
+
+        print(f"{n} eventos, {args.threads} threads")
+        for name, fn in cases:
+            path = os.path.join(tmp, name.replace(" ", "_").replace("=", "_") + ".jsonl")
+            elapsed = fn(path)
+            assert count_lines(path) == n
+            print(f"  {name:<22} {elapsed:7.3f}s  {n / elapsed:>10,.0f} eventos/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: build_feats original (lambdas no groupby + .apply + merge do label)
+vs motor vetorizado de pipelines/feature_engine.py, de 20k a 20M eventos
+
+Os eventos são sintéticos, gerados em blocos; o motor roda em streaming
+(bloco -> parcial -> RunningAggregate -> finalize), como no pipeline.
+
+Uso:
+    PYTHONPATH=. python benchmarks/bench_features.py --sizes 20000 200000 2000000 20000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from pipelines.feature_engine import chunk_partial, finalize
+from pipelines.features import RunningAggregate, peak_rss_mb
+
+T0 = pd.Timestamp("2025-10-01", tz="UTC")
+
+
+def make_events(n: int, seed: int, n_users: int, n_recipes: int = 5000) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    secs = rng.integers(0, 14 * 86_400, n)
+    return pd.DataFrame({
+        "event_time": T0 + pd.to_timedelta(secs, unit="s"),
+        "user_id": pd.Series(rng.integers(0, n_users, n)).astype("str").radd("u"),
+        "recipe_id": pd.Series(rng.zipf(1.3, n) % n_recipes).astype("str").radd("rec_"),
+        "event_name": np.where(rng.random(n) < 0.1, "save_recipe", "recipe_view"),
+        "session_id": pd.Series(pd.NA, index=range(n), dtype="str"),
+        "diet_selected": rng.choice(["none", "veg", "low_carb", "vegan"], n),
+        "platform": rng.choice(["android", "ios", "web"], n),
+    })
+
+
+def legacy_build_feats(dd: pd.DataFrame) -> pd.DataFrame:
+    """Versão original (baseline do repositório)"""
+    dd = dd.copy()
+    dd["label"] = dd["event_name"].apply(lambda x: 1 if x == "save_recipe" else 0)
+    out = dd.groupby(["user_id", "recipe_id"]).agg(
+        views=("event_name", lambda s: (s == "recipe_view").sum()),
+        saves=("event_name", lambda s: (s == "save_recipe").sum()),
+        last_ts=("event_time", "max"),
+    ).reset_index()
+    out["conv"] = out["saves"] / out["views"].clip(lower=1)
+    lbl = dd.groupby(["user_id", "recipe_id"])["label"].max().reset_index()
+    return out.merge(lbl, on=["user_id", "recipe_id"], how="left").fillna({"label": 0})
+
+
+def run_engine(n: int, chunk: int, n_users: int):
+    agg, gen_s, t_end = RunningAggregate(), 0.0, T0
+    t0 = time.perf_counter()
+    for i, start in enumerate(range(0, n, chunk)):
+        g0 = time.perf_counter()
+        ev = make_events(min(chunk, n - start), i, n_users)
+        gen_s += time.perf_counter() - g0
+        agg.add(chunk_partial(ev))
+        t_end = max(t_end, ev["event_time"].max())
+    feats = finalize(agg.result(), t_end)
+    return time.perf_counter() - t0 - gen_s, len(feats)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[20_000, 200_000, 2_000_000])
+    ap.add_argument("--chunk", type=int, default=1_000_000, help="eventos por bloco no motor")
+    ap.add_argument("--legacy-max", type=int, default=200_000, help="maior tamanho medido na versão original")
+    args = ap.parse_args()
+
+    print(f"{'eventos':>11} | {'original':>10} | {'motor':>9} | {'ev/s motor':>11} | {'linhas':>9} | pico RSS")
+    for n in args.sizes:
+        n_users = max(200, min(n // 100, 50_000))
+        legacy = "-"
+        if n <= args.legacy_max:
+            ev = make_events(n, 0, n_users)
+            t0 = time.perf_counter()
+            legacy_build_feats(ev)
+            legacy = f"{time.perf_counter() - t0:.2f}s"
+            del ev
+        secs, rows = run_engine(n, args.chunk, n_users)
+        print(f"{n:>11,} | {legacy:>10} | {secs:>8.2f}s | {n / secs:>11,.0f} | {rows:>9,} | {peak_rss_mb():.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
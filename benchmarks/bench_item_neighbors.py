@@ -0,0 +1,90 @@
+"""
+Benchmark: rebuild e consulta do índice de vizinhos item-item (models/item_neighbors.py)
+
+Gera saves sintéticos com popularidade de cauda longa (Zipf), mede o tempo do
+cosseno + top-N em blocos, confere contra o produto denso numa amostra de
+receitas e mede a latência p50/p99 de `neighbors()` por nº de sementes.
+
+Uso:
+    PYTHONPATH=. python benchmarks/bench_item_neighbors.py --users 200000 --recipes 20000 --saves 20
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from models.item_neighbors import NeighborIndex, cosine_topn, save_index
+
+
+def synthetic_pairs(users: int, recipes: int, saves: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = users * saves
+    u = rng.integers(0, users, n)
+    # receitas com popularidade Zipf; usuários com afinidade por uma faixa do catálogo
+    r = (rng.zipf(1.3, n) + (u % 50) * (recipes // 50)) % recipes
+    df = pd.DataFrame({"user_id": np.char.add("u", u.astype(str)), "recipe_id": np.char.add("rec_", r.astype(str))})
+    return df.drop_duplicates(ignore_index=True)
+
+
+def check(pairs: pd.DataFrame, recipes: np.ndarray, index, topn: int, sample: int = 20):
+    """Top-n da amostra igual ao do cosseno denso (empates podem trocar a ordem)"""
+    r = np.searchsorted(recipes, pairs["recipe_id"].to_numpy(dtype=str))
+    _, u = np.unique(pairs["user_id"].to_numpy(dtype=str), return_inverse=True)
+    M = np.zeros((len(recipes), u.max() + 1), dtype=np.float32)
+    M[r, u] = 1
+    M /= np.maximum(np.linalg.norm(M, axis=1, keepdims=True), 1e-12)
+    for i in np.random.default_rng(1).choice(len(recipes), sample, replace=False):
+        sim = M @ M[i]
+        sim[i] = 0
+        got = index.data[index.indptr[i]:index.indptr[i + 1]]
+        want = np.sort(sim[sim > 0])[::-1][:topn]
+        assert np.allclose(got, want, atol=1e-5), f"receita {recipes[i]}: scores divergem"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=200_000)
+    ap.add_argument("--recipes", type=int, default=20_000)
+    ap.add_argument("--saves", type=int, default=20, help="saves por usuário (antes de deduplicar)")
+    ap.add_argument("--topn", type=int, default=50)
+    ap.add_argument("--seeds", type=int, nargs="+", default=[1, 5, 20])
+    ap.add_argument("--limit", type=int, default=100)
+    ap.add_argument("--queries", type=int, default=2000)
+    args = ap.parse_args()
+
+    pairs = synthetic_pairs(args.users, args.recipes, args.saves)
+    t0 = time.perf_counter()
+    recipes, index = cosine_topn(pairs, args.topn)
+    build = time.perf_counter() - t0
+    print(f"{len(pairs):,} pares | {len(recipes):,} receitas | {index.nnz:,} vizinhos "
+          f"({(index.data.nbytes + index.indices.nbytes + index.indptr.nbytes) / 1e6:.1f}MB) | rebuild {build:.2f}s")
+    if args.users <= 50_000:
+        check(pairs, recipes, index, args.topn)
+        print("paridade com o cosseno denso: ok")
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench-nb-"))
+    try:
+        save_index(recipes, index, tmp / "idx", {"topn": args.topn})
+        ix = NeighborIndex(tmp / "idx")
+        rng = np.random.default_rng(2)
+        print(f"{'sementes':>8} {'p50 ms':>8} {'p99 ms':>8} {'candidatos':>10}")
+        for s in args.seeds:
+            lat, found = [], []
+            for _ in range(args.queries):
+                seeds = recipes[rng.integers(0, len(recipes), s)]
+                t0 = time.perf_counter()
+                ids, _ = ix.neighbors(seeds, args.limit)
+                lat.append(time.perf_counter() - t0)
+                found.append(len(ids))
+            lat = np.array(lat) * 1000
+            print(f"{s:>8} {np.percentile(lat, 50):>8.3f} {np.percentile(lat, 99):>8.3f} {np.mean(found):>10.1f}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
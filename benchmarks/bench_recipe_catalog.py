@@ -0,0 +1,108 @@
+"""
+Benchmark: catálogo de receitas (common/recipe_catalog.py) vs texto completo nos eventos
+
+Gera um log sintético (receitas geradas, favoritadas e vistas) em dois formatos:
+legado, com `full_recipe` em todo evento de receita gerada, e enxuto, com o texto
+só no catálogo. Compara o tamanho dos logs, a leitura em blocos das colunas de
+features e de nomes (iter_event_chunks), a gravação no catálogo (carga e put por
+evento, idempotente) e a latência do lookup de nome/busca do top-k da API.
+
+Uso:
+    PYTHONPATH=. python benchmarks/bench_recipe_catalog.py --events 500000 --recipes 20000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_content_neighbors import synthetic_texts
+from common.event_store import iter_event_chunks
+from common.recipe_catalog import RecipeCatalog
+
+EVENT_NAMES = np.array(["recipe_generate", "save_recipe", "recipe_view"])
+
+
+def write_logs(texts, n_events: int, legacy_path: str, slim_path: str, seed: int = 0):
+    """Mesmos eventos nos dois formatos; só o legado repete o texto completo"""
+    rng = np.random.default_rng(seed)
+    rec = rng.integers(len(texts), size=n_events)
+    kind = rng.choice(3, n_events, p=[0.4, 0.2, 0.4])
+    users = rng.integers(5000, size=n_events)
+    ids, names, queries, fulls = (texts[c].tolist() for c in ("recipe_id", "recipe_name", "query", "full_recipe"))
+    with open(legacy_path, "w") as legacy, open(slim_path, "w") as slim:
+        for i in range(n_events):
+            r = rec[i]
+            event = {"event_time": f"2026-10-{1 + i * 17 // n_events:02d}T12:00:00Z", "user_id": f"u_{users[i]}",
+                     "event_name": str(EVENT_NAMES[kind[i]]), "recipe_id": ids[r], "recipe_name": names[r],
+                     "query": queries[r], "platform": "mobile", "source": "app"}
+            slim.write(json.dumps(event) + "\n")
+            if kind[i] == 0:
+                event["full_recipe"] = fulls[r]
+            legacy.write(json.dumps(event) + "\n")
+
+
+def timed_read(path: str, columns) -> tuple:
+    t0 = time.perf_counter()
+    n = sum(len(ch) for ch in iter_event_chunks(columns, path=path))
+    return n, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=500_000)
+    ap.add_argument("--recipes", type=int, default=20_000)
+    ap.add_argument("--recipe-chars", type=int, default=2000, help="tamanho do texto completo (receitas do LLM)")
+    ap.add_argument("--k", type=int, default=10)
+    args = ap.parse_args()
+
+    texts, _ = synthetic_texts(args.recipes)
+    # texto do LLM é bem maior que o sintético: repete o preparo até o tamanho pedido
+    texts["full_recipe"] = [(t + "\n") * max(1, args.recipe_chars // len(t)) for t in texts["full_recipe"]]
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy, slim = os.path.join(tmp, "legacy.jsonl"), os.path.join(tmp, "slim.jsonl")
+        t0 = time.perf_counter()
+        write_logs(texts, args.events, legacy, slim)
+        print(f"{args.events:,} eventos / {args.recipes:,} receitas gerados em {time.perf_counter() - t0:.1f}s")
+        size_l, size_s = os.path.getsize(legacy), os.path.getsize(slim)
+        print(f"log legado {size_l / 1e6:.0f}MB | log enxuto {size_s / 1e6:.0f}MB ({size_l / size_s:.1f}x menor)")
+
+        for label, cols in [("features", ["event_time", "user_id", "recipe_id", "event_name"]),
+                            ("nomes", ["recipe_id", "recipe_name"])]:
+            n, t_l = timed_read(legacy, cols)
+            _, t_s = timed_read(slim, cols)
+            print(f"leitura ({label}, {n:,} eventos): legado {t_l:.2f}s | enxuto {t_s:.2f}s ({t_l / t_s:.1f}x)")
+
+        catalog = RecipeCatalog(os.path.join(tmp, "catalog.sqlite"))
+        rows = list(zip(texts["recipe_id"], texts["recipe_name"], texts["query"], texts["full_recipe"],
+                        [None] * len(texts), [None] * len(texts)))
+        t0 = time.perf_counter()
+        catalog.put_many(rows)
+        t_load = time.perf_counter() - t0
+        # caminho da API: um put por evento, quase sempre de receita já conhecida
+        sample = np.random.default_rng(1).integers(len(rows), size=5000)
+        t0 = time.perf_counter()
+        for i in sample:
+            catalog.put(*rows[i])
+        t_put = (time.perf_counter() - t0) / len(sample)
+        print(f"catálogo: carga {args.recipes / t_load:,.0f} receitas/s | put por evento {t_put * 1e6:.0f}µs "
+              f"| {catalog.stats()['bytes'] / 1e6:.0f}MB")
+
+        ids = texts["recipe_id"].to_numpy()
+        rng = np.random.default_rng(2)
+        lat = []
+        for _ in range(5000):
+            top = ids[rng.integers(len(ids), size=args.k)]
+            t0 = time.perf_counter()
+            labels = catalog.lookup(top)
+            lat.append(time.perf_counter() - t0)
+        assert all(labels[r][0] for r in top)
+        lat = np.array(lat) * 1000
+        print(f"lookup top-{args.k}: p50 {np.percentile(lat, 50):.3f}ms | p99 {np.percentile(lat, 99):.3f}ms")
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: consolidação de receitas quase duplicadas (pipelines/recipe_dedup.py)
+
+Gera nomes sintéticos (pratos + palavras inventadas, 3 a 6 palavras) e, para
+parte deles, variantes como as do app: outra caixa/sem acento, palavra extra
+("com croutons", "fit"), uma palavra a menos ou outra ordem. Mede cada etapa
+do MinHash + LSH e confere:
+- recall das variantes plantadas (mesmo canônico que o nome original);
+- precisão das consolidações (variante e canônico vêm do mesmo nome original);
+- cobertura do LSH contra o Jaccard exato (produto esparso) numa amostra.
+
+Uso:
+    PYTHONPATH=. python benchmarks/bench_recipe_dedup.py --names 1000000
+"""
+import argparse
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from common.config import DEDUP_THRESHOLD
+from common.text import fold, tokenize
+from pipelines.recipe_dedup import STOPWORDS, dedup
+
+DISHES = ["Salada", "Wrap", "Omelete", "Sopa", "Risoto", "Panqueca", "Lasanha", "Torta", "Bolo", "Smoothie",
+          "Escondidinho", "Strogonoff", "Moqueca", "Quiche", "Tapioca", "Cuscuz", "Crepe", "Hambúrguer"]
+SYLLABLES = ["ba", "ca", "da", "fa", "ga", "la", "ma", "na", "pa", "ra", "sa", "ta", "vi", "lo", "mu", "ne",
+             "ri", "so", "tu", "çã", "ão", "é", "qui", "lha", "nha", "bró", "cou", "fei", "jão", "mi"]
+EXTRAS = ["com croutons", "fit", "fácil", "caseira", "rápida", "light", "de liquidificador", "especial"]
+
+
+def synthetic_names(n: int, dup_rate: float = 0.3, seed: int = 0) -> pd.DataFrame:
+    """Nomes com grupo de origem (`group`); ~dup_rate deles são variantes de outro nome"""
+    rng = np.random.default_rng(seed)
+    vocab = sorted({"".join(rng.choice(SYLLABLES, rng.integers(2, 4))) for _ in range(6000)})
+    n_base = int(n * (1 - dup_rate))
+    # sorteios vetorizados (o laço só monta as strings)
+    dish, n_words = rng.integers(len(DISHES), size=n_base), rng.integers(2, 6, n_base)
+    picks = rng.integers(len(vocab), size=(n_base, 5))
+    names, groups = [], list(range(n_base))
+    for g in range(n_base):
+        words = [DISHES[dish[g]]] + [vocab[j] for j in picks[g, :n_words[g]]]
+        names.append(" ".join(words[:2]) + " de " + " com ".join(words[2:]) if len(words) > 2 else " ".join(words))
+    src, op = rng.integers(n_base, size=n - n_base), rng.integers(4, size=n - n_base)
+    extra, cut = rng.integers(len(EXTRAS), size=n - n_base), rng.integers(1, 1 << 30, size=n - n_base)
+    for k in range(n - n_base):
+        g = int(src[k])
+        words = names[g].split()
+        if op[k] == 0:
+            name = fold(names[g]).title()
+        elif op[k] == 1:
+            name = f"{names[g]} {EXTRAS[extra[k]]}"
+        elif op[k] == 2 and len(words) > 5:
+            drop = 1 + int(cut[k]) % (len(words) - 1)
+            name = " ".join(words[:drop] + words[drop + 1:])
+        else:
+            name = " ".join(words[1:] + words[:1]).capitalize()
+        names.append(name)
+        groups.append(g)
+    df = pd.DataFrame({"recipe_name": names, "group": groups})
+    df["recipe_id"] = [f"rec_{i:07d}" for i in range(n)]
+    df["events"] = rng.integers(1, 50, n)
+    return df
+
+
+def exact_coverage(df: pd.DataFrame, canonical: np.ndarray, threshold: float, sample: int = 2000) -> tuple:
+    """Pares com Jaccard exato >= limiar (amostra × todos): fração que terminou no mesmo canônico"""
+    sets = [{t for t in tokenize(n) if t not in STOPWORDS} for n in df["recipe_name"]]
+    codes, _ = pd.factorize(pd.Series([t for s in sets for t in s], dtype=object))
+    lens = np.array([len(s) for s in sets])
+    rows = np.repeat(np.arange(len(sets)), lens)
+    X = sp.csr_matrix((np.ones(len(codes), dtype=np.float32), (rows, codes)), shape=(len(sets), codes.max() + 1))
+    pick = np.random.default_rng(1).choice(len(sets), sample, replace=False)
+    inter = (X @ X[pick].T).tocoo()
+    jac = inter.data / (lens[inter.row] + lens[pick[inter.col]] - inter.data)
+    ok = (jac >= threshold) & (inter.row != pick[inter.col])
+    a, b = inter.row[ok], pick[inter.col[ok]]
+    return int(ok.sum()), float((canonical[a] == canonical[b]).mean()) if ok.any() else 1.0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--names", type=int, default=1_000_000)
+    ap.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    df = synthetic_names(args.names)
+    print(f"{args.names:,} nomes gerados em {time.perf_counter() - t0:.1f}s | ex.: {df['recipe_name'].iloc[-1]!r}")
+
+    canonical, stats = dedup(df, args.threshold)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    print(f"tokens {stats['tokenize_s']}s | minhash {stats['minhash_s']}s | lsh+verificação {stats['lsh_s']}s "
+          f"| total {stats['total_s']}s | pico RSS {peak:.0f}MB")
+    print(f"{stats['candidate_pairs']:,} pares candidatos | {stats['similar_pairs']:,} acima do limiar "
+          f"| {stats['merged']:,} IDs consolidados -> {stats['canonical_recipes']:,} receitas")
+
+    ids = df["recipe_id"].to_numpy()
+    group = df["group"].to_numpy()
+    pos = pd.Index(ids).get_indexer(canonical)
+    variants = np.arange(len(df)) >= int(args.names * 0.7)
+    recall = (canonical[variants] == canonical[group[variants]]).mean()
+    merged = canonical != ids
+    precision = (group[merged] == group[pos[merged]]).mean() if merged.any() else 1.0
+    print(f"variantes consolidadas com o original: {recall:.1%} | consolidações corretas: {precision:.1%}")
+    pairs, covered = exact_coverage(df, canonical, args.threshold)
+    print(f"pares com Jaccard exato >= {args.threshold} (amostra de 2.000 nomes): {pairs:,} | no mesmo canônico: {covered:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: busca BM25 em memória (api/search.py)
+
+Indexa receitas sintéticas (nome + busca, as mesmas do benchmark de vizinhos
+por conteúdo), mede a carga, a latência de busca e a vazão de adições
+incrementais com buscas intercaladas, e confere os scores contra um BM25
+calculado ingenuamente (laço sobre todas as receitas) numa amostra de buscas.
+
+Uso:
+    PYTHONPATH=. python benchmarks/bench_search.py --recipes 200000
+"""
+import argparse
+import math
+import time
+from collections import Counter
+
+import numpy as np
+
+from api.search import BM25Index
+from benchmarks.bench_content_neighbors import synthetic_texts
+from common.text import tokenize
+
+QUERIES = ["moqueca de palmito", "salada leve", "bolo de banana com aveia", "sopa de abóbora", "tapioca proteica",
+           "strogonoff de frango", "panqueca fit de espinafre", "risoto cremoso de cogumelo", "wrap vegano", "quiche"]
+
+
+def naive_bm25(docs, q, k1=1.2, b=0.75):
+    """Scores de todas as receitas, termo a termo (referência)"""
+    tf = [Counter(d) for d in docs]
+    avgdl = sum(len(d) for d in docs) / len(docs)
+    scores = np.zeros(len(docs))
+    for t in set(tokenize(q)):
+        df = sum(t in c for c in tf)
+        if df == 0:
+            continue
+        idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        for i, c in enumerate(tf):
+            if t in c:
+                scores[i] += idf * c[t] * (k1 + 1) / (c[t] + k1 * (1 - b + b * len(docs[i]) / avgdl))
+    return scores
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--recipes", type=int, default=200_000)
+    ap.add_argument("--adds", type=int, default=20_000)
+    ap.add_argument("--n", type=int, default=200)
+    args = ap.parse_args()
+
+    texts, _ = synthetic_texts(args.recipes + args.adds)
+    rows = list(zip(texts["recipe_id"], texts["recipe_name"], texts["query"]))
+    index = BM25Index()
+    t0 = time.perf_counter()
+    for rid, name, q in rows[:args.recipes]:
+        index.add(rid, name, q)
+    index.merge()
+    t_build = time.perf_counter() - t0
+    st = index.stats()
+    print(f"{args.recipes:,} receitas | {st['terms']:,} termos | {st['postings']:,} postings "
+          f"| carga {t_build:.1f}s ({args.recipes / t_build:,.0f} receitas/s, {st['merges']} fusões)")
+
+    lat = []
+    for i in range(2000):
+        t0 = time.perf_counter()
+        index.search(QUERIES[i % len(QUERIES)], args.n)
+        lat.append(time.perf_counter() - t0)
+    lat = np.array(lat) * 1000
+    print(f"busca top-{args.n}: p50 {np.percentile(lat, 50):.2f}ms | p99 {np.percentile(lat, 99):.2f}ms")
+
+    # adições incrementais com uma busca a cada 10 (delta não fundido entra na busca)
+    t_add, lat = 0.0, []
+    for i, (rid, name, q) in enumerate(rows[args.recipes:]):
+        t0 = time.perf_counter()
+        index.add(rid, name, q)
+        t_add += time.perf_counter() - t0
+        if i % 10 == 0:
+            t0 = time.perf_counter()
+            index.search(QUERIES[i % len(QUERIES)], args.n)
+            lat.append(time.perf_counter() - t0)
+    lat = np.array(lat) * 1000
+    print(f"{args.adds:,} adições: {args.adds / t_add:,.0f} adições/s | buscas intercaladas p50 "
+          f"{np.percentile(lat, 50):.2f}ms p99 {np.percentile(lat, 99):.2f}ms | {index.stats()}")
+
+    # paridade com o BM25 ingênuo numa amostra pequena (inclui delta não fundido)
+    small = BM25Index(merge_min=300)
+    docs = []
+    for rid, name, q in rows[:2000]:
+        small.add(rid, name, q)
+        docs.append(tokenize(f"{name} {q}"))
+    for q in QUERIES:
+        want = naive_bm25(docs, q)
+        ids, got = small.search(q, 20)
+        top = np.sort(want)[::-1][:len(got)]
+        assert np.allclose(got, top, rtol=1e-4), f"{q}: scores divergem"
+        assert all(abs(want[int(r[4:])] - s) < 1e-3 for r, s in zip(ids, got)), f"{q}: receitas divergem"
+    print(f"paridade com o BM25 ingênuo ({len(QUERIES)} buscas, 2.000 receitas): ok")
+
+
+if __name__ == "__main__":
+    main()
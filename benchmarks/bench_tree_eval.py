@@ -0,0 +1,74 @@
+"""
+Benchmark: lgb.Booster.predict vs avaliador NumPy (models/tree_eval.py)
+
+Treina um LambdaMART sintético (ou usa --model), confere a paridade das
+predições (inclusive com NaN) e mede a latência p50 por tamanho de lote.
+
+Uso:
+    PYTHONPATH=. python benchmarks/bench_tree_eval.py --trees 200 --leaves 63
+    PYTHONPATH=. python benchmarks/bench_tree_eval.py --model artifacts/model.txt
+"""
+import argparse
+import time
+
+import lightgbm as lgb
+import numpy as np
+
+from models.tree_eval import TreeEnsemble
+
+N_FEATURES = 13
+
+
+def synthetic_model(trees: int, leaves: int, seed: int = 0) -> lgb.Booster:
+    rng = np.random.default_rng(seed)
+    n = 50_000
+    X = rng.gamma(1.0, 3.0, size=(n, N_FEATURES)).round()
+    X[rng.random(X.shape) < 0.05] = np.nan  # exercita missing_type NaN
+    y = ((X[:, 0] > 4) ^ (rng.random(n) < 0.2)).astype(int) + (np.nan_to_num(X[:, 1]) > 6)
+    params = dict(objective="lambdarank", num_leaves=leaves, min_data_in_leaf=20, verbose=-1)
+    return lgb.train(params, lgb.Dataset(X, y, group=[50] * (n // 50)), num_boost_round=trees)
+
+
+def p50_ms(fn, repeats: int) -> float:
+    lat = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        lat.append(time.perf_counter() - t0)
+    return float(np.median(lat)) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", help="modelo salvo (padrão: sintético)")
+    ap.add_argument("--trees", type=int, default=200)
+    ap.add_argument("--leaves", type=int, default=63)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 200, 1000, 10000])
+    args = ap.parse_args()
+
+    booster = lgb.Booster(model_file=args.model) if args.model else synthetic_model(args.trees, args.leaves)
+    ens = TreeEnsemble.from_booster(booster)
+    n_feat = booster.num_feature()
+    print(f"modelo: {ens.num_trees()} árvores | profundidade máx {ens.max_depth} | {len(ens.value)} nós")
+
+    rng = np.random.default_rng(1)
+    X = rng.gamma(1.0, 3.0, size=(max(args.sizes), n_feat)).round()
+    X[rng.random(X.shape) < 0.05] = np.nan
+    X[rng.random(X.shape) < 0.05] = 0.0
+    ref = booster.predict(X)
+    ours = ens.predict(X)
+    assert np.allclose(ours, ref, rtol=1e-9, atol=1e-9), f"diverge: max |dif| = {np.abs(ours - ref).max()}"
+    print(f"paridade: ok (max |dif| = {np.abs(ours - ref).max():.2e})")
+
+    print(f"{'linhas':>7} {'lgb (ms)':>9} {'lgb 1 thr':>10} {'numpy (ms)':>11} {'speedup':>8}")
+    for n in args.sizes:
+        batch = np.ascontiguousarray(X[:n])
+        repeats = max(5, min(200, 20_000 // n))
+        t_lgb = p50_ms(lambda: booster.predict(batch), repeats)
+        t_lgb1 = p50_ms(lambda: booster.predict(batch, num_threads=1), repeats)
+        t_np = p50_ms(lambda: ens.predict(batch), repeats)
+        print(f"{n:>7} {t_lgb:>9.3f} {t_lgb1:>10.3f} {t_np:>11.3f} {min(t_lgb, t_lgb1) / t_np:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: memória por worker do uvicorn, candidatos em memória vs .npy mapeados
+
+Gera um Parquet de candidatos grande (linhas de data/feat_val.parquet replicadas
+com user_ids novos), sobe `uvicorn api.main:app --workers N` nos dois modos,
+faz requests para aquecer todos os workers e lê RSS e PSS de cada worker em
+/proc/<pid>/smaps_rollup (Linux). PSS divide as páginas compartilhadas entre
+os processos, então a soma dos PSS é a memória física real do container.
+
+Uso (precisa de artifacts/model.txt e data/feat_val.parquet):
+    PYTHONPATH=. python benchmarks/bench_workers_rss.py --rows 1000000 --workers 4
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import pandas as pd
+
+from common.config import FEATURES_VAL_PATH
+
+
+def build_candidates(rows: int, out: Path) -> list:
+    base = pd.read_parquet(FEATURES_VAL_PATH)
+    reps = max(1, rows // len(base))
+    parts = []
+    for i in range(reps):
+        part = base.copy()
+        part["user_id"] = part["user_id"] + f"-{i}"
+        parts.append(part)
+    df = pd.concat(parts, ignore_index=True)
+    df.to_parquet(out, index=False)
+    return df["user_id"].drop_duplicates().sample(200, random_state=0).tolist()
+
+
+def children(pid: int) -> list:
+    out = []
+    for task in Path(f"/proc/{pid}/task").iterdir():
+        out += [int(c) for c in (task / "children").read_text().split()]
+    return out
+
+
+def mem_mb(pid: int) -> dict:
+    vals = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+        parts = line.split()
+        if parts[0] in ("Rss:", "Pss:"):
+            vals[parts[0][:-1].lower()] = int(parts[1]) / 1024
+    return vals
+
+
+def wait_ready(port: int, timeout: float = 180):
+    t0 = time.time()
+    while time.time() - t0 < timeout:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=5) as r:
+                if json.load(r)["candidates"]["loaded"]:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit("API não subiu a tempo")
+
+
+def run(mode: str, workers: int, port: int, parquet: Path, mmap_dir: str, users: list) -> list:
+    env = {**os.environ, "PYTHONPATH": ".", "FEATURES_VAL_PATH": str(parquet), "SERVING_MMAP_DIR": mmap_dir,
+           "MODEL_WATCH_INTERVAL": "0", "REC_CACHE_ENABLED": "false", "EVENT_STORE_DIR": ""}
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port),
+                             "--workers", str(workers), "--log-level", "warning"], env=env)
+    try:
+        wait_ready(port)
+        # conexões novas a cada request: o kernel distribui entre os workers
+        for _ in range(workers * 50):
+            u = random.choice(users)
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/recommendations?user_id={u}&k=5").read()
+        time.sleep(1)
+        stats = [mem_mb(p) for p in children(proc.pid)]
+        return [s for s in stats if s.get("rss", 0) > 50]  # ignora o resource tracker
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench-rss-"))
+    try:
+        parquet = tmp / "candidates.parquet"
+        users = build_candidates(args.rows, parquet)
+        print(f"candidatos: {pd.read_parquet(parquet, columns=['views']).shape[0]:,} linhas "
+              f"({parquet.stat().st_size / 1e6:.0f}MB em Parquet) | {args.workers} workers")
+        print(f"{'modo':<10} {'RSS/worker':>11} {'PSS/worker':>11} {'soma PSS':>9}")
+        for mode, mmap_dir in (("memória", ""), ("mmap", str(tmp / "mmap"))):
+            stats = run(mode, args.workers, args.port, parquet, mmap_dir, users)
+            rss = sum(s["rss"] for s in stats) / len(stats)
+            pss = sum(s["pss"] for s in stats)
+            print(f"{mode:<10} {rss:>9.0f}MB {pss / len(stats):>9.0f}MB {pss:>7.0f}MB")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
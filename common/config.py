@@ -9,4 +9,93 @@ DATA_EVENTS_PATH = os.getenv("DATA_EVENTS_PATH", "data/events.jsonl")
 FEATURES_TRAIN_PATH = os.getenv("FEATURES_TRAIN_PATH", "data/feat_train.parquet")
 FEATURES_VAL_PATH = os.getenv("FEATURES_VAL_PATH", "data/feat_val.parquet")
 MODEL_PATH = os.getenv("MODEL_PATH", "artifacts/model.txt")
+# catálogo de receitas (common/recipe_catalog.py): texto completo e metadados gravados uma vez por receita
+RECIPE_CATALOG_PATH = os.getenv("RECIPE_CATALOG_PATH", "data/recipe_catalog.sqlite")
+# receitas quase duplicadas (pipelines/recipe_dedup.py): mapeamento para o ID canônico, Jaccard
+# mínimo entre os nomes, nº de hashes MinHash e de faixas do LSH (hashes por faixa = perm/bands)
+RECIPE_MAP_DIR = os.getenv("RECIPE_MAP_DIR", "artifacts/recipe_map")
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.7"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "64"))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "16"))
+# vizinhos item-item (models/item_neighbors.py): vizinhos guardados por receita, saves recentes
+# do usuário usados como semente e candidatos extras por request (0 = desligado)
+ITEM_NEIGHBORS_DIR = os.getenv("ITEM_NEIGHBORS_DIR", "artifacts/item_neighbors")
+ITEM_NEIGHBORS_TOPN = int(os.getenv("ITEM_NEIGHBORS_TOPN", "50"))
+ITEM_NEIGHBORS_SEEDS = int(os.getenv("ITEM_NEIGHBORS_SEEDS", "20"))
+ITEM_NEIGHBORS_CANDIDATES = int(os.getenv("ITEM_NEIGHBORS_CANDIDATES", "100"))
+# vizinhos por conteúdo (models/content_neighbors.py, TF-IDF de nome/busca/texto): vizinhos por
+# receita, receitas mais recentes do usuário usadas como semente e candidatos extras (0 = desligado)
+CONTENT_NEIGHBORS_DIR = os.getenv("CONTENT_NEIGHBORS_DIR", "artifacts/content_neighbors")
+CONTENT_NEIGHBORS_TOPN = int(os.getenv("CONTENT_NEIGHBORS_TOPN", "50"))
+CONTENT_NEIGHBORS_SEEDS = int(os.getenv("CONTENT_NEIGHBORS_SEEDS", "10"))
+CONTENT_NEIGHBORS_CANDIDATES = int(os.getenv("CONTENT_NEIGHBORS_CANDIDATES", "50"))
+# retrieval por ALS implícito (models/als.py): fatores, iterações, regularização, confiança
+# (c = 1 + alpha·peso) e receitas novas por request vindas do produto usuário×receitas (0 = desligado)
+ALS_DIR = os.getenv("ALS_DIR", "artifacts/als")
+ALS_FACTORS = int(os.getenv("ALS_FACTORS", "32"))
+ALS_ITERATIONS = int(os.getenv("ALS_ITERATIONS", "15"))
+ALS_REG = float(os.getenv("ALS_REG", "0.05"))
+ALS_ALPHA = float(os.getenv("ALS_ALPHA", "10"))
+ALS_CANDIDATES = int(os.getenv("ALS_CANDIDATES", str(CANDIDATES_TOPN)))
+# busca BM25 (api/search.py) no parâmetro `q` de /recommendations: receitas casadas levadas ao
+# ranking e intervalo (s) da leitura incremental do log de eventos (0 = só a carga no startup)
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", str(CANDIDATES_TOPN)))
+SEARCH_REFRESH_INTERVAL = float(os.getenv("SEARCH_REFRESH_INTERVAL", "2"))
+# avaliador do modelo na API: lightgbm (padrão) | numpy (models/tree_eval.py, opt-in: só compensa com
+# poucas árvores) | auto (mede os dois ao carregar e só usa o NumPy se ele vencer também em lotes grandes)
+MODEL_SCORER = os.getenv("MODEL_SCORER", "lightgbm")
+# registro de modelos versionados (ponteiro CURRENT) e intervalo (s) do watcher da API (0 = desligado)
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", "artifacts/registry")
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "5"))
+# token exigido nos endpoints /admin (header X-Admin-Token); vazio = sem autenticação
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+# retreino incremental: continua do modelo atual (init_model) por até N iterações extras;
+# volta ao treino completo se o NDCG@10 de validação cair mais que a tolerância
+TRAIN_WARM_START = os.getenv("TRAIN_WARM_START", "false").lower() in ("1", "true", "yes")
+TRAIN_WARM_START_ROUNDS = int(os.getenv("TRAIN_WARM_START_ROUNDS", "100"))
+TRAIN_NDCG_TOLERANCE = float(os.getenv("TRAIN_NDCG_TOLERANCE", "0.002"))
+# poda por latência: salva o menor num_iteration com NDCG@10 a até a tolerância do melhor corte;
+# orçamentos opcionais de árvores/folhas (0 = sem limite)
+TRAIN_PRUNE_TOLERANCE = float(os.getenv("TRAIN_PRUNE_TOLERANCE", "0.002"))
+TRAIN_MAX_TREES = int(os.getenv("TRAIN_MAX_TREES", "0"))
+TRAIN_MAX_LEAVES = int(os.getenv("TRAIN_MAX_LEAVES", "0"))
+# teto de memória (MB) da leitura em blocos do pipeline de features; não limita o parcial
+# acumulado (usuário × receita × sessão/dia), que cresce com o número de chaves distintas
+FEATURES_MEMORY_MB = float(os.getenv("FEATURES_MEMORY_MB", "512"))
+# estado do pipeline incremental de features (watermark + parciais já consolidados)
+FEATURES_STATE_DIR = os.getenv("FEATURES_STATE_DIR", "data/feature_state")
+# processos do pipeline de features (>1 = shards por hash do user_id; saída vira diretório de Parquet)
+FEATURES_WORKERS = int(os.getenv("FEATURES_WORKERS", "1"))
+# group commit do log de eventos: grava a cada N eventos ou T ms; fsync: none | batch | always
+EVENTLOG_FLUSH_EVENTS = int(os.getenv("EVENTLOG_FLUSH_EVENTS", "256"))
+EVENTLOG_FLUSH_MS = float(os.getenv("EVENTLOG_FLUSH_MS", "50"))
+EVENTLOG_FSYNC = os.getenv("EVENTLOG_FSYNC", "batch")
+# event store particionado por data (vazio = usar apenas DATA_EVENTS_PATH)
+EVENT_STORE_DIR = os.getenv("EVENT_STORE_DIR", "")
+EVENT_STORE_SEGMENT_MB = float(os.getenv("EVENT_STORE_SEGMENT_MB", "8"))
+EVENT_STORE_SEGMENT_SECONDS = float(os.getenv("EVENT_STORE_SEGMENT_SECONDS", "300"))
+# compactação em background dentro da API (0 = desligada; use o job `python -m common.event_store compact`)
+EVENT_STORE_COMPACT_INTERVAL = float(os.getenv("EVENT_STORE_COMPACT_INTERVAL", "0"))
+# atributos de segmento (último valor por user×recipe) usados no cold-start; não são features
+SEGMENT_COLS = ["diet_selected", "platform"]
+# colunas da tabela de features que não entram no modelo (chaves, timestamps, label)
+NON_FEATURE_COLS = ["user_id", "recipe_id", "first_ts", "last_ts", "label"] + SEGMENT_COLS
+# diretório para candidatos/matriz de features em .npy mapeados (compartilhados entre workers; vazio = em memória)
+SERVING_MMAP_DIR = os.getenv("SERVING_MMAP_DIR", "")
+# intervalo (s) entre checagens de mtime/tamanho do Parquet de candidatos
+CANDIDATES_RELOAD_INTERVAL = float(os.getenv("CANDIDATES_RELOAD_INTERVAL", "5"))
+# usuários por chamada de predict no endpoint de lote
+BATCH_CHUNK_USERS = int(os.getenv("BATCH_CHUNK_USERS", "2000"))
+# micro-batching de predict entre requisições concorrentes (opt-in)
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+MICROBATCH_WINDOW_MS = float(os.getenv("MICROBATCH_WINDOW_MS", "2"))
+MICROBATCH_MAX_ROWS = int(os.getenv("MICROBATCH_MAX_ROWS", "4096"))
+# cache de rankings por usuário (LRU + TTL + teto de memória), um por processo: a invalidação
+# por evento novo só vale no worker que recebeu o evento (com --workers N, os outros esperam o TTL)
+REC_CACHE_ENABLED = os.getenv("REC_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+REC_CACHE_MAX_ENTRIES = int(os.getenv("REC_CACHE_MAX_ENTRIES", "100000"))
+REC_CACHE_TTL_SECONDS = float(os.getenv("REC_CACHE_TTL_SECONDS", "300"))
+REC_CACHE_MAX_MB = float(os.getenv("REC_CACHE_MAX_MB", "256"))
+# recalcula em background os usuários invalidados por novos eventos
+REC_CACHE_REFRESH = os.getenv("REC_CACHE_REFRESH", "false").lower() in ("1", "true", "yes")
 
@@ -0,0 +1,613 @@
+"""
+Event store colunar particionado por data
+Eventos novos caem em segmentos NDJSON pequenos (um ativo por processo);
+a compactação os consolida em Parquet particionado (event_date=YYYY-MM-DD/)
+com user_id/recipe_id/event_name em dictionary encoding, permitindo aos
+leitores podar por data e por coluna. O events.jsonl legado continua
+legível e pode ser importado.
+
+A troca segmentos -> Parquet (partes publicadas + segmentos removidos) e a
+reivindicação de segmentos acontecem sob lock exclusivo em `.publish.lock`;
+os leitores listam partes e abrem os segmentos sob lock compartilhado, então
+cada evento é lido de um lado só, nunca dos dois.
+
+Uso:
+    PYTHONPATH=. python -m common.event_store import data/events.jsonl
+    PYTHONPATH=. python -m common.event_store compact [--loop 60]
+"""
+import argparse
+import io
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:  # Windows: compactação sem lock entre processos
+    fcntl = None
+
+DICT_COLUMNS = ["user_id", "recipe_id", "event_name"]
+STRING_COLUMNS = [
+    "diet_selected", "platform", "app_version", "source", "session_id",
+    "recipe_name", "query", "full_recipe", "extras",
+]
+EVENT_COLUMNS = ["event_time"] + DICT_COLUMNS + STRING_COLUMNS
+
+# schema gravado em disco (dictionary encoding nas colunas de alta repetição)
+STORAGE_SCHEMA = pa.schema(
+    [("event_time", pa.timestamp("us", tz="UTC"))]
+    + [(c, pa.dictionary(pa.int32(), pa.string())) for c in DICT_COLUMNS]
+    + [(c, pa.string()) for c in STRING_COLUMNS]
+)
+# schema entregue aos leitores (strings simples)
+READ_SCHEMA = pa.schema(
+    [("event_time", pa.timestamp("us", tz="UTC"))]
+    + [(c, pa.string()) for c in DICT_COLUMNS + STRING_COLUMNS]
+    + [("event_date", pa.string())]
+)
+PARTITIONING = ds.partitioning(pa.schema([("event_date", pa.string())]), flavor="hive")
+
+
+def _utc(ts) -> Optional[pd.Timestamp]:
+    if ts is None:
+        return None
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def parse_event_time(s: pd.Series) -> pd.Series:
+    """Converte event_time ISO para datetime UTC (tolera o sufixo '+00:00Z')"""
+    s = s.astype("string").str.replace(r"([+-]\d\d:\d\d)Z$", r"\1", regex=True)
+    return pd.to_datetime(s, utc=True, format="ISO8601", errors="coerce")
+
+
+def normalize_events(records: List[dict]) -> pd.DataFrame:
+    """Registros de evento -> DataFrame no layout do store (chaves extras vão para `extras`)"""
+    rows = []
+    for r in records:
+        row = {c: r.get(c) for c in EVENT_COLUMNS}
+        extra = {k: v for k, v in r.items() if k not in EVENT_COLUMNS}
+        if isinstance(row["extras"], dict):
+            extra = {**row["extras"], **extra}
+        row["extras"] = json.dumps(extra) if extra else None
+        rows.append(row)
+    df = pd.DataFrame(rows, columns=EVENT_COLUMNS)
+    df["event_time"] = parse_event_time(df["event_time"])
+    for c in DICT_COLUMNS + STRING_COLUMNS:
+        df[c] = df[c].astype(object).where(df[c].notna(), None)
+        df[c] = df[c].map(lambda v: v if v is None or isinstance(v, str) else str(v))
+    return df
+
+
+def parse_ndjson(f) -> List[dict]:
+    """Linhas completas de um NDJSON binário (ignora linha final parcial ou inválida)"""
+    records = []
+    for line in f:
+        if not line.endswith(b"\n"):
+            break
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
+
+
+def segment_key(path: str) -> str:
+    """Nome estável do segmento nas fases .jsonl.open -> .jsonl -> .jsonl.<tag>.claimed"""
+    return Path(path).name.split(".jsonl")[0]
+
+
+class StoreCursor:
+    """Posição de um leitor incremental: partes Parquet já lidas e offset lido de cada segmento"""
+
+    def __init__(self, parts: Optional[Set[str]] = None, segments: Optional[Dict[str, int]] = None):
+        self.parts: Set[str] = set(parts or ())
+        self.segments: Dict[str, int] = dict(segments or {})
+
+    def copy(self) -> "StoreCursor":
+        return StoreCursor(self.parts, self.segments)
+
+
+class EventStore:
+    """
+    Args:
+        root: diretório do store (segments/ e parquet/ ficam dentro dele)
+        segment_max_bytes: sela o segmento ativo ao passar desse tamanho
+        segment_max_seconds: sela o segmento ativo após esse tempo
+    """
+
+    def __init__(self, root: str, segment_max_bytes: int = 8 * 1024 * 1024,
+                 segment_max_seconds: float = 300.0):
+        self.root = Path(root)
+        self.segments_dir = self.root / "segments"
+        self.parquet_dir = self.root / "parquet"
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_seconds = segment_max_seconds
+        self._active: Optional[Path] = None
+        self._active_since = 0.0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ escrita
+
+    def active_segment(self, incoming_bytes: int = 0) -> str:
+        """Caminho do segmento ativo deste processo (rotaciona por tamanho/idade)"""
+        with self._lock:
+            if self._active is not None:
+                size = self._active.stat().st_size if self._active.exists() else 0
+                too_big = size and size + incoming_bytes > self.segment_max_bytes
+                too_old = time.monotonic() - self._active_since > self.segment_max_seconds
+                if too_big or too_old:
+                    self._seal_locked()
+            if self._active is None:
+                self.segments_dir.mkdir(parents=True, exist_ok=True)
+                self._active = self.segments_dir / f"seg-{time.time_ns()}-{os.getpid()}.jsonl.open"
+                self._active_since = time.monotonic()
+            return str(self._active)
+
+    def seal(self):
+        """Fecha o segmento ativo, liberando-o para compactação"""
+        with self._lock:
+            self._seal_locked()
+
+    def _seal_locked(self):
+        if self._active is not None:
+            try:
+                os.replace(self._active, self._active.with_suffix(""))
+            except FileNotFoundError:  # nunca escrito ou já reivindicado pela compactação
+                pass
+        self._active = None
+
+    # ------------------------------------------------------------- compactação
+
+    @contextmanager
+    def _publish_lock(self, shared: bool):
+        """Lock entre compactação (exclusivo) e leitores (compartilhado)"""
+        if fcntl is None or not self.root.exists():
+            yield
+            return
+        with open(self.root / ".publish.lock", "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield
+
+    def _sealed_segments(self) -> List[Path]:
+        if not self.segments_dir.exists():
+            return []
+        sealed = sorted(self.segments_dir.glob("seg-*.jsonl"))
+        # segmentos .open abandonados (processo morto ou ocioso) também são compactados
+        stale = time.time() - 2 * self.segment_max_seconds
+        for p in sorted(self.segments_dir.glob("seg-*.jsonl.open")):
+            try:
+                if p != self._active and p.stat().st_mtime < stale:
+                    sealed.append(p)
+            except FileNotFoundError:
+                continue
+        return sealed
+
+    def _stage_partitions(self, df: pd.DataFrame, tag: str) -> Tuple[int, List[Tuple[Path, Path]]]:
+        """
+        Grava um DataFrame normalizado como .part-<tag>.parquet.tmp em cada partição de data
+        Devolve (eventos, pares temporário -> part-<tag>.parquet) ainda não publicados
+        """
+        df = df[df["event_time"].notna()]
+        if df.empty:
+            return 0, []
+        staged = []
+        dates = df["event_time"].dt.strftime("%Y-%m-%d")
+        for date, part in df.groupby(dates, sort=True):
+            table = pa.Table.from_pandas(part.sort_values("event_time", kind="stable"), preserve_index=False)
+            table = table.select(EVENT_COLUMNS).cast(STORAGE_SCHEMA)
+            out = self.parquet_dir / f"event_date={date}"
+            out.mkdir(parents=True, exist_ok=True)
+            tmp = out / f".part-{tag}.parquet.tmp"
+            pq.write_table(table, tmp, compression="zstd")
+            staged.append((tmp, out / f"part-{tag}.parquet"))  # nome determinístico: recompactar é idempotente
+        return len(df), staged
+
+    def _write_partitions(self, df: pd.DataFrame, tag: str) -> int:
+        """Grava e publica part-<tag>.parquet em cada partição de data"""
+        events, staged = self._stage_partitions(df, tag)
+        for tmp, dst in staged:
+            os.replace(tmp, dst)
+        return events
+
+    def _compact_claimed(self, claimed: List[Path], tag: str) -> int:
+        records = []
+        for p in claimed:
+            with open(p, "rb") as f:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)  # espera escrita em andamento
+                records.extend(parse_ndjson(f))
+        events, staged = self._stage_partitions(normalize_events(records), tag)
+        # partes e remoção dos segmentos visíveis juntas para os leitores
+        with self._publish_lock(shared=False):
+            for tmp, dst in staged:
+                os.replace(tmp, dst)
+            for p in claimed:
+                p.unlink()
+        return events
+
+    def compact(self, max_segments: int = 256) -> dict:
+        """
+        Consolida segmentos selados em Parquet particionado por data
+
+        Cada segmento é reivindicado por rename para `<nome>.<tag>.claimed`
+        antes da leitura; se a compactação cair no meio, a próxima execução
+        refaz os arquivos .claimed com o mesmo tag (sobrescrevendo as mesmas partes)
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / ".compact.lock", "w") as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return {"segments": 0, "events": 0, "skipped": "outra compactação em andamento"}
+
+            segments, events = 0, 0
+            # retomada de compactações interrompidas
+            leftovers = {}
+            for p in sorted(self.segments_dir.glob("seg-*.claimed")) if self.segments_dir.exists() else []:
+                leftovers.setdefault(p.name.split(".")[-2], []).append(p)
+            for tag, claimed in leftovers.items():
+                events += self._compact_claimed(claimed, tag)
+                segments += len(claimed)
+
+            tag = f"{time.time_ns()}-{os.getpid()}"
+            claimed = []
+            with self._publish_lock(shared=False):
+                for seg in self._sealed_segments()[:max_segments]:
+                    dst = seg.with_name(f"{seg.name}.{tag}.claimed")
+                    try:
+                        os.replace(seg, dst)
+                    except FileNotFoundError:
+                        continue
+                    claimed.append(dst)
+            if claimed:
+                events += self._compact_claimed(claimed, tag)
+                segments += len(claimed)
+            return {"segments": segments, "events": events}
+
+    def import_jsonl(self, path: str, chunk_lines: int = 200_000) -> int:
+        """Importa um NDJSON legado (ex.: data/events.jsonl) direto para Parquet"""
+        total, chunk, n = 0, [], 0
+        stem = Path(path).stem
+        with open(path) as f:
+            for line in f:
+                try:
+                    chunk.append(json.loads(line))
+                except ValueError:
+                    continue
+                if len(chunk) >= chunk_lines:
+                    total += self._write_partitions(normalize_events(chunk), f"import-{stem}-{n:05d}")
+                    chunk, n = [], n + 1
+        if chunk:
+            total += self._write_partitions(normalize_events(chunk), f"import-{stem}-{n:05d}")
+        return total
+
+    def start_compactor(self, interval_seconds: float) -> threading.Thread:
+        """Compactação periódica em uma thread daemon"""
+        def loop():
+            while True:
+                time.sleep(interval_seconds)
+                try:
+                    self.compact()
+                except Exception:
+                    pass
+        th = threading.Thread(target=loop, name="event-compactor", daemon=True)
+        th.start()
+        return th
+
+    # ------------------------------------------------------------------ leitura
+
+    def _snapshot(self) -> Tuple[List[str], List[BinaryIO]]:
+        """
+        Partes Parquet publicadas e segmentos pendentes, abertos sob o mesmo lock
+        Os descritores continuam legíveis mesmo se a compactação remover o segmento depois
+        """
+        with self._publish_lock(shared=True):
+            files = [str(p) for p in sorted(self.parquet_dir.glob("event_date=*/part-*.parquet"))] \
+                if self.parquet_dir.exists() else []
+            segments = []
+            for p in sorted(self.segments_dir.glob("seg-*")) if self.segments_dir.exists() else []:
+                # .open selado entre a listagem e a abertura: mesmo conteúdo com o nome final
+                for name in (p, p.with_suffix("")) if p.suffix == ".open" else (p,):
+                    try:
+                        segments.append(open(name, "rb"))
+                        break
+                    except FileNotFoundError:
+                        continue
+        return files, segments
+
+    def _dataset(self, files: List[str]) -> Optional[ds.Dataset]:
+        if not files:
+            return None
+        return ds.dataset(files, format="parquet", partitioning=PARTITIONING,
+                          partition_base_dir=str(self.parquet_dir))
+
+    def iter_batches(self, columns: Optional[List[str]] = None, start: Optional[datetime] = None,
+                     end: Optional[datetime] = None, batch_rows: int = 256_000) -> Iterator[pd.DataFrame]:
+        """
+        Lê eventos em blocos, podando partições por data e colunas
+
+        Args:
+            columns: colunas desejadas (None = todas)
+            start/end: intervalo de event_time (inclusivo)
+            batch_rows: linhas por bloco
+        """
+        columns = columns or READ_SCHEMA.names
+        schema = pa.schema([READ_SCHEMA.field(c) for c in columns])
+        start, end = _utc(start), _utc(end)
+
+        files, segments = self._snapshot()
+        try:
+            yield from self._iter_snapshot(files, segments, columns, schema, start, end, batch_rows)
+        finally:
+            for f in segments:
+                f.close()
+
+    def _iter_snapshot(self, files, segments, columns, schema, start, end, batch_rows) -> Iterator[pd.DataFrame]:
+        dataset = self._dataset(files)
+        if dataset is not None:
+            flt = None
+            if start is not None:
+                flt = (ds.field("event_date") >= start.strftime("%Y-%m-%d")) & (ds.field("event_time") >= pa.scalar(start, pa.timestamp("us", tz="UTC")))
+            if end is not None:
+                f_end = (ds.field("event_date") <= end.strftime("%Y-%m-%d")) & (ds.field("event_time") <= pa.scalar(end, pa.timestamp("us", tz="UTC")))
+                flt = f_end if flt is None else flt & f_end
+            for batch in dataset.to_batches(columns=columns, filter=flt, batch_size=batch_rows):
+                yield pa.Table.from_batches([batch]).cast(schema).to_pandas()
+
+        # segmentos ainda não compactados no momento do snapshot (inclui os ativos)
+        for f in segments:
+            df = normalize_events(parse_ndjson(f))
+            if start is not None:
+                df = df[df["event_time"] >= start]
+            if end is not None:
+                df = df[df["event_time"] <= end]
+            if df.empty:
+                continue
+            df["event_date"] = df["event_time"].dt.strftime("%Y-%m-%d")
+            table = pa.Table.from_pandas(df, preserve_index=False).select(columns).cast(schema)
+            yield table.to_pandas()
+
+    def iter_new(self, columns: Optional[List[str]], cursor: StoreCursor,
+                 batch_rows: int = 256_000) -> Iterator[pd.DataFrame]:
+        """
+        Eventos ainda não lidos segundo `cursor`, que é atualizado no lugar
+
+        Lê as partes Parquet que o cursor ainda não viu, inteiras, e de cada segmento
+        pendente só os bytes após o offset já lido (até a última linha completa).
+        Um evento lido no segmento volta uma vez, na parte que o compactou.
+        """
+        columns = columns or READ_SCHEMA.names
+        schema = pa.schema([READ_SCHEMA.field(c) for c in columns])
+        files, segments = self._snapshot()
+        try:
+            new = [f for f in files if f not in cursor.parts]
+            dataset = self._dataset(new)
+            if dataset is not None:
+                for batch in dataset.to_batches(columns=columns, batch_size=batch_rows):
+                    yield pa.Table.from_batches([batch]).cast(schema).to_pandas()
+            cursor.parts.update(new)
+
+            offsets = {}
+            for f in segments:
+                key = segment_key(f.name)
+                start = cursor.segments.get(key, 0)
+                f.seek(start)
+                data = f.read()
+                end = data.rfind(b"\n") + 1
+                offsets[key] = start + end
+                df = normalize_events(parse_ndjson(io.BytesIO(data[:end])))
+                if df.empty:
+                    continue
+                df["event_date"] = df["event_time"].dt.strftime("%Y-%m-%d")
+                yield pa.Table.from_pandas(df, preserve_index=False).select(columns).cast(schema).to_pandas()
+            # segmentos que sumiram foram compactados: seus eventos chegam pelas partes novas
+            cursor.segments = offsets
+        finally:
+            for f in segments:
+                f.close()
+
+    def read(self, columns: Optional[List[str]] = None, start: Optional[datetime] = None,
+             end: Optional[datetime] = None) -> pd.DataFrame:
+        """Todos os eventos (Parquet + segmentos) num único DataFrame"""
+        parts = list(self.iter_batches(columns, start, end))
+        if not parts:
+            return pd.DataFrame(columns=columns or READ_SCHEMA.names)
+        return pd.concat(parts, ignore_index=True)
+
+    def stats(self) -> dict:
+        files = list(self.parquet_dir.glob("event_date=*/part-*.parquet")) if self.parquet_dir.exists() else []
+        segs = list(self.segments_dir.glob("seg-*")) if self.segments_dir.exists() else []
+        return {
+            "root": str(self.root),
+            "partitions": len({p.parent.name for p in files}),
+            "parquet_files": len(files),
+            "parquet_bytes": sum(p.stat().st_size for p in files),
+            "segments": len(segs),
+            "segment_bytes": sum(p.stat().st_size for p in segs if p.exists()),
+        }
+
+
+_store: Optional[EventStore] = None
+
+
+def get_event_store() -> Optional[EventStore]:
+    """EventStore configurado em EVENT_STORE_DIR (None = usar só o events.jsonl)"""
+    global _store
+    from common.config import EVENT_STORE_DIR, EVENT_STORE_SEGMENT_MB, EVENT_STORE_SEGMENT_SECONDS
+    if not EVENT_STORE_DIR:
+        return None
+    if _store is None:
+        _store = EventStore(EVENT_STORE_DIR, int(EVENT_STORE_SEGMENT_MB * 1024 * 1024), EVENT_STORE_SEGMENT_SECONDS)
+    return _store
+
+
+def load_events(columns: Optional[List[str]] = None, start: Optional[datetime] = None,
+                end: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Carrega eventos do store configurado ou, sem store, do events.jsonl legado
+
+    Args:
+        columns: colunas desejadas (None = todas)
+        start/end: intervalo de event_time
+    """
+    store = get_event_store()
+    if store is not None:
+        return store.read(columns, start, end)
+
+    from common.config import DATA_EVENTS_PATH
+    if not Path(DATA_EVENTS_PATH).exists():
+        return pd.DataFrame(columns=columns)
+    rows = []
+    with open(DATA_EVENTS_PATH) as f:
+        for line in f:
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                continue
+    df = pd.DataFrame(rows)
+    if columns is not None:
+        df = df.reindex(columns=columns)
+    if (start is not None or end is not None) and "event_time" in df.columns:
+        t = parse_event_time(df["event_time"])
+        keep = pd.Series(True, index=df.index)
+        if start is not None:
+            keep &= t >= _utc(start)
+        if end is not None:
+            keep &= t <= _utc(end)
+        df = df[keep]
+    return df
+
+
+class _ByteWindow(io.RawIOBase):
+    """Leitura restrita ao intervalo [start, end) de um arquivo"""
+
+    def __init__(self, f, start: int, end: int):
+        self.f, self.end = f, end
+        f.seek(start)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        n = min(len(b), self.end - self.f.tell())
+        if n <= 0:
+            return 0
+        data = self.f.read(n)
+        b[:len(data)] = data
+        return len(data)
+
+
+def last_complete_offset(path: str) -> int:
+    """Offset logo após a última linha completa (terminada em quebra de linha)"""
+    if not Path(path).exists():
+        return 0
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        while pos > 0:
+            step = min(pos, 64 * 1024)
+            f.seek(pos - step)
+            buf = f.read(step)
+            i = buf.rfind(b"\n")
+            if i >= 0:
+                return pos - step + i + 1
+            pos -= step
+    return 0
+
+
+def line_ranges(path: str, n: int, end: Optional[int] = None) -> List[Tuple[int, int]]:
+    """Divide [0, end) em até n intervalos de bytes alinhados ao início de linha"""
+    end = last_complete_offset(path) if end is None else end
+    cuts = [0]
+    with open(path, "rb") as f:
+        for i in range(1, n):
+            pos = max(cuts[-1], end * i // n)
+            if pos > 0:
+                f.seek(pos - 1)
+                pos += len(f.readline()) - 1  # avança até logo após a próxima quebra de linha
+            cuts.append(min(pos, end))
+    cuts.append(end)
+    return [(a, b) for a, b in zip(cuts, cuts[1:]) if b > a]
+
+
+def iter_event_chunks(columns: List[str], chunk_bytes: int = 64 * 1024 * 1024,
+                      path: Optional[str] = None, start: int = 0,
+                      end: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Lê eventos em blocos de tamanho limitado, projetando só as colunas pedidas
+
+    Usa o event store se configurado; senão faz streaming do NDJSON com o
+    leitor JSON do Arrow (campos fora de `columns` são ignorados no parse).
+    `event_time`, se pedido, já vem como datetime UTC.
+
+    Args:
+        columns: colunas desejadas
+        chunk_bytes: tamanho aproximado de cada bloco de entrada
+        path: NDJSON explícito (padrão: DATA_EVENTS_PATH)
+        start/end: intervalo de bytes do NDJSON (end padrão: última linha completa)
+    """
+    store = get_event_store() if path is None else None
+    if store is not None:
+        # ~200 bytes por evento no layout colunar
+        yield from store.iter_batches(columns, batch_rows=max(1024, chunk_bytes // 200))
+        return
+
+    import pyarrow.json as pj
+    from common.config import DATA_EVENTS_PATH
+    path = path or DATA_EVENTS_PATH
+    end = last_complete_offset(path) if end is None else end
+    if end <= start:
+        return
+    schema = pa.schema([(c, pa.string()) for c in columns])
+    with open(path, "rb") as f:
+        reader = pj.open_json(
+            io.BufferedReader(_ByteWindow(f, start, end), buffer_size=1 << 20),
+            read_options=pj.ReadOptions(block_size=chunk_bytes),
+            parse_options=pj.ParseOptions(explicit_schema=schema, unexpected_field_behavior="ignore"),
+        )
+        for batch in reader:
+            df = batch.to_pandas()
+            if "event_time" in df.columns:
+                df["event_time"] = parse_event_time(df["event_time"])
+            yield df
+
+
+def main():
+    from common.config import EVENT_STORE_DIR
+    ap = argparse.ArgumentParser(description="Event store particionado por data")
+    ap.add_argument("--root", default=EVENT_STORE_DIR or "data/event_store")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="importa um events.jsonl legado")
+    imp.add_argument("path")
+    comp = sub.add_parser("compact", help="compacta segmentos selados em Parquet")
+    comp.add_argument("--loop", type=float, default=0, help="repete a cada N segundos")
+    sub.add_parser("stats")
+    args = ap.parse_args()
+
+    store = EventStore(args.root)
+    if args.cmd == "import":
+        n = store.import_jsonl(args.path)
+        print(f"ok: {n} eventos importados -> {store.parquet_dir}")
+    elif args.cmd == "compact":
+        while True:
+            print("ok:", store.compact())
+            if not args.loop:
+                break
+            time.sleep(args.loop)
+    else:
+        print(json.dumps(store.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Escritor único do log de eventos (NDJSON) com group commit
+Bufferiza eventos em memória e grava em lote (a cada N eventos ou T ms),
+com lock entre processos e política de fsync configurável
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem flock, vale apenas o lock entre threads
+    fcntl = None
+
+FSYNC_POLICIES = ("none", "batch", "always")
+
+
+class EventLog:
+    """
+    Args:
+        path: arquivo NDJSON de destino
+        store: EventStore opcional; se informado, grava no segmento ativo dele
+        flush_events: grava assim que o buffer atingir esse número de eventos
+        flush_ms: tempo máximo que um evento fica no buffer
+        fsync: "none" (só write), "batch" (fsync por lote) ou
+               "always" (grava e faz fsync de forma síncrona a cada append)
+    """
+
+    def __init__(self, path: str, flush_events: int = 256, flush_ms: float = 50.0,
+                 fsync: str = "batch", store=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync deve ser um de {FSYNC_POLICIES}")
+        self.path = path
+        self.store = store
+        self.flush_events = flush_events
+        self.flush_ms = flush_ms
+        self.fsync = fsync
+        self.events = 0
+        self.commits = 0
+        self.bytes = 0
+        self._buf: List[str] = []
+        self._first_at = 0.0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()  # garante a ordem dos lotes
+        self._thread = None
+        if fsync != "always":
+            self._thread = threading.Thread(target=self._run, name="eventlog", daemon=True)
+            self._thread.start()
+
+    def append(self, event: dict):
+        self.extend([event])
+
+    def extend(self, events: Iterable[dict]):
+        lines = [json.dumps(e) + "\n" for e in events]
+        if not lines:
+            return
+        if self.fsync == "always" or self._closed:
+            with self._io_lock:
+                self._commit(lines)
+            return
+        with self._cond:
+            if not self._buf:
+                self._first_at = time.monotonic()
+                self._cond.notify()
+            self._buf.extend(lines)
+            if len(self._buf) >= self.flush_events:
+                self._cond.notify()
+
+    def flush(self):
+        """Grava imediatamente o que estiver no buffer"""
+        with self._io_lock:
+            with self._cond:
+                batch, self._buf = self._buf, []
+            self._commit(batch)
+
+    def close(self):
+        """Grava o buffer pendente e encerra a thread de group commit"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.flush()
+        if self.store is not None:
+            self.store.seal()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._buf and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                deadline = self._first_at + self.flush_ms / 1000.0
+                while len(self._buf) < self.flush_events and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            self.flush()
+
+    def _open_locked(self, nbytes: int):
+        """Abre o destino com flock, garantindo que o caminho ainda aponta para o arquivo aberto"""
+        while True:
+            path = self.store.active_segment(nbytes) if self.store is not None else self.path
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            f = open(path, "ab")
+            if fcntl is None:
+                return f
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                if os.stat(path).st_ino == os.fstat(f.fileno()).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            # arquivo renomeado (ex.: segmento reivindicado pela compactação) entre o open e o lock
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            f.close()
+
+    def _commit(self, lines: List[str]):
+        if not lines:
+            return
+        data = "".join(lines).encode("utf-8")
+        # um open/write por lote; O_APPEND + flock evita linhas intercaladas entre processos
+        f = self._open_locked(len(data))
+        try:
+            f.write(data)
+            f.flush()
+            if self.fsync != "none":
+                os.fsync(f.fileno())
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            f.close()
+        self.events += len(lines)
+        self.commits += 1
+        self.bytes += len(data)
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "buffered": len(self._buf),
+            "events": self.events,
+            "commits": self.commits,
+            "bytes": self.bytes,
+            "events_per_commit": round(self.events / self.commits, 2) if self.commits else 0.0,
+            "fsync": self.fsync,
+        }
+
+
+_logs: Dict[str, EventLog] = {}
+_logs_lock = threading.Lock()
+
+
+def get_event_log(path: str = None) -> EventLog:
+    """
+    EventLog compartilhado do processo para o caminho
+    Sem caminho, usa o EventStore (se EVENT_STORE_DIR estiver configurado)
+    ou o DATA_EVENTS_PATH
+    """
+    from common.config import DATA_EVENTS_PATH, EVENTLOG_FLUSH_EVENTS, EVENTLOG_FLUSH_MS, EVENTLOG_FSYNC
+    from common.event_store import get_event_store
+    store = get_event_store() if path is None else None
+    path = str(store.root) if store is not None else (path or DATA_EVENTS_PATH)
+    key = os.path.abspath(path)
+    with _logs_lock:
+        log = _logs.get(key)
+        if log is None:
+            log = EventLog(path, EVENTLOG_FLUSH_EVENTS, EVENTLOG_FLUSH_MS, EVENTLOG_FSYNC, store=store)
+            _logs[key] = log
+        return log
+
+
+def close_event_logs():
+    """Flush de todos os logs abertos (chamado no shutdown e via atexit)"""
+    with _logs_lock:
+        logs = list(_logs.values())
+        _logs.clear()
+    for log in logs:
+        log.close()
+
+
+atexit.register(close_event_logs)
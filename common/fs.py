@@ -0,0 +1,24 @@
+"""
+Utilitários de sistema de arquivos compartilhados entre API e pipelines offline
+"""
+import os
+from typing import Optional, Tuple
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """
+    Assinatura (mtime_ns, tamanho) do arquivo; None se não existir
+    Para um diretório de shards: maior mtime e soma dos tamanhos dos arquivos
+    """
+    try:
+        st = os.stat(path)
+        if not os.path.isdir(path):
+            return (st.st_mtime_ns, st.st_size)
+        sig = (st.st_mtime_ns, 0)
+        with os.scandir(path) as it:
+            for e in it:
+                est = e.stat()
+                sig = (max(sig[0], est.st_mtime_ns), sig[1] + est.st_size)
+        return sig
+    except FileNotFoundError:
+        return None
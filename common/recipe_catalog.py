@@ -0,0 +1,185 @@
+"""
+Catálogo de receitas: um registro por recipe_id, gravado uma única vez
+
+O texto completo da receita (`full_recipe`) e os metadados (calorias, tempo de
+preparo) ficam aqui em vez de se repetirem em cada evento; o evento carrega só o
+recipe_id e os rótulos curtos da ação (nome e busca). SQLite (stdlib) em modo WAL,
+com o recipe_id como chave primária:
+
+- `put` é idempotente e só preenche campos ainda vazios (o primeiro texto vence);
+- `lookup` busca nome e busca de vários IDs por índice, sem tocar no log de eventos
+  (`get` traz o registro completo de uma receita);
+- `frame` devolve o catálogo inteiro para os builds offline.
+
+Migração dos eventos antigos (que ainda trazem `full_recipe`):
+    PYTHONPATH=. python -m common.recipe_catalog import
+"""
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+FIELDS = ["recipe_name", "query", "full_recipe", "calories", "prep_time"]
+LOOKUP_CHUNK = 500  # IDs por consulta IN (limite de parâmetros do SQLite)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    recipe_id TEXT PRIMARY KEY,
+    recipe_name TEXT,
+    query TEXT,
+    full_recipe TEXT,
+    calories INTEGER,
+    prep_time INTEGER,
+    created_at TEXT
+)
+"""
+# write-once por campo: conflito só completa o que ainda está vazio
+UPSERT = (f"INSERT INTO recipes (recipe_id, {', '.join(FIELDS)}, created_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+          "ON CONFLICT(recipe_id) DO UPDATE SET "
+          + ", ".join(f"{c} = COALESCE(recipes.{c}, excluded.{c})" for c in FIELDS))
+
+
+def _clean(value):
+    """'' / NaN / None -> None (campo vazio não ocupa o registro)"""
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+class RecipeCatalog:
+    """Catálogo recipe_id -> nome, busca, texto completo, calorias e tempo de preparo"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # uma conexão por processo; o lock serializa as threads do servidor
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.writes = 0
+
+    def put(self, recipe_id: str, recipe_name: Optional[str] = None, query: Optional[str] = None,
+            full_recipe: Optional[str] = None, calories: Optional[int] = None, prep_time: Optional[int] = None):
+        self.put_many([(recipe_id, recipe_name, query, full_recipe, calories, prep_time)])
+
+    def put_many(self, rows: Iterable[Tuple]):
+        """Grava (recipe_id, nome, busca, texto, calorias, preparo) numa transação só"""
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        rows = [(rid, *map(_clean, rest), now) for rid, *rest in rows if rid]
+        if not rows:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(UPSERT, rows)
+            self.writes += len(rows)
+
+    def lookup(self, recipe_ids: Iterable[str]) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """(nome, busca) dos IDs presentes no catálogo"""
+        ids = list(dict.fromkeys(recipe_ids))
+        out = {}
+        with self._lock:
+            for i in range(0, len(ids), LOOKUP_CHUNK):
+                chunk = ids[i:i + LOOKUP_CHUNK]
+                sql = f"SELECT recipe_id, recipe_name, query FROM recipes WHERE recipe_id IN ({','.join('?' * len(chunk))})"
+                out.update((rid, (name, q)) for rid, name, q in self._conn.execute(sql, chunk))
+        return out
+
+    def get(self, recipe_id: str) -> Optional[dict]:
+        """Registro completo da receita (None se não está no catálogo)"""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(FIELDS)} FROM recipes WHERE recipe_id = ?", (recipe_id,)).fetchone()
+        return dict(zip(FIELDS, row)) if row else None
+
+    def frame(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Catálogo inteiro (recipe_id + colunas pedidas), para os builds offline"""
+        cols = ["recipe_id"] + [c for c in (columns or FIELDS) if c in FIELDS]
+        with self._lock:
+            return pd.read_sql_query(f"SELECT {', '.join(cols)} FROM recipes ORDER BY recipe_id", self._conn)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+
+    def stats(self) -> dict:
+        size = sum(p.stat().st_size for p in self.path.parent.glob(self.path.name + "*"))
+        return {"path": str(self.path), "recipes": len(self), "writes": self.writes, "bytes": size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_catalog: Optional[RecipeCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_recipe_catalog() -> RecipeCatalog:
+    """Catálogo compartilhado do processo (RECIPE_CATALOG_PATH)"""
+    global _catalog
+    from common.config import RECIPE_CATALOG_PATH
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = RecipeCatalog(RECIPE_CATALOG_PATH)
+        return _catalog
+
+
+def catalog_frame(columns: Optional[List[str]] = None, path: Optional[str] = None) -> pd.DataFrame:
+    """Catálogo de RECIPE_CATALOG_PATH como DataFrame (vazio se ainda não existe)"""
+    from common.config import RECIPE_CATALOG_PATH
+    path = path or RECIPE_CATALOG_PATH
+    if not Path(path).exists():
+        return pd.DataFrame(columns=["recipe_id"] + [c for c in (columns or FIELDS) if c in FIELDS])
+    catalog = RecipeCatalog(path)
+    try:
+        return catalog.frame(columns)
+    finally:
+        catalog.close()
+
+
+def import_events(catalog: RecipeCatalog, chunk_bytes: int = 64 << 20) -> int:
+    """Preenche o catálogo com nome, busca e texto completo dos eventos já gravados"""
+    from common.event_store import iter_event_chunks
+    from common.recipe_ids import load_recipe_map
+    n, rmap = 0, load_recipe_map()
+    for ch in iter_event_chunks(["recipe_id", "recipe_name", "query", "full_recipe"], chunk_bytes):
+        ch = ch.dropna(subset=["recipe_id"]).dropna(subset=["recipe_name", "query", "full_recipe"], how="all")
+        if rmap is not None:
+            rmap.apply(ch)  # texto das variantes vai para o ID canônico
+        ch = ch.astype(object).where(ch.notna(), None)
+        catalog.put_many((r.recipe_id, r.recipe_name, r.query, r.full_recipe, None, None)
+                         for r in ch.itertuples(index=False))
+        n += len(ch)
+    return n
+
+
+def main():
+    from common.config import RECIPE_CATALOG_PATH
+    ap = argparse.ArgumentParser(description="Catálogo de receitas (texto completo fora dos eventos)")
+    ap.add_argument("--path", default=RECIPE_CATALOG_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("import", help="preenche o catálogo a partir dos eventos com full_recipe")
+    sub.add_parser("stats")
+    args = ap.parse_args()
+
+    catalog = RecipeCatalog(args.path)
+    if args.cmd == "import":
+        t0 = time.perf_counter()
+        n = import_events(catalog)
+        print(f"ok: {n} eventos lidos em {time.perf_counter() - t0:.1f}s -> {len(catalog)} receitas em {args.path}")
+    else:
+        print(json.dumps(catalog.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
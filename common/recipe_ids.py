@@ -0,0 +1,66 @@
+"""
+IDs de receita e mapeamento para o ID canônico (receitas quase duplicadas)
+
+O ID nasce do nome (`rec_` + md5 do nome em minúsculas); pipelines/recipe_dedup.py
+agrupa nomes quase iguais e grava em RECIPE_MAP_DIR só os IDs que mudam:
+
+    <dir>/ids.npy        IDs originais, ordenados
+    <dir>/canonical.npy  ID canônico de cada um
+    <dir>/name_ids.npy   IDs que já foram canônicos, ordenados
+    <dir>/names.npy      nome de cada um quando virou canônico pela primeira vez
+    <dir>/meta.json      inclui `digest` (muda só quando o mapeamento muda)
+
+Quem lê eventos (features, retrievers, API) aplica o mesmo mapeamento.
+"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+def recipe_id(name: str) -> str:
+    """ID derivado do nome da receita (mesma regra da API)"""
+    return f"rec_{hashlib.md5(name.lower().encode()).hexdigest()[:8]}"
+
+
+class RecipeMap:
+    """Mapeamento ID -> ID canônico (somente leitura)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text())
+        ids = np.load(self.path / "ids.npy")
+        self.series = pd.Series(np.load(self.path / "canonical.npy"), index=pd.Index(ids))
+        # eventos do canônico trazem também os nomes das variantes: o dedup usa o nome fixado
+        if (self.path / "names.npy").exists():
+            self.names = pd.Series(np.load(self.path / "names.npy"), index=pd.Index(np.load(self.path / "name_ids.npy")))
+        else:
+            self.names = pd.Series([], dtype=object)
+        self.digest = self.meta.get("digest")
+
+    def __len__(self) -> int:
+        return len(self.series)
+
+    def get(self, recipe_id: str) -> str:
+        return self.series.get(recipe_id, recipe_id)
+
+    def apply(self, df: pd.DataFrame, col: str = "recipe_id") -> pd.DataFrame:
+        """Troca, no lugar, os IDs da coluna pelos canônicos (os demais ficam iguais)"""
+        if len(self.series) and col in df.columns and len(df):
+            df[col] = df[col].map(self.series).fillna(df[col])
+        return df
+
+
+def load_recipe_map(path: Optional[str] = None) -> Optional[RecipeMap]:
+    """Mapeamento de RECIPE_MAP_DIR (None se ainda não foi gerado)"""
+    from common.config import RECIPE_MAP_DIR
+    path = Path(path or RECIPE_MAP_DIR)
+    return RecipeMap(path) if (path / "meta.json").exists() else None
+
+
+if __name__ == "__main__":
+    assert recipe_id("Salada Caesar") == recipe_id("salada caesar") == "rec_" + hashlib.md5(b"salada caesar").hexdigest()[:8]
+    print("ok")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Literal
 from datetime import datetime
 
 # Schema genérico para eventos simulados
@@ -62,3 +62,8 @@ class RecResponse(BaseModel):
     user_id: str
     items: List[RecItem]
 
+class BatchRecRequest(BaseModel):
+    """Pedido de recomendações em lote (resposta em NDJSON, uma linha por usuário)"""
+    user_ids: List[str]
+    k: Optional[int] = None  # None = TOP_K
+    variant: Literal["baseline", "model_v1"] = "model_v1"
@@ -0,0 +1,25 @@
+"""
+Normalização de texto das receitas (português)
+Minúsculas, sem acentos e tokens alfanuméricos: "Pão Integral" -> ["pao", "integral"]
+"""
+import re
+import unicodedata
+from typing import List
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def fold(text: str) -> str:
+    """Minúsculas e sem acentos/cedilha"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return text.encode("ascii", "ignore").decode("ascii")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(fold(text or ""))
+
+
+if __name__ == "__main__":
+    assert tokenize("Lanche saudável com PÃO integral!") == ["lanche", "saudavel", "com", "pao", "integral"]
+    assert tokenize(None) == [] and fold("Açaí") == "acai"
+    print("ok")
@@ -3,8 +3,9 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
-import json
-from common.config import FEATURES_VAL_PATH, FEATURES_TRAIN_PATH, MODEL_PATH, DATA_EVENTS_PATH
+from common.config import FEATURES_VAL_PATH, FEATURES_TRAIN_PATH, MODEL_PATH
+from common.event_store import load_events
+from common.recipe_catalog import get_recipe_catalog
 
 st.set_page_config(page_title="Prato do Dia - Dashboard", layout="wide", page_icon="🍽️")
 
@@ -25,23 +26,11 @@ df_val = pd.read_parquet(FEATURES_VAL_PATH)
 # Carregar eventos reais (se existirem)
 def load_real_events():
     """Carrega eventos reais do arquivo JSONL"""
-    events_path = Path(DATA_EVENTS_PATH)
-    if not events_path.exists():
+    # event store particionado (se configurado) ou events.jsonl legado
+    df_events = load_events()
+    if df_events.empty:
         return pd.DataFrame()
     
-    events = []
-    with open(events_path, 'r') as f:
-        for line in f:
-            try:
-                events.append(json.loads(line))
-            except:
-                continue
-    
-    if not events:
-        return pd.DataFrame()
-    
-    df_events = pd.DataFrame(events)
-    
     # Filtrar apenas eventos do app (não simulados)
     # Aceitar eventos do app ou sincronizados do Firestore
     if 'source' in df_events.columns:
@@ -641,11 +630,13 @@ with tab3:
                         st.markdown(f"**Data:** {row.get('event_time', 'N/A')}")
                         st.markdown(f"**Plataforma:** {row.get('platform', 'N/A')}")
                     
-                    # Mostrar receita completa se disponível
-                    if 'full_recipe' in row and row['full_recipe']:
+                    # Mostrar receita completa se disponível (catálogo de receitas; eventos antigos ainda a trazem)
+                    entry = get_recipe_catalog().get(row.get('recipe_id')) or {}
+                    full_recipe = entry.get('full_recipe') or row.get('full_recipe')
+                    if isinstance(full_recipe, str) and full_recipe:
                         st.markdown("---")
                         st.markdown("**Receita Completa:**")
-                        st.markdown(row['full_recipe'][:500] + "..." if len(str(row['full_recipe'])) > 500 else row['full_recipe'])
+                        st.markdown(full_recipe[:500] + "..." if len(full_recipe) > 500 else full_recipe)
         
         # Gráficos de análise
         if not df_real_events.empty:
@@ -42,7 +42,6 @@ def firebase_to_event(firebase_data: Dict) -> Dict:
             "recipe_id": recipe_id,
             "recipe_name": data.get("recipeName"),
             "query": data.get("query", ""),
-            "full_recipe": data.get("fullRecipe", ""),
             "platform": "mobile",
             "source": "app"
         }
@@ -69,6 +68,33 @@ def firebase_to_event(firebase_data: Dict) -> Dict:
     return None
 
 
+def catalog_entry(firebase_data: Dict, recipe_id: str) -> tuple:
+    """
+    Linha do catálogo de receitas (common/recipe_catalog.py) para o evento do Firebase
+    O texto completo vai para o catálogo, não para o evento
+    """
+    data = firebase_data.get("data", {})
+    if firebase_data.get("event_type") == "save_recipe":
+        return (recipe_id, data.get("name"), data.get("query"), data.get("response"), None, None)
+    return (recipe_id, data.get("recipeName"), data.get("query"), data.get("fullRecipe"),
+            data.get("calories"), data.get("preparationTime"))
+
+
+def _catalog_events(firebase_events: List[Dict]) -> List[Dict]:
+    """Converte os eventos e grava o texto das receitas no catálogo (uma transação)"""
+    from common.recipe_catalog import get_recipe_catalog
+    from common.recipe_ids import load_recipe_map
+    pairs = [(fb, firebase_to_event(fb)) for fb in firebase_events]
+    pairs = [(fb, e) for fb, e in pairs if e]
+    # variantes quase duplicadas vão para o ID canônico (pipelines/recipe_dedup.py), como na API
+    rmap = load_recipe_map()
+    if rmap is not None:
+        for _, e in pairs:
+            e["recipe_id"] = rmap.get(e["recipe_id"])
+    get_recipe_catalog().put_many(catalog_entry(fb, e["recipe_id"]) for fb, e in pairs)
+    return [e for _, e in pairs]
+
+
 def sync_firebase_to_jsonl(firebase_events: List[Dict], output_path: str = "data/events.jsonl"):
     """
     Sincroniza eventos do Firebase para o arquivo JSONL
@@ -77,6 +103,11 @@ def sync_firebase_to_jsonl(firebase_events: List[Dict], output_path: str = "data
         firebase_events: Lista de eventos do Firebase
         output_path: Caminho do arquivo de saída
     """
+    from common.event_store import get_event_store
+    store = get_event_store()
+    if store is not None:
+        return _sync_firebase_to_store(firebase_events)
+    
     output_file = Path(output_path)
     
     # Ler eventos existentes (se houver)
@@ -85,12 +116,8 @@ def sync_firebase_to_jsonl(firebase_events: List[Dict], output_path: str = "data
         with open(output_file, 'r') as f:
             existing_events = [json.loads(line) for line in f]
     
-    # Converter novos eventos
-    new_events = []
-    for fb_event in firebase_events:
-        event = firebase_to_event(fb_event)
-        if event:
-            new_events.append(event)
+    # Converter novos eventos (texto completo das receitas vai para o catálogo)
+    new_events = _catalog_events(firebase_events)
     
     # Combinar e remover duplicatas (baseado em user_id + recipe_id + event_time)
     all_events = existing_events + new_events
@@ -109,6 +136,34 @@ def sync_firebase_to_jsonl(firebase_events: List[Dict], output_path: str = "data
     print(f"💾 Salvo em: {output_path}")
 
 
+def _sync_firebase_to_store(firebase_events: List[Dict]):
+    """Variante para o event store: lê só as colunas-chave e acrescenta apenas eventos novos"""
+    from common.event_store import load_events, parse_event_time
+    from common.eventlog import get_event_log
+    
+    new_events = _catalog_events(firebase_events)
+    
+    # Chaves existentes (user_id + recipe_id + event_time), lidas com projeção de colunas
+    existing = load_events(columns=["user_id", "recipe_id", "event_time"])
+    seen = set(zip(existing["user_id"], existing["recipe_id"].fillna("none"), existing["event_time"]))
+    
+    import pandas as pd
+    times = parse_event_time(pd.Series([e["event_time"] for e in new_events], dtype=object))
+    unique = []
+    for event, ts in zip(new_events, times):
+        key = (event["user_id"], event.get("recipe_id") or "none", ts)
+        if key not in seen:
+            seen.add(key)
+            unique.append(event)
+    
+    log = get_event_log()
+    log.extend(unique)
+    log.flush()
+    
+    print(f"✅ Sincronizado: {len(unique)} novos eventos")
+    print(f"💾 Salvo em: {log.path}")
+
+
 def example_usage():
     """Exemplo de uso com dados mock do Firebase"""
     
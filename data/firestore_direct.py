@@ -3,7 +3,6 @@ Conexão Direta com Firestore usando Firebase Admin SDK
 Permite ler e sincronizar dados diretamente do Firestore
 """
 import os
-import json
 from datetime import datetime
 from pathlib import Path
 import firebase_admin
@@ -11,6 +10,9 @@ from firebase_admin import credentials, firestore
 from typing import List, Dict, Optional
 import logging
 from dotenv import load_dotenv
+from common.eventlog import get_event_log
+from common.recipe_catalog import get_recipe_catalog
+from common.recipe_ids import load_recipe_map
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -158,12 +160,12 @@ class FirestoreSync:
             logger.error(f"❌ Erro ao buscar favoritos: {e}")
             return []
     
-    def sync_to_jsonl(self, output_path: str = "data/events.jsonl", batch_size: int = None):
+    def sync_to_jsonl(self, output_path: str = None, batch_size: int = None):
         """
         Sincroniza dados do Firestore para arquivo JSONL
         
         Args:
-            output_path: Caminho do arquivo de saída
+            output_path: Caminho do arquivo de saída (None = destino padrão: event store ou DATA_EVENTS_PATH)
             batch_size: Tamanho do lote por sincronização (None = sem limite, busca tudo)
         """
         if not self.is_connected():
@@ -176,8 +178,8 @@ class FirestoreSync:
         generated = self.get_recipes_generated(limit=batch_size)
         favorited = self.get_recipes_favorited(limit=batch_size)
         
-        # Converter para eventos
-        events = []
+        # Converter para eventos (texto completo e metadados vão para o catálogo, uma vez por receita)
+        events, entries = [], []
         
         for recipe in generated:
             # Formatar data corretamente (remover +00:00 e adicionar Z)
@@ -194,11 +196,12 @@ class FirestoreSync:
                 "recipe_id": self._generate_recipe_id(recipe.get('recipeName', '')),
                 "recipe_name": recipe.get('recipeName'),
                 "query": recipe.get('query', ''),
-                "full_recipe": recipe.get('fullRecipe', ''),
                 "platform": "mobile",
                 "source": "firestore_sync"
             }
             events.append(event)
+            entries.append((event["recipe_id"], recipe.get('recipeName'), recipe.get('query'), recipe.get('fullRecipe'),
+                            recipe.get('calories'), recipe.get('preparationTime')))
         
         for recipe in favorited:
             # Formatar data corretamente (remover +00:00 e adicionar Z)
@@ -219,15 +222,22 @@ class FirestoreSync:
                 "source": "firestore_sync"
             }
             events.append(event)
+            entries.append((event["recipe_id"], recipe.get('name'), recipe.get('query'), recipe.get('response'), None, None))
         
-        # Salvar no arquivo
-        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_path, 'a') as f:
+        # variantes quase duplicadas vão para o ID canônico (pipelines/recipe_dedup.py), como na API
+        rmap = load_recipe_map()
+        if rmap is not None:
             for event in events:
-                f.write(json.dumps(event) + "\n")
+                event["recipe_id"] = rmap.get(event["recipe_id"])
+            entries = [(rmap.get(rid), *rest) for rid, *rest in entries]
+        
+        get_recipe_catalog().put_many(entries)
+        # Salvar no arquivo (um único lote no EventLog compartilhado)
+        log = get_event_log(output_path)
+        log.extend(events)
+        log.flush()
         
-        logger.info(f"✅ Sincronizado {len(events)} eventos para {output_path}")
+        logger.info(f"✅ Sincronizado {len(events)} eventos para {log.path}")
         return len(events)
     
     def _generate_recipe_id(self, recipe_name: str) -> str:
@@ -9,8 +9,12 @@ import signal
 import logging
 from pathlib import Path
 from data.firestore_direct import FirestoreSync
+from common.eventlog import get_event_log, close_event_logs
+from common.recipe_catalog import get_recipe_catalog
+from common.recipe_ids import RecipeMap
+from common.config import RECIPE_MAP_DIR, CANDIDATES_RELOAD_INTERVAL
+from api.retrieval import IndexWatcher
 from datetime import datetime
-import json
 import requests
 from dotenv import load_dotenv
 
@@ -48,6 +52,8 @@ class RealtimeSync:
         self.sync = FirestoreSync(service_account_path)
         self.processed_count = 0
         self.error_count = 0
+        # mapeamento de receitas quase duplicadas, recarregado quando muda (como na API)
+        self.recipe_map = IndexWatcher(RECIPE_MAP_DIR, RecipeMap, CANDIDATES_RELOAD_INTERVAL)
     
     def process_event(self, doc: dict):
         """
@@ -68,10 +74,12 @@ class RealtimeSync:
                     "recipe_id": self._generate_recipe_id(doc.get('recipeName', '')),
                     "recipe_name": doc.get('recipeName'),
                     "query": doc.get('query', ''),
-                    "full_recipe": doc.get('fullRecipe', ''),
                     "platform": "mobile",
                     "source": "firestore_realtime"
                 }
+                # texto completo fica no catálogo, não no evento
+                get_recipe_catalog().put(event["recipe_id"], doc.get('recipeName'), doc.get('query'),
+                                         doc.get('fullRecipe'), doc.get('calories'), doc.get('preparationTime'))
             elif event_type == 'save_recipe':
                 event = {
                     "event_time": doc.get('addedAt', datetime.now()).isoformat() + "Z",
@@ -83,6 +91,7 @@ class RealtimeSync:
                     "platform": "mobile",
                     "source": "firestore_realtime"
                 }
+                get_recipe_catalog().put(event["recipe_id"], doc.get('name'), doc.get('query'), doc.get('response'))
             else:
                 logger.warning(f"⚠️ Tipo de evento desconhecido: {event_type}")
                 return
@@ -101,10 +110,8 @@ class RealtimeSync:
             logger.error(f"❌ Erro ao processar evento: {e}")
     
     def _save_to_jsonl(self, event: dict):
-        """Salva evento no arquivo JSONL"""
-        Path(EVENTS_PATH).parent.mkdir(parents=True, exist_ok=True)
-        with open(EVENTS_PATH, 'a') as f:
-            f.write(json.dumps(event) + "\n")
+        """Salva evento no arquivo JSONL (via EventLog com group commit)"""
+        get_event_log().append(event)
     
     def _send_to_api(self, event: dict):
         """Envia evento para a API (opcional)"""
@@ -117,9 +124,11 @@ class RealtimeSync:
             logger.debug(f"API não disponível: {e}")
     
     def _generate_recipe_id(self, recipe_name: str) -> str:
-        """Gera ID único para receita"""
+        """Gera ID único para receita (o canônico, se ela for variante de outra)"""
         import hashlib
-        return f"rec_{hashlib.md5(recipe_name.lower().encode()).hexdigest()[:8]}"
+        recipe_id = f"rec_{hashlib.md5(recipe_name.lower().encode()).hexdigest()[:8]}"
+        rmap = self.recipe_map.get()
+        return rmap.get(recipe_id) if rmap is not None else recipe_id
     
     def start(self):
         """Inicia serviço de sincronização em tempo real"""
@@ -152,6 +161,9 @@ class RealtimeSync:
         except KeyboardInterrupt:
             logger.info("🛑 Interrompido pelo usuário")
         
+        # gravar eventos ainda no buffer antes de sair
+        close_event_logs()
+        
         logger.info("=" * 60)
         logger.info(f"📊 ESTATÍSTICAS FINAIS")
         logger.info(f"   Eventos processados: {self.processed_count}")
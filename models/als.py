@@ -0,0 +1,197 @@
+"""
+Retrieval por fatoração de matrizes com feedback implícito (ALS)
+
+Treino (offline): soma os eventos por usuário×receita com pesos por tipo
+(EVENT_WEIGHTS), usa confiança c = 1 + alpha·r (Hu, Koren & Volinsky) e
+alterna mínimos quadrados entre fatores de usuário e de receita. Cada meia
+iteração resolve todos os usuários (ou receitas) juntos por gradiente
+conjugado, só com produtos esparsos e densos (BLAS), sem laço por usuário:
+
+    <dir>/users.npy          ids dos usuários, ordenados
+    <dir>/user_factors.npy   float32 (usuários × fatores)
+    <dir>/recipes.npy        ids das receitas, ordenados
+    <dir>/item_factors.npy   float32 (receitas × fatores)
+    <dir>/meta.json
+
+Consulta (API): os .npy são abertos com mmap; `recommend(user_id, n)` pontua o
+catálogo inteiro com um produto matriz-vetor e seleciona o top-n com argpartition.
+
+Uso:
+    PYTHONPATH=. python models/als.py --factors 32 --iterations 15
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from common.config import ALS_DIR, ALS_FACTORS, ALS_ITERATIONS, ALS_REG, ALS_ALPHA
+from common.event_store import iter_event_chunks
+from common.recipe_ids import load_recipe_map
+from models.item_neighbors import save_arrays
+
+# peso de cada tipo de evento na matriz de interações
+EVENT_WEIGHTS = {"recipe_view": 1.0, "save_recipe": 4.0}
+CG_STEPS = 3
+BLOCK_NNZ = 1 << 20  # interações por bloco do gradiente conjugado (limita a memória)
+
+
+def load_interactions(weights: dict = EVENT_WEIGHTS, chunk_bytes: int = 64 << 20) -> pd.DataFrame:
+    """Soma dos pesos por (user_id, recipe_id)"""
+    w = pd.Series(weights, dtype="float32")
+    parts, rmap = [], load_recipe_map()
+    for ch in iter_event_chunks(["user_id", "recipe_id", "event_name"], chunk_bytes):
+        ch = ch.loc[ch["event_name"].isin(w.index)].dropna(subset=["user_id", "recipe_id"])
+        if rmap is not None:
+            rmap.apply(ch)
+        ch = ch.assign(weight=w.reindex(ch["event_name"]).to_numpy())
+        parts.append(ch.groupby(["user_id", "recipe_id"], sort=False)["weight"].sum())
+    if not parts:
+        return pd.DataFrame({"user_id": [], "recipe_id": [], "weight": []})
+    return pd.concat(parts).groupby(level=[0, 1], sort=False).sum().reset_index()
+
+
+def interaction_matrix(pairs: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, sp.csr_matrix]:
+    """(usuários ordenados, receitas ordenadas, CSR usuários×receitas com os pesos)"""
+    users, u = np.unique(pairs["user_id"].to_numpy(dtype=str), return_inverse=True)
+    recipes, r = np.unique(pairs["recipe_id"].to_numpy(dtype=str), return_inverse=True)
+    R = sp.csr_matrix((pairs["weight"].to_numpy(dtype="float32"), (u, r)), shape=(len(users), len(recipes)))
+    R.sum_duplicates()
+    return users, recipes, R
+
+
+def _cg_update(C: sp.csr_matrix, X: np.ndarray, Y: np.ndarray, reg: float, steps: int = CG_STEPS):
+    """
+    Atualiza X (uma linha por linha de C) com Y fixo, por gradiente conjugado em lote
+
+    Resolve (YᵀY + Yᵀ(Cᵤ - I)Y + reg·I) xᵤ = YᵀCᵤpᵤ para todas as linhas ao mesmo
+    tempo, partindo do X atual (poucos passos bastam entre iterações do ALS).
+    """
+    YtY = Y.T @ Y + reg * np.eye(Y.shape[1], dtype=Y.dtype)
+    start = 0
+    while start < C.shape[0]:
+        # bloco de linhas com até BLOCK_NNZ interações (pelo menos uma linha)
+        end = int(np.searchsorted(C.indptr, C.indptr[start] + BLOCK_NNZ, side="right")) - 1
+        end = min(max(end, start + 1), C.shape[0])
+        Cb = C[start:end]
+        rows = np.repeat(np.arange(end - start), np.diff(Cb.indptr))
+        Yc = Y[Cb.indices]
+        c1 = Cb.data - 1  # confiança extra das receitas com interação
+
+        def matvec(v):
+            d = np.einsum("nk,nk->n", v[rows], Yc) * c1
+            return v @ YtY + sp.csr_matrix((d, Cb.indices, Cb.indptr), shape=Cb.shape) @ Y
+
+        x = X[start:end]
+        r = Cb @ Y - matvec(x)  # pᵤ = 1 nas interações: YᵀCᵤpᵤ = Σ cᵤᵢ yᵢ
+        p = r.copy()
+        rs = np.einsum("nk,nk->n", r, r)
+        for _ in range(steps):
+            Ap = matvec(p)
+            pAp = np.einsum("nk,nk->n", p, Ap)
+            a = np.divide(rs, pAp, out=np.zeros_like(rs), where=pAp > 0)
+            x += a[:, None] * p
+            r -= a[:, None] * Ap
+            rs_new = np.einsum("nk,nk->n", r, r)
+            beta = np.divide(rs_new, rs, out=np.zeros_like(rs), where=rs > 0)
+            p = r + beta[:, None] * p
+            rs = rs_new
+        start = end
+
+
+def train_als(R: sp.csr_matrix, factors: int = 32, iterations: int = 15, reg: float = 0.05,
+              alpha: float = 10.0, seed: int = 0, verbose: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ALS implícito sobre a matriz de pesos R (usuários×receitas)
+
+    Returns:
+        (fatores de usuário, fatores de receita) em float32
+    """
+    C = R.astype("float32").tocsr(copy=True)
+    C.data = 1 + alpha * C.data
+    Ct = C.T.tocsr()
+    rng = np.random.default_rng(seed)
+    X = np.zeros((C.shape[0], factors), dtype="float32")
+    Y = (rng.standard_normal((C.shape[1], factors)) * 0.01).astype("float32")
+    for it in range(iterations):
+        t0 = time.perf_counter()
+        _cg_update(C, X, Y, reg)
+        _cg_update(Ct, Y, X, reg)
+        if verbose:
+            print(f"  iteração {it + 1}/{iterations}: {time.perf_counter() - t0:.2f}s")
+    return X, Y
+
+
+class FactorIndex:
+    """Fatores de usuário e de receita mapeados em memória (somente leitura)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text())
+        self.users = np.load(self.path / "users.npy", mmap_mode="r")
+        self.user_factors = np.load(self.path / "user_factors.npy", mmap_mode="r")
+        self.recipes = np.load(self.path / "recipes.npy", mmap_mode="r")
+        self.item_factors = np.load(self.path / "item_factors.npy", mmap_mode="r")
+
+    def user_row(self, user_id: str) -> Optional[int]:
+        if len(self.users) == 0:
+            return None
+        pos = int(np.searchsorted(self.users, user_id))
+        return pos if pos < len(self.users) and self.users[pos] == user_id else None
+
+    def recommend(self, user_id: str, n: int, exclude=()) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-n receitas pelo produto interno com o vetor do usuário
+
+        Returns:
+            (ids das receitas, scores) em ordem decrescente; vazio se o usuário não foi treinado
+        """
+        u = self.user_row(user_id)
+        if u is None or n <= 0:
+            return np.empty(0, dtype=self.recipes.dtype), np.empty(0, dtype="float32")
+        scores = self.item_factors @ self.user_factors[u]
+        excluded = 0
+        if len(exclude):
+            ex = np.asarray(exclude, dtype=str)
+            pos = np.minimum(np.searchsorted(self.recipes, ex), len(self.recipes) - 1)
+            pos = np.unique(pos[self.recipes[pos] == ex])
+            scores[pos] = -np.inf
+            excluded = len(pos)
+        n = min(n, len(scores) - excluded)
+        if n <= 0:
+            return np.empty(0, dtype=self.recipes.dtype), np.empty(0, dtype="float32")
+        top = np.argpartition(scores, len(scores) - n)[-n:]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return self.recipes[top], scores[top]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="ALS implícito para retrieval de candidatos")
+    ap.add_argument("--factors", type=int, default=ALS_FACTORS)
+    ap.add_argument("--iterations", type=int, default=ALS_ITERATIONS)
+    ap.add_argument("--reg", type=float, default=ALS_REG)
+    ap.add_argument("--alpha", type=float, default=ALS_ALPHA)
+    ap.add_argument("--out", default=ALS_DIR)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    users, recipes, R = interaction_matrix(load_interactions())
+    t_read = time.perf_counter() - t0
+    X, Y = train_als(R, args.factors, args.iterations, args.reg, args.alpha, verbose=True)
+    t_train = time.perf_counter() - t0 - t_read
+    save_arrays(Path(args.out), {"users": users, "user_factors": X, "recipes": recipes, "item_factors": Y}, {
+        "factors": args.factors, "iterations": args.iterations, "reg": args.reg, "alpha": args.alpha,
+        "event_weights": EVENT_WEIGHTS, "users": len(users), "recipes": len(recipes), "pairs": int(R.nnz),
+        "built_at": pd.Timestamp.now(tz="UTC").isoformat(),
+    })
+    print(f"{R.nnz:,} pares | {len(users):,} usuários | {len(recipes):,} receitas "
+          f"| leitura {t_read:.1f}s | treino {t_train:.1f}s")
+    print("ok:", args.out)
+
+
+if __name__ == "__main__":
+    main()
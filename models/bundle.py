@@ -0,0 +1,122 @@
+"""
+Bundle do modelo: artifacts/model.txt + manifesto artifacts/model.meta.json
+
+O manifesto descreve o artefato: versão, lista ordenada de features com dtype,
+impressão digital dos dados de treino/validação, modo de treino e métricas.
+A API carrega o bundle no startup, confere o schema uma vez e monta a matriz de
+predict selecionando as colunas nessa ordem.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from models.tree_eval import load_scorer
+
+BUNDLE_FORMAT = 1
+# classes de dtype comparadas entre treino e candidatos (int64 vs int32 passa; int vs float não)
+DTYPE_KINDS = {"b": "int", "i": "int", "u": "int", "f": "float"}
+
+
+def manifest_path(model_path) -> Path:
+    return Path(model_path).with_suffix(".meta.json")
+
+
+def read_manifest(model_path) -> Optional[dict]:
+    try:
+        return json.loads(manifest_path(model_path).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def file_sha256(path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def data_fingerprint(path) -> str:
+    """sha256 do Parquet (ou dos part-*.parquet de um diretório de shards, em ordem)"""
+    p = Path(path)
+    files = sorted(p.glob("*.parquet")) if p.is_dir() else [p]
+    h = hashlib.sha256()
+    for f in files:
+        h.update(f.name.encode())
+        h.update(file_sha256(f).encode())
+    return h.hexdigest()
+
+
+def feature_schema(X: pd.DataFrame) -> List[Dict[str, str]]:
+    """Features na ordem do treino com o dtype de cada coluna"""
+    return [{"name": c, "dtype": str(t)} for c, t in X.dtypes.items()]
+
+
+def write_bundle(model: lgb.Booster, model_path, manifest: dict, num_iteration: Optional[int] = None) -> dict:
+    """
+    Grava modelo + manifesto (arquivos temporários e troca atômica); devolve o manifesto final
+    O manifesto é trocado antes do modelo: quem ler entre as duas trocas vê um sha256
+    que não confere com o model.txt e tenta de novo quando o modelo mudar
+    """
+    model_path = Path(model_path)
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = model_path.with_name(model_path.name + ".tmp")
+    model.save_model(str(tmp), num_iteration=num_iteration)
+    sha = file_sha256(tmp)
+    manifest = {"format": BUNDLE_FORMAT,
+                "version": f"{pd.Timestamp.now(tz='UTC'):%Y%m%dT%H%M%S}-{sha[:8]}",
+                "sha256": sha, **manifest}
+    meta = manifest_path(model_path)
+    meta_tmp = meta.with_name(meta.name + ".tmp")
+    meta_tmp.write_text(json.dumps(manifest, indent=2, default=str))
+    os.replace(meta_tmp, meta)
+    os.replace(tmp, model_path)
+    return manifest
+
+
+class ModelBundle:
+    """Modelo carregado + manifesto; `predict(X)` recebe as colunas em `features`"""
+
+    def __init__(self, model_path, scorer: str = "lightgbm", warmup_rows: int = 200):
+        self.path = str(model_path)
+        self.manifest = read_manifest(model_path) or {}
+        sha = file_sha256(self.path)
+        if self.manifest.get("sha256") not in (None, sha):
+            raise ValueError(f"manifesto não confere com o modelo {self.path}: sha256 diferente")
+        self.model = load_scorer(self.path, scorer, warmup_rows)
+        names = self.model.feature_name()
+        schema = self.manifest.get("features")
+        if schema is not None and [f["name"] for f in schema] != names:
+            raise ValueError(f"manifesto não confere com o modelo {self.path}: features diferentes")
+        # modelos antigos sem manifesto: features do próprio Booster, versão pelo hash
+        self.features: List[str] = names
+        self.dtypes: Dict[str, str] = {f["name"]: f["dtype"] for f in schema or []}
+        self.version: str = self.manifest.get("version") or sha[:12]
+
+    def predict(self, X) -> np.ndarray:
+        return self.model.predict(X)
+
+    def check_columns(self, arrays: Dict[str, np.ndarray]):
+        """Confere que as colunas de candidatos têm todas as features, numéricas e do tipo do treino"""
+        missing = [c for c in self.features if c not in arrays]
+        if missing:
+            raise ValueError(f"features ausentes nos candidatos: {missing}")
+        bad = [c for c in self.features if not (np.issubdtype(arrays[c].dtype, np.number) or arrays[c].dtype == bool)]
+        if bad:
+            raise ValueError(f"features não numéricas nos candidatos: {bad}")
+        changed = {c: (t, str(arrays[c].dtype)) for c, t in self.dtypes.items()
+                   if c in arrays and DTYPE_KINDS.get(np.dtype(t).kind) != DTYPE_KINDS.get(arrays[c].dtype.kind)}
+        if changed:
+            raise ValueError(f"dtype das features difere do treino (manifesto, candidatos): {changed}")
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "scorer": type(self.model).__name__,
+            "features": len(self.features),
+            "mode": self.manifest.get("mode"),
+            "trained_at": self.manifest.get("trained_at"),
+        }
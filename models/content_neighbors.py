@@ -0,0 +1,143 @@
+"""
+Vizinhos por conteúdo (texto das receitas)
+
+Build (offline): junta, por recipe_id, o nome, as buscas (`query`) e o texto
+completo (`full_recipe`) vindos do catálogo de receitas (common/recipe_catalog.py)
+e dos eventos (os antigos ainda trazem o texto completo), vetoriza com HashingVectorizer
+(sem vocabulário em memória) + TF-IDF, mantém só os termos de maior peso de
+cada receita e calcula o cosseno receita×receita em blocos de linhas (CSR ×
+bloco denso -> argpartition), guardando os top-N vizinhos de cada receita no
+mesmo CSR compacto do índice item-item (models/item_neighbors.py).
+
+Receitas recém-geradas, sem nenhuma interação, ganham vizinhos já no próximo
+build: a API as usa para completar os candidatos de usuários com pouco histórico.
+
+Uso:
+    PYTHONPATH=. python models/content_neighbors.py --topn 50
+"""
+import argparse
+import itertools
+import time
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.preprocessing import normalize
+
+from common.config import CONTENT_NEIGHBORS_DIR, CONTENT_NEIGHBORS_TOPN
+from common.event_store import iter_event_chunks
+from common.recipe_catalog import catalog_frame
+from common.recipe_ids import load_recipe_map
+from common.text import tokenize
+from models.item_neighbors import save_index, top_per_row
+
+# peso de cada campo no vetor da receita (o nome resume a receita; o texto completo traz os ingredientes)
+FIELD_WEIGHTS = {"recipe_name": 3.0, "query": 1.0, "full_recipe": 1.0}
+N_FEATURES = 1 << 20
+MAX_TERMS = 64  # termos mantidos por receita (esparsifica o produto receita×receita)
+BLOCK_CELLS = 16_000_000  # células do bloco denso de similaridades (~64MB em float32)
+
+
+def load_texts(chunk_bytes: int = 64 << 20) -> pd.DataFrame:
+    """Uma linha por receita: último nome e texto completo não vazios e as buscas distintas"""
+    parts, queries, rmap = [], [], load_recipe_map()
+    # catálogo primeiro: os eventos (mais recentes) prevalecem quando trazem o campo
+    chunks = iter_event_chunks(["recipe_id"] + list(FIELD_WEIGHTS), chunk_bytes)
+    for ch in itertools.chain([catalog_frame(list(FIELD_WEIGHTS))], chunks):
+        ch = ch.dropna(subset=["recipe_id"])
+        if rmap is not None:
+            rmap.apply(ch)  # variantes de uma receita juntam nomes e buscas no canônico
+        for c in ("recipe_name", "full_recipe"):
+            ch[c] = ch[c].mask(ch[c].fillna("").str.strip() == "")
+        ch = ch.dropna(subset=["recipe_name", "full_recipe"], how="all")
+        parts.append(ch.groupby("recipe_id", sort=False)[["recipe_name", "full_recipe"]].last())
+        queries.append(ch.loc[ch["query"].fillna("").str.strip() != "", ["recipe_id", "query"]].drop_duplicates())
+    if not parts:
+        return pd.DataFrame(columns=["recipe_id"] + list(FIELD_WEIGHTS))
+    df = pd.concat(parts).groupby(level=0, sort=True).last()
+    q = pd.concat(queries).drop_duplicates()
+    df["query"] = q.groupby("recipe_id")["query"].agg(" ".join).reindex(df.index)
+    return df.fillna("").rename_axis("recipe_id").reset_index()
+
+
+def vectorize(texts: pd.DataFrame, max_terms: int = MAX_TERMS) -> sp.csr_matrix:
+    """TF-IDF (hashing) dos campos ponderados, top `max_terms` termos por receita, norma L2"""
+    hv = HashingVectorizer(n_features=N_FEATURES, tokenizer=tokenize, lowercase=False, token_pattern=None,
+                           alternate_sign=False, norm=None, dtype=np.float32)
+    X = sum(w * hv.transform(texts[c].fillna("")) for c, w in FIELD_WEIGHTS.items())
+    X = TfidfTransformer(sublinear_tf=True).fit_transform(X).astype(np.float32)
+    return normalize(top_per_row(X.tocsr(), max_terms))
+
+
+def blocked_topn(X: sp.csr_matrix, topn: int, block_cells: int = BLOCK_CELLS) -> sp.csr_matrix:
+    """
+    Top-n vizinhos por cosseno (linhas de X com norma L2), sem materializar a matriz n×n
+
+    O texto das receitas compartilha muitos termos, então cada bloco de similaridades
+    sai quase denso: em vez de esparso×esparso (lento com saída densa), o bloco de
+    receitas vira denso só nas colunas usadas e o produto é X (CSR) × bloco denso;
+    o top-n de cada linha sai por argpartition.
+    """
+    n = X.shape[0]
+    k = min(topn, n - 1)
+    # remove as colunas de hash sem nenhum termo (o bloco denso fica com a largura do vocabulário real)
+    used, cols = np.unique(X.indices, return_inverse=True)
+    X = sp.csr_matrix((X.data, cols.astype(np.int32), X.indptr), shape=(n, len(used)))
+    step = max(1, block_cells // max(n, len(used), 1))
+    indices, scores, counts = [], [], []
+    for start in range(0, n if k > 0 else 0, step):
+        block = np.ascontiguousarray(X[start:start + step].toarray().T)
+        sim = np.ascontiguousarray((X @ block).T)
+        rows = np.arange(len(sim))
+        sim[rows, rows + start] = 0  # a receita não é vizinha de si mesma
+        top = np.argpartition(sim, n - k, axis=1)[:, n - k:]
+        val = np.take_along_axis(sim, top, axis=1)
+        order = np.argsort(-val, axis=1, kind="stable")
+        top, val = np.take_along_axis(top, order, axis=1), np.take_along_axis(val, order, axis=1)
+        keep = val > 0
+        indices.append(top[keep].astype(np.int32))
+        scores.append(val[keep].astype(np.float32))
+        counts.append(keep.sum(axis=1))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    if counts:
+        np.cumsum(np.concatenate(counts), out=indptr[1:])
+    return sp.csr_matrix((np.concatenate(scores) if scores else np.empty(0, np.float32),
+                          np.concatenate(indices) if indices else np.empty(0, np.int32), indptr), shape=(n, n))
+
+
+def content_topn(texts: pd.DataFrame, topn: int) -> Tuple[np.ndarray, sp.csr_matrix]:
+    recipes = texts["recipe_id"].to_numpy(dtype=str)
+    if len(recipes) == 0:
+        # nenhum evento com nome/texto: índice vazio (a API sobe sem vizinhos por conteúdo)
+        return recipes, sp.csr_matrix((0, 0), dtype="float32")
+    order = np.argsort(recipes, kind="stable")
+    texts = texts.iloc[order]
+    return recipes[order], blocked_topn(vectorize(texts), topn)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Índice de vizinhos por conteúdo (TF-IDF + cosseno)")
+    ap.add_argument("--topn", type=int, default=CONTENT_NEIGHBORS_TOPN, help="vizinhos guardados por receita")
+    ap.add_argument("--out", default=CONTENT_NEIGHBORS_DIR)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    texts = load_texts()
+    t_read = time.perf_counter() - t0
+    recipes, index = content_topn(texts, args.topn)
+    t_build = time.perf_counter() - t0 - t_read
+    save_index(recipes, index, Path(args.out), {
+        "source": "content", "topn": args.topn, "fields": FIELD_WEIGHTS, "max_terms": MAX_TERMS,
+        "recipes": len(recipes), "neighbors": int(index.nnz),
+        "built_at": pd.Timestamp.now(tz="UTC").isoformat(),
+    })
+    print(f"{len(recipes):,} receitas com texto | {index.nnz:,} vizinhos "
+          f"| leitura {t_read:.1f}s | tf-idf+cosseno top-{args.topn} {t_build:.1f}s")
+    print("ok:", args.out)
+
+
+if __name__ == "__main__":
+    main()
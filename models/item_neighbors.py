@@ -0,0 +1,193 @@
+"""
+Vizinhos item-item ("quem salvou X também salvou Y")
+
+Build (offline): lê os eventos em blocos, monta a matriz binária usuário×receita
+das interações escolhidas (padrão: saves), calcula a similaridade de cosseno
+receita×receita com produtos esparsos em blocos de linhas e guarda só os
+top-N vizinhos de cada receita num CSR compacto:
+
+    <dir>/recipes.npy   ids das receitas, ordenados (linha i = recipes[i])
+    <dir>/indptr.npy    int64, vizinhos da linha i em [indptr[i], indptr[i+1])
+    <dir>/indices.npy   int32, vizinhos (ordem decrescente de similaridade)
+    <dir>/scores.npy    float32, cosseno
+    <dir>/meta.json
+
+Consulta (API): os arquivos são abertos com mmap; `neighbors(seeds)` junta os
+vizinhos de várias receitas somando as similaridades, sem laço em Python.
+
+Uso:
+    PYTHONPATH=. python models/item_neighbors.py --topn 50
+    PYTHONPATH=. python models/item_neighbors.py --events save_recipe recipe_view
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from common.config import ITEM_NEIGHBORS_DIR, ITEM_NEIGHBORS_TOPN
+from common.event_store import iter_event_chunks
+from common.recipe_ids import load_recipe_map
+
+BLOCK_ROWS = 2048
+
+
+def load_interactions(events: List[str], chunk_bytes: int = 64 << 20) -> pd.DataFrame:
+    """Pares (user_id, recipe_id) distintos com pelo menos um evento dos tipos pedidos"""
+    parts, rmap = [], load_recipe_map()
+    for ch in iter_event_chunks(["user_id", "recipe_id", "event_name"], chunk_bytes):
+        ch = ch.loc[ch["event_name"].isin(events), ["user_id", "recipe_id"]].dropna()
+        if rmap is not None:
+            rmap.apply(ch)
+        parts.append(ch.drop_duplicates())
+    if not parts:
+        return pd.DataFrame({"user_id": [], "recipe_id": []}, dtype=str)
+    return pd.concat(parts, ignore_index=True).drop_duplicates(ignore_index=True)
+
+
+def top_per_row(m: sp.csr_matrix, n: int) -> sp.csr_matrix:
+    """Mantém os n maiores valores de cada linha (ordenados, decrescente)"""
+    m = m.tocoo()
+    order = np.lexsort((-m.data, m.row))
+    row, col, val = m.row[order], m.col[order], m.data[order]
+    starts = np.searchsorted(row, np.arange(m.shape[0]))
+    keep = (np.arange(len(row)) - starts[row]) < n
+    row, col, val = row[keep], col[keep], val[keep]
+    indptr = np.zeros(m.shape[0] + 1, dtype="int64")
+    np.cumsum(np.bincount(row, minlength=m.shape[0]), out=indptr[1:])
+    return sp.csr_matrix((val.astype("float32"), col.astype("int32"), indptr), shape=m.shape)
+
+
+def cosine_topn(pairs: pd.DataFrame, topn: int) -> Tuple[np.ndarray, sp.csr_matrix]:
+    """
+    Cosseno entre receitas sobre a matriz binária usuário×receita, top-n por receita
+
+    Returns:
+        (ids das receitas ordenados, CSR receitas×receitas com os vizinhos)
+    """
+    recipes, r = np.unique(pairs["recipe_id"].to_numpy(dtype=str), return_inverse=True)
+    _, u = np.unique(pairs["user_id"].to_numpy(dtype=str), return_inverse=True)
+    X = sp.csr_matrix((np.ones(len(r), dtype="float32"), (r, u)))  # receitas×usuários
+    norms = np.sqrt(np.asarray(X.sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    Xn = sp.diags(1.0 / norms).astype("float32") @ X
+    XnT = Xn.T.tocsr()
+    blocks = []
+    # blocos de linhas: o produto completo receitas×receitas pode não caber na memória
+    for start in range(0, Xn.shape[0], BLOCK_ROWS):
+        sim = (Xn[start:start + BLOCK_ROWS] @ XnT).tocsr()
+        sim.setdiag(0, k=start)  # a receita não é vizinha de si mesma
+        sim.eliminate_zeros()
+        blocks.append(top_per_row(sim, topn))
+    index = sp.vstack(blocks).tocsr() if blocks else sp.csr_matrix((0, 0), dtype="float32")
+    return recipes, index
+
+
+def save_arrays(out: Path, arrays: dict, meta: dict):
+    """Grava os arrays (<nome>.npy) e o meta.json num diretório temporário e troca de uma vez"""
+    tmp = out.with_name(out.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, a in arrays.items():
+        np.save(tmp / f"{name}.npy", a)
+    (tmp / "meta.json").write_text(json.dumps(meta, indent=2))
+    old = out.with_name(out.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if out.exists():
+        os.replace(out, old)
+    os.replace(tmp, out)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def save_index(recipes: np.ndarray, index: sp.csr_matrix, out: Path, meta: dict):
+    save_arrays(out, {
+        "recipes": recipes.astype(str),
+        "indptr": index.indptr.astype("int64"),
+        "indices": index.indices.astype("int32"),
+        "scores": index.data.astype("float32"),
+    }, meta)
+
+
+class NeighborIndex:
+    """Índice de vizinhos mapeado em memória (somente leitura)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text())
+        self.recipes = np.load(self.path / "recipes.npy", mmap_mode="r")
+        self.indptr = np.load(self.path / "indptr.npy", mmap_mode="r")
+        self.indices = np.load(self.path / "indices.npy", mmap_mode="r")
+        self.scores = np.load(self.path / "scores.npy", mmap_mode="r")
+
+    @classmethod
+    def open(cls, path) -> Optional["NeighborIndex"]:
+        return cls(path) if (Path(path) / "meta.json").exists() else None
+
+    def lookup(self, recipe_ids) -> np.ndarray:
+        """Posições das receitas no índice (-1 se ausente)"""
+        recipe_ids = np.asarray(recipe_ids, dtype=str)
+        if len(self.recipes) == 0:
+            return np.full(len(recipe_ids), -1, dtype="int64")
+        pos = np.minimum(np.searchsorted(self.recipes, recipe_ids), len(self.recipes) - 1)
+        return np.where(self.recipes[pos] == recipe_ids, pos, -1)
+
+    def neighbors(self, recipe_ids, limit: int, exclude=()) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        União dos vizinhos das receitas-semente, pontuados pela soma das similaridades
+
+        Returns:
+            (ids das receitas, scores) em ordem decrescente, até `limit`, sem sementes/excluídas
+        """
+        seeds = self.lookup(recipe_ids)
+        seeds = seeds[seeds >= 0]
+        if len(seeds) == 0 or limit <= 0:
+            return np.empty(0, dtype=self.recipes.dtype), np.empty(0, dtype="float32")
+        starts, ends = self.indptr[seeds], self.indptr[seeds + 1]
+        lengths = ends - starts
+        # posições de todos os vizinhos das sementes, concatenadas
+        pos = np.arange(lengths.sum()) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        cand, score = self.indices[pos], self.scores[pos]
+        uniq, inv = np.unique(cand, return_inverse=True)
+        total = np.bincount(inv, weights=score).astype("float32")
+        drop = np.isin(uniq, seeds)
+        excl = self.lookup(exclude) if len(exclude) else np.empty(0, dtype="int64")
+        if len(excl):
+            drop |= np.isin(uniq, excl[excl >= 0])
+        uniq, total = uniq[~drop], total[~drop]
+        if len(uniq) > limit:
+            top = np.argpartition(-total, limit - 1)[:limit]
+            uniq, total = uniq[top], total[top]
+        order = np.lexsort((uniq, -total))
+        return self.recipes[uniq[order]], total[order]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Índice de vizinhos item-item (cosseno)")
+    ap.add_argument("--events", nargs="+", default=["save_recipe"], help="tipos de evento que contam como interação")
+    ap.add_argument("--topn", type=int, default=ITEM_NEIGHBORS_TOPN, help="vizinhos guardados por receita")
+    ap.add_argument("--out", default=ITEM_NEIGHBORS_DIR)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    pairs = load_interactions(args.events)
+    t_read = time.perf_counter() - t0
+    recipes, index = cosine_topn(pairs, args.topn)
+    t_build = time.perf_counter() - t0 - t_read
+    save_index(recipes, index, Path(args.out), {
+        "events": args.events, "topn": args.topn, "pairs": len(pairs),
+        "recipes": len(recipes), "neighbors": int(index.nnz),
+        "built_at": pd.Timestamp.now(tz="UTC").isoformat(),
+    })
+    print(f"{len(pairs):,} pares usuário×receita | {len(recipes):,} receitas | {index.nnz:,} vizinhos "
+          f"| leitura {t_read:.1f}s | cosseno+top-{args.topn} {t_build:.1f}s")
+    print("ok:", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Escolha do número de árvores pelo compromisso NDCG x latência
+
+O LightGBM avalia as árvores em sequência, então a latência de predição cresce
+com o número de iterações usadas. Para vários pontos de corte (`num_iteration`)
+medimos NDCG@10 na validação, a latência de um request (CANDIDATES_TOPN linhas,
+1 thread) e a de um lote, e escolhemos o menor corte cujo NDCG fica a até
+`tolerance` do melhor ponto, respeitando os orçamentos de árvores/folhas.
+"""
+import time
+from typing import Dict, List
+
+import lightgbm as lgb
+import numpy as np
+
+from models.metrics import rank_metrics
+
+SINGLE_REPEATS = 50
+BATCH_REPEATS = 5
+BATCH_ROWS = 10_000
+
+
+def used_iterations(model: lgb.Booster) -> int:
+    """Iterações que o predict usa por padrão (best_iteration do early stopping, se houver)"""
+    return model.best_iteration if model.best_iteration > 0 else model.current_iteration()
+
+
+def cut_points(n: int, num: int = 12) -> List[int]:
+    """Cortes em escala geométrica de 1 a n (sempre inclui n)"""
+    if n <= 0:
+        return []
+    pts = np.unique(np.round(np.geomspace(1, n, num=min(num, n))).astype(int))
+    return sorted(set(pts.tolist()) | {n})
+
+
+def _p50_ms(fn, repeats: int) -> float:
+    lat = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        lat.append(time.perf_counter() - t0)
+    return round(float(np.median(lat)) * 1000, 3)
+
+
+def latency_curve(model: lgb.Booster, X: np.ndarray, y: np.ndarray, offsets: np.ndarray,
+                  single_rows: int, points: List[int] = None) -> List[Dict]:
+    """NDCG@10, latência (p50) de um request e de um lote para cada corte de iterações"""
+    X = np.ascontiguousarray(X, dtype="float64")
+    single = X[:single_rows]
+    batch = X[:BATCH_ROWS]
+    # folhas acumuladas até cada iteração (1 árvore por iteração no lambdarank)
+    leaves = np.cumsum([t["num_leaves"] for t in model.dump_model()["tree_info"]])
+    curve = []
+    for k in points or cut_points(used_iterations(model)):
+        m = rank_metrics(y, model.predict(X, num_iteration=k), offsets, k=10)
+        curve.append({
+            "num_iteration": k,
+            "num_leaves": int(leaves[k - 1]),
+            "ndcg@10": m["ndcg"],
+            "single_ms_p50": _p50_ms(lambda: model.predict(single, num_iteration=k, num_threads=1), SINGLE_REPEATS),
+            "single_rows": len(single),
+            "batch_ms_p50": _p50_ms(lambda: model.predict(batch, num_iteration=k), BATCH_REPEATS),
+            "batch_rows": len(batch),
+        })
+    return curve
+
+
+def choose_point(curve: List[Dict], tolerance: float, max_trees: int = 0, max_leaves: int = 0) -> Dict:
+    """
+    Menor corte com NDCG >= melhor NDCG - tolerance dentro dos orçamentos (0 = sem limite)
+    Se nenhum ponto couber no orçamento, fica o menor corte
+    """
+    ok = [p for p in curve
+          if (not max_trees or p["num_iteration"] <= max_trees)
+          and (not max_leaves or p["num_leaves"] <= max_leaves)]
+    if not ok:
+        return dict(curve[0])
+    best = max(p["ndcg@10"] for p in ok)
+    return dict(min((p for p in ok if p["ndcg@10"] >= best - tolerance), key=lambda p: p["num_iteration"]))
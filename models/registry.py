@@ -0,0 +1,135 @@
+"""
+Registro local de modelos versionados
+
+Layout (MODEL_REGISTRY_DIR):
+    <versão>/model.txt + model.meta.json   bundles publicados pelo treino
+    CURRENT                                versão servida pela API
+    PINNED                                 (opcional) versão fixada pelo admin
+
+Os ponteiros são trocados de forma atômica (arquivo temporário + os.replace).
+Enquanto houver PINNED, novas publicações entram no registro mas não mudam o
+CURRENT. Versões começam pela data de treino, então a ordem alfabética é a
+cronológica.
+
+Uso:
+    PYTHONPATH=. python -m models.registry list
+    PYTHONPATH=. python -m models.registry rollback
+"""
+import argparse
+import os
+import shutil
+from pathlib import Path
+from typing import List, Optional
+
+from models.bundle import manifest_path, read_manifest
+
+KEEP_VERSIONS = 10
+
+
+class ModelRegistry:
+    def __init__(self, root, keep: int = KEEP_VERSIONS):
+        self.root = Path(root)
+        self.keep = keep
+
+    def versions(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if (p / "model.txt").exists())
+
+    def model_path(self, version: str) -> Path:
+        return self.root / version / "model.txt"
+
+    def _read(self, name: str) -> Optional[str]:
+        try:
+            return (self.root / name).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _write(self, name: str, value: Optional[str]):
+        if value is None:
+            (self.root / name).unlink(missing_ok=True)
+            return
+        tmp = self.root / f"{name}.tmp"
+        tmp.write_text(value)
+        os.replace(tmp, self.root / name)
+
+    def current(self) -> Optional[str]:
+        version = self._read("CURRENT")
+        return version if version is not None and self.model_path(version).exists() else None
+
+    def pinned(self) -> Optional[str]:
+        return self._read("PINNED")
+
+    def _require(self, version: str):
+        if version not in self.versions():
+            raise KeyError(f"versão inexistente no registro: {version}")
+
+    def publish(self, model_path) -> str:
+        """Copia o bundle (modelo + manifesto) para o registro e o torna CURRENT, se não houver pin"""
+        manifest = read_manifest(model_path)
+        if manifest is None or "version" not in manifest:
+            raise ValueError(f"bundle sem manifesto: {model_path}")
+        version = manifest["version"]
+        dst = self.root / version
+        if not dst.exists():
+            tmp = self.root / f".{version}.tmp"
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir(parents=True)
+            shutil.copy2(model_path, tmp / "model.txt")
+            shutil.copy2(manifest_path(model_path), tmp / "model.meta.json")
+            os.replace(tmp, dst)
+        if self.pinned() is None:
+            self._write("CURRENT", version)
+        self._prune()
+        return version
+
+    def pin(self, version: str):
+        """Fixa a versão servida (publicações novas não a trocam)"""
+        self._require(version)
+        self._write("PINNED", version)
+        self._write("CURRENT", version)
+
+    def unpin(self):
+        """Remove o pin e volta a servir a versão mais recente"""
+        self._write("PINNED", None)
+        versions = self.versions()
+        if versions:
+            self._write("CURRENT", versions[-1])
+
+    def rollback(self) -> str:
+        """Fixa a versão anterior à atual"""
+        versions, cur = self.versions(), self.current()
+        i = versions.index(cur) if cur in versions else len(versions)
+        if i == 0:
+            raise KeyError("não há versão anterior para rollback")
+        self.pin(versions[i - 1])
+        return versions[i - 1]
+
+    def _prune(self):
+        # mantém as `keep` versões mais recentes, além da atual e da fixada
+        protected = {self.current(), self.pinned()}
+        versions = self.versions()
+        for v in versions[:max(0, len(versions) - self.keep)]:
+            if v not in protected:
+                shutil.rmtree(self.root / v, ignore_errors=True)
+
+    def status(self) -> dict:
+        return {"root": str(self.root), "current": self.current(), "pinned": self.pinned(),
+                "versions": self.versions()}
+
+
+if __name__ == "__main__":
+    from common.config import MODEL_REGISTRY_DIR
+
+    ap = argparse.ArgumentParser(description="Registro de modelos")
+    ap.add_argument("cmd", choices=["list", "pin", "unpin", "rollback"])
+    ap.add_argument("version", nargs="?")
+    args = ap.parse_args()
+    reg = ModelRegistry(MODEL_REGISTRY_DIR)
+    if args.cmd == "pin":
+        reg.pin(args.version)
+    elif args.cmd == "unpin":
+        reg.unpin()
+    elif args.cmd == "rollback":
+        reg.rollback()
+    print(reg.status())
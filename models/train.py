@@ -1,75 +1,160 @@
-import pandas as pd, numpy as np, lightgbm as lgb
-from common.config import FEATURES_TRAIN_PATH, FEATURES_VAL_PATH, MODEL_PATH
-from sklearn.metrics import ndcg_score
+import argparse, json, pandas as pd, numpy as np, lightgbm as lgb
+from common.config import FEATURES_TRAIN_PATH, FEATURES_VAL_PATH, MODEL_PATH, NON_FEATURE_COLS
+from common.config import TRAIN_WARM_START, TRAIN_WARM_START_ROUNDS, TRAIN_NDCG_TOLERANCE
+from common.config import MODEL_REGISTRY_DIR, CANDIDATES_TOPN, TRAIN_PRUNE_TOLERANCE, TRAIN_MAX_TREES, TRAIN_MAX_LEAVES
+from models.metrics import group_offsets, rank_metrics
+from models.pruning import choose_point, latency_curve, used_iterations
+from models.registry import ModelRegistry
+from models.bundle import data_fingerprint, feature_schema, file_sha256, manifest_path, read_manifest, write_bundle
 from pathlib import Path
 
-# Carrega
-tr = pd.read_parquet(FEATURES_TRAIN_PATH)
-va = pd.read_parquet(FEATURES_VAL_PATH)
-
-# ==== Baseline NDCG@10 (popularidade por recipe) ====
-pop = tr.groupby("recipe_id")["saves"].sum().sort_values(ascending=False)
-# Avaliação baseline: para cada user em val, rankear por pop
-def eval_baseline(val):
-    users = val["user_id"].unique()
-    y_true, y_score = [], []
-    for u in users:
-        du = val[val.user_id==u]
-        # y_true: 1 se du.label>0, caso contrário 0
-        y = du["label"].astype(int).to_numpy()
-        # score = popularidade do recipe (fallback 0)
-        s = du["recipe_id"].map(pop).fillna(0).to_numpy()
-        if len(y) >= 2:
-            y_true.append(y[np.newaxis, :])
-            y_score.append(s[np.newaxis, :])
-    if not y_true: return 0.0
-    return float(np.mean([ndcg_score(y_t, y_s, k=10) for y_t, y_s in zip(y_true, y_score)]))
-
-ndcg_base = eval_baseline(va)
-
-# ==== LightGBM LambdaMART ====
+PARAMS = dict(objective="lambdarank", metric="ndcg", ndcg_eval_at=[10],
+              learning_rate=0.05, num_leaves=63, min_data_in_leaf=50)
+
+# Carrega (arquivo único ou diretório de shards; ordenado por usuário para os grupos do ranking)
+def load_features():
+    tr = pd.read_parquet(FEATURES_TRAIN_PATH).sort_values(["user_id","recipe_id"], ignore_index=True)
+    va = pd.read_parquet(FEATURES_VAL_PATH).sort_values(["user_id","recipe_id"], ignore_index=True)
+    return tr, va
+
 # grupo por user para ranking
-def groups(df): return df.groupby("user_id").size().tolist()
+def groups(df): return np.diff(group_offsets(df["user_id"].to_numpy())).tolist()
 
-# features simples
-drop_cols = ["user_id","recipe_id","last_ts","label"]
-Xtr = tr.drop(columns=drop_cols)
-ytr = tr["label"]
+# features simples, em float32 (mesma representação da matriz de predict da API)
+def xy(df): return df.drop(columns=NON_FEATURE_COLS).astype("float32"), df["label"]
 
-Xva = va.drop(columns=drop_cols)
-yva = va["label"]
+def eval_baseline(tr, va):
+    """Baseline NDCG@10: popularidade (saves no treino) por recipe"""
+    pop = tr.groupby("recipe_id")["saves"].sum().sort_values(ascending=False)
+    # score = popularidade do recipe (fallback 0)
+    scores = va["recipe_id"].map(pop).fillna(0).to_numpy()
+    return rank_metrics(va["label"].to_numpy(), scores, group_offsets(va["user_id"].to_numpy()), k=10)
 
-params = dict(objective="lambdarank", metric="ndcg", ndcg_eval_at=[10],
-              learning_rate=0.05, num_leaves=63, min_data_in_leaf=50)
+def eval_model(va, scores):
+    return rank_metrics(va["label"].to_numpy(), scores, group_offsets(va["user_id"].to_numpy()), k=10)
+
+def train_full(params, tr, va):
+    Xtr, ytr = xy(tr)
+    Xva, yva = xy(va)
+    train_set = lgb.Dataset(Xtr, label=ytr, group=groups(tr))
+    val_set   = lgb.Dataset(Xva, label=yva, group=groups(va), reference=train_set)
+    return lgb.train(params, train_set, valid_sets=[val_set],
+                     num_boost_round=1000,
+                     callbacks=[lgb.early_stopping(50)])
+
+def warm_start(params, tr, va, rounds: int, tolerance: float):
+    """
+    Continua o modelo atual (init_model) com os usuários que tiveram eventos novos
+
+    Returns:
+        (modelo, info) ou (None, motivo) quando é preciso treinar do zero;
+        sem linhas novas, (modelo atual, info com new_rows=0): nada a treinar nem publicar
+    """
+    meta = read_manifest(MODEL_PATH)
+    if not Path(MODEL_PATH).exists() or meta is None:
+        return None, "sem modelo/metadados anteriores"
+    base = lgb.Booster(model_file=MODEL_PATH)
+    Xva, yva = xy(va)
+    if base.feature_name() != list(Xva.columns):
+        return None, "schema de features mudou"
+
+    # grupos completos dos usuários com atividade após o último treino
+    since = pd.Timestamp(meta["train_max_ts"])
+    users = tr.loc[tr["last_ts"] > since, "user_id"].unique()
+    new = tr[tr["user_id"].isin(users)]
+    if new.empty:
+        return base, {"base_sha256": file_sha256(MODEL_PATH), "new_rows": 0, "new_users": 0, "extra_rounds": 0}
+    base_ndcg = eval_model(va, base.predict(Xva))["ndcg"]
+
+    Xn, yn = xy(new)
+    new_set = lgb.Dataset(Xn, label=yn, group=groups(new))
+    val_set = lgb.Dataset(Xva, label=yva, group=groups(va), reference=new_set)
+    model = lgb.train(params, new_set, valid_sets=[val_set], num_boost_round=rounds,
+                      init_model=base, callbacks=[lgb.early_stopping(min(50, rounds))])
+    ndcg = eval_model(va, model.predict(Xva))["ndcg"]
+    if ndcg < base_ndcg - tolerance:
+        return None, f"NDCG@10 regrediu ({ndcg:.4f} < {base_ndcg:.4f} - {tolerance})"
+    return model, {"base_sha256": file_sha256(MODEL_PATH), "base_ndcg@10": base_ndcg,
+                   "new_rows": len(new), "new_users": len(users), "extra_rounds": model.current_iteration() - base.current_iteration()}
+
+def main():
+    ap = argparse.ArgumentParser(description="Treina o LambdaMART")
+    ap.add_argument("--params", help="JSON com hiperparâmetros (ex.: artifacts/tuning/best_params.json)")
+    ap.add_argument("--warm-start", action=argparse.BooleanOptionalAction, default=TRAIN_WARM_START,
+                    help="continua do modelo atual com as linhas novas (fallback: treino completo)")
+    ap.add_argument("--warm-rounds", type=int, default=TRAIN_WARM_START_ROUNDS)
+    ap.add_argument("--prune-tolerance", type=float, default=TRAIN_PRUNE_TOLERANCE,
+                    help="perda máxima de NDCG@10 aceita para podar iterações (negativo = não podar)")
+    ap.add_argument("--max-trees", type=int, default=TRAIN_MAX_TREES)
+    ap.add_argument("--max-leaves", type=int, default=TRAIN_MAX_LEAVES)
+    args = ap.parse_args()
+    params = dict(PARAMS)
+    if args.params:
+        with open(args.params) as f:
+            params.update(json.load(f))
+
+    tr, va = load_features()
+    metrics_base = eval_baseline(tr, va)
+
+    # ==== LightGBM LambdaMART ====
+    model, mode, info = None, "full", {}
+    if args.warm_start:
+        model, info = warm_start(params, tr, va, args.warm_rounds, TRAIN_NDCG_TOLERANCE)
+        if model is None:
+            print("warm start descartado:", info, "-> treino completo")
+            mode, info = "full_fallback", {"reason": info}
+        elif info["new_rows"] == 0:
+            # nenhum usuário com eventos após o último treino: bundle e registro ficam como estão
+            print(f"modo=noop | nenhuma linha nova desde {read_manifest(MODEL_PATH)['train_max_ts']}; "
+                  f"mantendo {MODEL_PATH} e o registro")
+            return
+        else:
+            mode = "warm_start"
+    if model is None:
+        model = train_full(params, tr, va)
+
+    # curva NDCG x latência por corte de iterações -> menor modelo dentro da tolerância
+    Xva = xy(va)[0].to_numpy(dtype="float64")
+    offsets = group_offsets(va["user_id"].to_numpy())
+    full_iters = used_iterations(model)
+    curve = latency_curve(model, Xva, va["label"].to_numpy(), offsets, CANDIDATES_TOPN)
+    if args.prune_tolerance < 0:
+        chosen = dict(curve[-1])
+    else:
+        chosen = choose_point(curve, args.prune_tolerance, args.max_trees, args.max_leaves)
+    num_iteration = chosen["num_iteration"]
+    print(f"{'iterações':>10} {'folhas':>8} {'NDCG@10':>8} {'1 req (ms)':>11} {'lote (ms)':>10}")
+    for p in curve:
+        mark = " <-" if p["num_iteration"] == num_iteration else ""
+        print(f"{p['num_iteration']:>10} {p['num_leaves']:>8} {p['ndcg@10']:>8.4f} {p['single_ms_p50']:>11.3f} {p['batch_ms_p50']:>10.3f}{mark}")
+
+    # avaliação NDCG@10 modelo
+    metrics_model = eval_model(va, model.predict(Xva, num_iteration=num_iteration))
+
+    print(f"NDCG@10 baseline={metrics_base['ndcg']:.3f} | model={metrics_model['ndcg']:.3f} | modo={mode}")
+    for name, m in (("baseline", metrics_base), ("model", metrics_model)):
+        print(f"  {name}: MAP@10={m['map']:.3f} | recall@10={m['recall']:.3f} | hit-rate@10={m['hit_rate']:.3f} | usuários={m['groups']}")
+
+    manifest = write_bundle(model, MODEL_PATH, {
+        "mode": mode, **info,
+        "trained_at": pd.Timestamp.now(tz="UTC").isoformat(),
+        "train_max_ts": tr["last_ts"].max().isoformat(),
+        "features": feature_schema(tr.drop(columns=NON_FEATURE_COLS)),
+        "matrix_dtype": "float32",
+        "data": {name: {"path": path, "rows": len(df), "sha256": data_fingerprint(path)}
+                 for name, path, df in (("train", FEATURES_TRAIN_PATH, tr), ("val", FEATURES_VAL_PATH, va))},
+        "num_trees": num_iteration,
+        "params": params,
+        "pruning": {"tolerance": args.prune_tolerance, "max_trees": args.max_trees, "max_leaves": args.max_leaves,
+                    "full_iterations": full_iters, "chosen": chosen, "curve": curve},
+        "metrics": {"model": metrics_model, "baseline": metrics_base},
+    }, num_iteration=num_iteration)
+    print("ok:", MODEL_PATH, manifest_path(MODEL_PATH), "| versão", manifest["version"])
 
-train_set = lgb.Dataset(Xtr, label=ytr, group=groups(tr))
-val_set   = lgb.Dataset(Xva, label=yva, group=groups(va), reference=train_set)
-
-model = lgb.train(params, train_set, valid_sets=[val_set],
-                  num_boost_round=1000,
-                  callbacks=[lgb.early_stopping(50)])
-
-# avaliação NDCG@10 modelo
-def eval_model(df, scores):
-    users = df["user_id"].unique()
-    ndcgs = []
-    start = 0
-    for g in groups(df):
-        end = start + g
-        seg = df.iloc[start:end]
-        y_true = seg["label"].to_numpy()[np.newaxis, :]
-        y_score = scores[start:end][np.newaxis, :]
-        if seg.shape[0] >= 2:
-            ndcgs.append(ndcg_score(y_true, y_score, k=10))
-        start = end
-    return float(np.mean(ndcgs)) if ndcgs else 0.0
-
-scores_val = model.predict(Xva)
-ndcg_model = eval_model(va, scores_val)
-
-print(f"NDCG@10 baseline={ndcg_base:.3f} | model={ndcg_model:.3f}")
-
-Path(MODEL_PATH).parent.mkdir(parents=True, exist_ok=True)
-model.save_model(MODEL_PATH)
-print("ok:", MODEL_PATH)
+    # publica no registro; a API troca de modelo ao ver o novo CURRENT (a menos que haja pin)
+    registry = ModelRegistry(MODEL_REGISTRY_DIR)
+    registry.publish(MODEL_PATH)
+    print("registro:", registry.status()["current"], "(fixada)" if registry.pinned() else "")
 
+if __name__ == "__main__":
+    main()
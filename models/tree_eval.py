@@ -0,0 +1,158 @@
+"""
+Avaliador das árvores do LightGBM em NumPy
+
+Para poucas centenas de linhas, o Booster.predict gasta a maior parte do
+tempo convertendo a entrada e gerenciando threads. Aqui o modelo (via
+`dump_model`) vira arrays planos por nó (feature, threshold, filhos, valor) e
+todas as árvores são percorridas juntas: a cada passo, cada par
+(linha, árvore) ainda ativo desce um nível e os que chegaram numa folha somam
+o valor dela ao score da linha e saem da lista.
+
+Regras de decisão iguais às do LightGBM (só splits numéricos):
+- missing_type None/Zero: NaN vira 0
+- missing_type Zero: |x| <= 1e-35 segue o lado default; NaN: NaN segue o default
+- caso contrário, x <= threshold vai para a esquerda
+
+Devolve o score bruto (soma das folhas), igual ao predict do lambdarank.
+"""
+import time
+from typing import List, Optional
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+ZERO_THRESHOLD = 1e-35
+MISSING = {"None": 0, "Zero": 1, "NaN": 2}
+# objetivos cujo predict é o score bruto (sem transformação de saída)
+RAW_OBJECTIVES = ("lambdarank", "rank_xendcg", "regression", "regression_l1", "huber", "fair", "quantile", "mape")
+# maior lote medido pelo "auto" (/recommendations/batch e micro-lotes chegam a milhares de linhas)
+AUTO_BATCH_ROWS = 10_000
+
+
+class TreeEnsemble:
+    """Árvores do modelo em arrays planos; `predict(X)` compatível com o Booster"""
+
+    def __init__(self, dump: dict):
+        objective = dump["objective"].split()[0]
+        if objective not in RAW_OBJECTIVES or dump["num_tree_per_iteration"] != 1 or dump.get("average_output"):
+            raise ValueError(f"objetivo não suportado pelo avaliador NumPy: {dump['objective']}")
+        self.feature_names: List[str] = dump["feature_names"]
+        feat, thr, left, right, default_left, missing, value, roots = [], [], [], [], [], [], [], []
+        depth = 0
+
+        def add(node, d):
+            nonlocal depth
+            i = len(feat)
+            for arr in (feat, thr, left, right, default_left, missing, value):
+                arr.append(0)
+            if "leaf_value" in node:
+                depth = max(depth, d)
+                thr[i], left[i], right[i], value[i] = np.inf, i, i, node["leaf_value"]
+                return i
+            if node["decision_type"] != "<=":
+                raise ValueError("splits categóricos não são suportados pelo avaliador NumPy")
+            feat[i], thr[i] = node["split_feature"], node["threshold"]
+            default_left[i], missing[i] = node["default_left"], MISSING[node["missing_type"]]
+            left[i] = add(node["left_child"], d + 1)
+            right[i] = add(node["right_child"], d + 1)
+            return i
+
+        for tree in dump["tree_info"]:
+            roots.append(add(tree["tree_structure"], 0))
+        self.feature = np.asarray(feat, dtype="int64")
+        self.threshold = np.asarray(thr, dtype="float64")
+        self.left = np.asarray(left, dtype="int64")
+        self.right = np.asarray(right, dtype="int64")
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.missing = np.asarray(missing, dtype="int8")
+        self.value = np.asarray(value, dtype="float64")
+        self.roots = np.asarray(roots, dtype="int64")
+        self.is_leaf = self.left == np.arange(len(self.left))
+        self.max_depth = depth
+        self.has_missing = bool((self.missing > 0).any())
+
+    @classmethod
+    def from_booster(cls, booster: lgb.Booster, num_iteration: Optional[int] = None) -> "TreeEnsemble":
+        return cls(booster.dump_model(num_iteration=num_iteration))
+
+    @classmethod
+    def from_model_file(cls, path: str) -> "TreeEnsemble":
+        return cls.from_booster(lgb.Booster(model_file=path))
+
+    def feature_name(self) -> List[str]:
+        return list(self.feature_names)
+
+    def num_trees(self) -> int:
+        return len(self.roots)
+
+    def predict(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            X = X.to_numpy(dtype="float64")
+        X = np.ascontiguousarray(X, dtype="float64")
+        n, n_feat = X.shape
+        out = np.zeros(n)
+        if n == 0 or len(self.roots) == 0:
+            return out
+        if not self.has_missing:
+            X = np.where(np.isnan(X), 0.0, X)
+        flat = X.ravel()
+        # pares (linha, árvore) ainda descendo; saem da lista ao chegar numa folha
+        row = np.repeat(np.arange(n, dtype="int64"), len(self.roots))
+        node = np.tile(self.roots, n)
+        done = self.is_leaf[node]
+        while True:
+            if done.any():
+                out += np.bincount(row[done], weights=self.value[node[done]], minlength=n)
+                keep = ~done
+                row, node = row[keep], node[keep]
+            if len(node) == 0:
+                return out
+            x = flat[row * n_feat + self.feature[node]]
+            go_left = x <= self.threshold[node]
+            if self.has_missing:
+                go_left = self._missing_rule(x, node, go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+            done = self.is_leaf[node]
+
+    def _missing_rule(self, x: np.ndarray, node: np.ndarray, go_left: np.ndarray) -> np.ndarray:
+        missing = self.missing[node]
+        nan = np.isnan(x)
+        x = np.where(nan & (missing != MISSING["NaN"]), 0.0, x)
+        use_default = ((missing == MISSING["Zero"]) & (np.abs(x) <= ZERO_THRESHOLD)) | ((missing == MISSING["NaN"]) & nan)
+        go_left = np.where(nan, x <= self.threshold[node], go_left)
+        return np.where(use_default, self.default_left[node], go_left)
+
+
+def _p50(fn, repeats: int = 30) -> float:
+    lat = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        lat.append(time.perf_counter() - t0)
+    return float(np.median(lat))
+
+
+def load_scorer(path: str, kind: str = "lightgbm", rows: int = 200):
+    """
+    Modelo para predict: "lightgbm" (Booster, padrão), "numpy" (TreeEnsemble) ou "auto"
+    auto: mede os dois em lotes de `rows` e de AUTO_BATCH_ROWS linhas e só usa o NumPy
+    se ele for mais rápido nos dois (compensa só em ensembles pequenos, ex.: modelo
+    podado com poucas árvores; com centenas de árvores o Booster vence)
+    """
+    booster = lgb.Booster(model_file=path)
+    if kind == "lightgbm":
+        return booster
+    try:
+        ens = TreeEnsemble.from_booster(booster)
+    except ValueError:
+        if kind == "numpy":
+            raise
+        return booster
+    if kind == "numpy":
+        return ens
+    X = np.random.default_rng(0).gamma(1.0, 3.0, size=(max(rows, AUTO_BATCH_ROWS), booster.num_feature())).round()
+    for n, repeats in ((rows, 30), (AUTO_BATCH_ROWS, 5)):
+        if _p50(lambda: ens.predict(X[:n]), repeats) >= _p50(lambda: booster.predict(X[:n]), repeats):
+            return booster
+    return ens
@@ -0,0 +1,178 @@
+"""
+Busca de hiperparâmetros do LambdaMART em paralelo
+
+Os Datasets de treino/validação são construídos (binning) uma única vez e
+gravados no formato binário do LightGBM em <out>/datasets/, reaproveitados
+enquanto os Parquet de features não mudarem. Cada tentativa roda num
+processo do pool com `--threads` threads do LightGBM.
+
+Estratégias:
+- random: N configurações sorteadas, cada uma com até --max-rounds iterações
+- halving (successive halving): N configurações com --min-rounds iterações;
+  a cada rodada fica o melhor 1/eta e o orçamento de iterações multiplica por eta
+
+Saída: <out>/leaderboard.csv (NDCG@10, tempo de treino e latência de predição
+por tentativa) e <out>/best_params.json (para `models/train.py --params`).
+
+Uso:
+    PYTHONPATH=. python models/tune.py --trials 32 --strategy halving --threads 2
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from common.config import CANDIDATES_TOPN, FEATURES_TRAIN_PATH, FEATURES_VAL_PATH, MODEL_PATH, NON_FEATURE_COLS
+from common.fs import file_signature
+from models.metrics import group_offsets, rank_metrics
+from models.train import PARAMS, groups, load_features, xy
+
+# (tipo, ...) -> amostragem em sample()
+SPACE = {
+    "num_leaves": ("choice", [15, 31, 63, 127, 255]),
+    "learning_rate": ("log", 0.01, 0.3),
+    "min_data_in_leaf": ("choice", [10, 20, 50, 100, 200]),
+    "feature_fraction": ("uniform", 0.6, 1.0),
+    "bagging_fraction": ("uniform", 0.6, 1.0),
+    "lambda_l2": ("log", 1e-3, 10.0),
+}
+# parâmetros fixados no binning (não podem variar entre tentativas)
+DATASET_PARAMS = dict(max_bin=255, feature_pre_filter=False, verbose=-1)
+LATENCY_REPEATS = 50
+
+
+def sample(rng: np.random.Generator) -> dict:
+    params = {}
+    for name, (kind, *args) in SPACE.items():
+        if kind == "choice":
+            params[name] = args[0][rng.integers(len(args[0]))]
+        elif kind == "log":
+            params[name] = float(math.exp(rng.uniform(math.log(args[0]), math.log(args[1]))))
+        else:
+            params[name] = float(rng.uniform(*args))
+    params = {k: (int(v) if isinstance(v, np.integer) else v) for k, v in params.items()}
+    params["bagging_freq"] = 1  # sem ele o bagging_fraction é ignorado
+    return params
+
+
+def build_datasets(out: Path) -> Path:
+    """Binários do LightGBM + arrays de validação; reconstruídos só se as features mudarem"""
+    d = out / "datasets"
+    sig = json.loads(json.dumps({
+        "train": file_signature(FEATURES_TRAIN_PATH), "val": file_signature(FEATURES_VAL_PATH),
+        "dataset_params": DATASET_PARAMS, "non_feature_cols": NON_FEATURE_COLS,
+    }))
+    meta = d / "meta.json"
+    if meta.exists() and json.loads(meta.read_text()) == sig:
+        print("datasets: reaproveitando", d)
+        return d
+
+    t0 = time.perf_counter()
+    d.mkdir(parents=True, exist_ok=True)
+    meta.unlink(missing_ok=True)
+    tr, va = load_features()
+    Xtr, ytr = xy(tr)
+    Xva, yva = xy(va)
+    train_set = lgb.Dataset(Xtr, label=ytr, group=groups(tr), params=DATASET_PARAMS)
+    val_set = lgb.Dataset(Xva, label=yva, group=groups(va), reference=train_set, params=DATASET_PARAMS)
+    for f in ("train.bin", "val.bin"):
+        (d / f).unlink(missing_ok=True)  # save_binary não sobrescreve
+    train_set.save_binary(str(d / "train.bin"))
+    val_set.save_binary(str(d / "val.bin"))
+    # predição/avaliação precisam das features brutas de validação
+    np.save(d / "X_val.npy", Xva.to_numpy(dtype="float64"))
+    np.save(d / "y_val.npy", yva.to_numpy())
+    np.save(d / "offsets_val.npy", group_offsets(va["user_id"].to_numpy()))
+    meta.write_text(json.dumps(sig))
+    print(f"datasets: construídos em {time.perf_counter() - t0:.1f}s -> {d}")
+    return d
+
+
+def run_trial(task) -> dict:
+    trial, params, rounds, d, threads = task
+    d = Path(d)
+    train_set = lgb.Dataset(str(d / "train.bin"), params=DATASET_PARAMS)
+    val_set = lgb.Dataset(str(d / "val.bin"), reference=train_set, params=DATASET_PARAMS)
+    p = {**PARAMS, **params, "num_threads": threads, "verbose": -1}
+
+    t0 = time.perf_counter()
+    model = lgb.train(p, train_set, num_boost_round=rounds, valid_sets=[val_set],
+                      callbacks=[lgb.early_stopping(50, verbose=False)])
+    train_s = time.perf_counter() - t0
+
+    X = np.load(d / "X_val.npy", mmap_mode="r")
+    m = rank_metrics(np.load(d / "y_val.npy"), model.predict(X, num_threads=threads),
+                     np.load(d / "offsets_val.npy"), k=10)
+    # latência de um request típico: CANDIDATES_TOPN candidatos, 1 thread
+    batch = np.ascontiguousarray(X[:CANDIDATES_TOPN])
+    lat = []
+    for _ in range(LATENCY_REPEATS):
+        t0 = time.perf_counter()
+        model.predict(batch, num_threads=1)
+        lat.append(time.perf_counter() - t0)
+    return {
+        "trial": trial, "rounds": rounds, "best_iteration": model.best_iteration,
+        "ndcg@10": m["ndcg"], "map@10": m["map"], "recall@10": m["recall"],
+        "train_s": round(train_s, 3), "predict_ms_p50": round(float(np.median(lat)) * 1000, 3),
+        **params,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Busca de hiperparâmetros (LambdaMART)")
+    ap.add_argument("--strategy", choices=["random", "halving"], default="halving")
+    ap.add_argument("--trials", type=int, default=16, help="configurações sorteadas")
+    ap.add_argument("--threads", type=int, default=1, help="threads do LightGBM por tentativa")
+    ap.add_argument("--workers", type=int, default=0, help="processos (0 = núcleos / threads)")
+    ap.add_argument("--min-rounds", type=int, default=50, help="halving: iterações da primeira rodada")
+    ap.add_argument("--max-rounds", type=int, default=1000)
+    ap.add_argument("--eta", type=int, default=3, help="halving: fator de corte/aumento por rodada")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default=str(Path(MODEL_PATH).parent / "tuning"))
+    args = ap.parse_args()
+
+    out = Path(args.out)
+    d = build_datasets(out)
+    rng = np.random.default_rng(args.seed)
+    configs = {i: sample(rng) for i in range(args.trials)}
+    workers = args.workers or max(1, (os.cpu_count() or 1) // args.threads)
+
+    rows = []
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        alive = list(configs)
+        rounds = args.max_rounds if args.strategy == "random" else args.min_rounds
+        rung = 0
+        while alive:
+            tasks = [(i, configs[i], rounds, str(d), args.threads) for i in alive]
+            results = list(pool.map(run_trial, tasks))
+            for r in results:
+                r["rung"] = rung
+            rows += results
+            best = sorted(results, key=lambda r: -r["ndcg@10"])
+            print(f"rodada {rung}: {len(alive)} configs x {rounds} iterações | melhor NDCG@10={best[0]['ndcg@10']:.4f}")
+            if args.strategy == "random" or len(alive) == 1 or rounds >= args.max_rounds:
+                break
+            alive = [r["trial"] for r in best[:max(1, len(alive) // args.eta)]]
+            rounds = min(args.max_rounds, rounds * args.eta)
+            rung += 1
+
+    board = pd.DataFrame(rows).sort_values(["rung", "ndcg@10", "predict_ms_p50"], ascending=[False, False, True])
+    out.mkdir(parents=True, exist_ok=True)
+    board.to_csv(out / "leaderboard.csv", index=False)
+    best = configs[int(board.iloc[0]["trial"])]
+    (out / "best_params.json").write_text(json.dumps(best, indent=2))
+    print(board.head(10).to_string(index=False))
+    print(f"{len(rows)} tentativas em {time.perf_counter() - t0:.1f}s ({workers} processos x {args.threads} threads)")
+    print("ok:", out / "leaderboard.csv", out / "best_params.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Motor de features User×Recipe
+
+As features são declaradas uma vez (EVENT_AGGS, LATEST, LEVELS) e calculadas
+juntas num único groupby vetorizado sobre chaves inteiras (factorize), sem
+lambdas nem .apply por linha. Cada evento vira um parcial unitário e o mesmo
+`reduce` serve para agregar um bloco e para fundir parciais, o que mantém o
+pipeline em streaming e incremental.
+
+O grão dos parciais é User×Recipe×sessão: as sessões distintas saem da
+contagem de linhas no `finalize`. Sem session_id, a sessão é o dia (UTC).
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from common.config import SEGMENT_COLS
+
+KEYS = ["user_id", "recipe_id"]
+GRAIN = KEYS + ["session"]
+# colunas lidas dos eventos
+COLUMNS = ["event_time", "user_id", "recipe_id", "event_name", "session_id"] + SEGMENT_COLS
+# layout Arrow desses eventos quando guardados em disco (estado incremental, shards)
+EVENTS_SCHEMA = pa.schema([(c, pa.timestamp("us", tz="UTC") if c == "event_time" else pa.string()) for c in COLUMNS])
+
+
+@dataclass(frozen=True)
+class Agg:
+    """Agregado por evento; `op` (sum | min | max) vale no bloco e na fusão"""
+    name: str
+    op: str
+    event: Optional[str] = None  # sum: conta só eventos desse tipo
+
+    def values(self, ev: pd.DataFrame) -> pd.Series:
+        if self.event is not None:
+            return (ev["event_name"] == self.event).astype("int64")
+        return ev["event_time"]
+
+
+@dataclass(frozen=True)
+class Level:
+    """Agregados por usuário ou por receita sobre a tabela User×Recipe"""
+    prefix: str
+    key: str
+    distinct: str  # nº de chaves distintas do outro lado (receitas do usuário / usuários da receita)
+
+
+EVENT_AGGS = (
+    Agg("views", "sum", event="recipe_view"),
+    Agg("saves", "sum", event="save_recipe"),
+    Agg("first_ts", "min"),
+    Agg("last_ts", "max"),
+)
+# último valor não nulo pelo event_time (guardado com seu timestamp em <col>_ts)
+LATEST = tuple(SEGMENT_COLS)
+LEVELS = (Level("user", "user_id", "user_recipes"), Level("recipe", "recipe_id", "recipe_users"))
+LEVEL_SUMS = ("views", "saves")
+
+AGG_COLS = [a.name for a in EVENT_AGGS]
+PARTIAL_COLS = GRAIN + AGG_COLS + [c for col in LATEST for c in (col, col + "_ts")]
+FEATURE_COLS = (
+    KEYS + AGG_COLS + list(LATEST) + ["sessions", "recency_days", "conv"]
+    + [f"{lv.prefix}_{s}" for lv in LEVELS for s in LEVEL_SUMS + ("conv",)]
+    + [lv.distinct for lv in LEVELS] + ["label"]
+)
+# colunas de nível (iguais em todas as linhas do mesmo usuário / da mesma receita)
+LEVEL_COLS = {lv.prefix: [f"{lv.prefix}_{s}" for s in LEVEL_SUMS + ("conv",)] + [lv.distinct] for lv in LEVELS}
+# par User×Recipe sem interação (candidato de retrieval): contagens zeradas, recência indefinida
+UNSEEN_PAIR = {"recency_days": np.nan}
+
+
+def _naive(ts: pd.Series) -> pd.Series:
+    """Timestamps tz-aware -> naive em UTC (arrays datetime64 em vez de objetos)"""
+    return ts.dt.tz_convert("UTC").dt.tz_localize(None) if ts.dt.tz is not None else ts
+
+
+def session_key(ev: pd.DataFrame) -> pd.Series:
+    """session_id; sem ele, o dia do evento ("d:<dias desde a época>")"""
+    s = ev["session_id"].astype("str") if "session_id" in ev else pd.Series(pd.NA, index=ev.index, dtype="str")
+    missing = s.isna()
+    if missing.any():
+        days = _naive(ev.loc[missing, "event_time"]).to_numpy().astype("datetime64[D]").astype("int64")
+        s = s.copy()
+        s[missing] = "d:" + pd.Series(days, index=s.index[missing]).astype("str")
+    return s
+
+
+def to_units(ev: pd.DataFrame) -> pd.DataFrame:
+    """Eventos -> parciais unitários (um por evento)"""
+    out = {c: ev[c] for c in KEYS}
+    out["session"] = session_key(ev)
+    for a in EVENT_AGGS:
+        out[a.name] = a.values(ev)
+    for c in LATEST:
+        out[c] = ev[c]
+        out[c + "_ts"] = ev["event_time"].where(ev[c].notna())
+    return pd.DataFrame(out, index=ev.index).reset_index(drop=True)
+
+
+def group_codes(df: pd.DataFrame, cols: List[str]) -> np.ndarray:
+    """Código inteiro do grupo (0..n-1, na ordem de primeira aparição)"""
+    if len(df) == 0:
+        return np.zeros(0, dtype="int64")
+    codes = None
+    for c in cols:
+        k = pd.factorize(df[c], use_na_sentinel=False)[0].astype("int64")
+        if codes is not None:
+            k = pd.factorize(codes * (k.max() + 1) + k)[0].astype("int64")
+        codes = k
+    return codes if codes is not None else np.zeros(len(df), dtype="int64")
+
+
+def _latest(df: pd.DataFrame, codes: np.ndarray, n: int, col: str) -> pd.DataFrame:
+    """Valor não nulo mais recente de `col` por grupo (empate: o último na ordem de leitura)"""
+    ts = df[col + "_ts"]
+    rows = np.flatnonzero(df[col].notna().to_numpy() & ts.notna().to_numpy())
+    rows = rows[np.argsort(_naive(ts).to_numpy()[rows], kind="stable")]
+    idx = np.full(n, -1, dtype="int64")
+    if len(rows):
+        # última ocorrência de cada grupo na ordem temporal
+        groups, pos = np.unique(codes[rows][::-1], return_index=True)
+        idx[groups] = rows[::-1][pos]
+    return pd.DataFrame({col: df[col].array.take(idx, allow_fill=True),
+                         col + "_ts": ts.array.take(idx, allow_fill=True)})
+
+
+def reduce(df: pd.DataFrame, grain: List[str] = GRAIN) -> pd.DataFrame:
+    """Agrega parciais (ou unidades) no grão pedido numa passada agrupada"""
+    codes = group_codes(df, grain)
+    n = int(codes.max()) + 1 if len(codes) else 0
+    _, first = np.unique(codes, return_index=True)
+    keys = df[grain].iloc[first].reset_index(drop=True)
+    aggs = df[AGG_COLS].groupby(codes, sort=True).agg({a.name: a.op for a in EVENT_AGGS}).reset_index(drop=True)
+    parts = [keys, aggs] + [_latest(df, codes, n, c) for c in LATEST]
+    return pd.concat(parts, axis=1)
+
+
+def chunk_partial(ev: pd.DataFrame) -> pd.DataFrame:
+    return reduce(to_units(ev))
+
+
+def merge_partials(parts: list) -> pd.DataFrame:
+    """Junta parciais (na ordem de leitura) num único parcial"""
+    if len(parts) == 1:
+        return parts[0]
+    return reduce(pd.concat(parts, ignore_index=True))
+
+
+def empty_partial() -> pd.DataFrame:
+    cols = {c: pd.Series(dtype="str") for c in GRAIN + list(LATEST)}
+    cols.update({c: pd.Series(dtype="int64") for c in ("views", "saves")})
+    cols.update({c: pd.Series(dtype="datetime64[us, UTC]") for c in PARTIAL_COLS if c.endswith("_ts")})
+    return pd.DataFrame(cols)[PARTIAL_COLS]
+
+
+def base_features(partial: Optional[pd.DataFrame], period_end: pd.Timestamp) -> pd.DataFrame:
+    """Parcial -> features User×Recipe (sem os agregados por nível), ordenadas pelas chaves"""
+    if partial is None:
+        partial = empty_partial()
+    f = reduce(partial, KEYS)
+    f["sessions"] = np.bincount(group_codes(partial, KEYS), minlength=len(f)).astype("int64")
+    f = f.sort_values(KEYS, kind="stable").reset_index(drop=True)
+    f["recency_days"] = (period_end - f["last_ts"]).dt.total_seconds() / 86_400
+    f["conv"] = f["saves"] / f["views"].clip(lower=1)
+    return f
+
+
+def level_stats(f: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Somas por usuário/receita (somáveis entre partes disjuntas da tabela User×Recipe)"""
+    out = {}
+    for lv in LEVELS:
+        g = f.groupby(lv.key, sort=False)
+        st = g[list(LEVEL_SUMS)].sum()
+        st["n"] = g.size()
+        out[lv.prefix] = st
+    return out
+
+
+def combine_level_stats(parts: List[Dict[str, pd.DataFrame]]) -> Dict[str, pd.DataFrame]:
+    return {lv.prefix: pd.concat([p[lv.prefix] for p in parts]).groupby(level=0, sort=False).sum()
+            for lv in LEVELS}
+
+
+def add_levels(f: pd.DataFrame, stats: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Completa a tabela com os agregados por nível e o label"""
+    for lv in LEVELS:
+        st = stats[lv.prefix].reindex(f[lv.key])
+        for s in LEVEL_SUMS:
+            f[f"{lv.prefix}_{s}"] = st[s].to_numpy(dtype="int64")
+        f[f"{lv.prefix}_conv"] = f[f"{lv.prefix}_saves"] / f[f"{lv.prefix}_views"].clip(lower=1)
+        f[lv.distinct] = st["n"].to_numpy(dtype="int64")
+    # label = houve save no período
+    f["label"] = (f["saves"] > 0).astype("int64")
+    return f[FEATURE_COLS]
+
+
+def finalize(partial: Optional[pd.DataFrame], period_end: pd.Timestamp) -> pd.DataFrame:
+    """
+    Parcial -> tabela de features, ordenada por User×Recipe
+
+    Args:
+        partial: parcial no grão GRAIN (None = período sem eventos)
+        period_end: fim do período (base da recência)
+    """
+    f = base_features(partial, period_end)
+    return add_levels(f, level_stats(f))
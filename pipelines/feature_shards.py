@@ -0,0 +1,122 @@
+"""
+Pipeline de features em paralelo, particionado por hash do user_id
+
+map:    cada processo lê um intervalo de bytes do NDJSON (o event store entra
+        numa tarefa única), guarda o event_time máximo e espalha os eventos
+        em N shards por hash(user_id)
+corte:  tmax global -> mesmo corte temporal da execução serial
+reduce: cada processo agrega um shard (treino/validação) e devolve as somas
+        por usuário/receita; com as somas globais, cada shard completa os
+        agregados por nível e grava seu Parquet (part-NNNNN.parquet)
+
+Como cada usuário cai em um único shard, as linhas saem idênticas às da
+execução serial; só a ordem entre shards muda (leitores ordenam por chave).
+"""
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from common.config import DATA_EVENTS_PATH, FEATURES_TRAIN_PATH, FEATURES_VAL_PATH
+from common.event_store import iter_event_chunks, line_ranges
+from common.recipe_ids import load_recipe_map
+from pipelines.feature_engine import COLUMNS, EVENTS_SCHEMA, add_levels, base_features, combine_level_stats, level_stats
+from pipelines.feature_state import JsonlSource, event_source
+from pipelines.features import RunningAggregate, _max_time, _split, replace_path
+
+
+def shard_of(user_ids: pd.Series, n: int) -> np.ndarray:
+    """Shard de cada evento (hash estável entre processos e execuções)"""
+    return (pd.util.hash_pandas_object(user_ids, index=False).to_numpy() % np.uint64(n)).astype("int64")
+
+
+def _map(task):
+    m, rng, path, n, spill, chunk_bytes = task
+    if rng is not None:
+        chunks = iter_event_chunks(COLUMNS, chunk_bytes, path, rng[0], rng[1])
+    else:
+        chunks = event_source().chunks(COLUMNS, chunk_bytes)
+    writers, tmax, events = {}, None, 0
+    rmap = load_recipe_map()
+    try:
+        for ch in chunks:
+            events += len(ch)
+            if rmap is not None:
+                rmap.apply(ch)
+            tmax = _max_time([ch], tmax)
+            shard = shard_of(ch["user_id"], n)
+            for s in np.unique(shard):
+                if s not in writers:
+                    d = Path(spill) / f"shard-{s:05d}"
+                    d.mkdir(parents=True, exist_ok=True)
+                    writers[s] = pq.ParquetWriter(d / f"map-{m:05d}.parquet", EVENTS_SCHEMA)
+                part = ch[shard == s]
+                writers[s].write_table(pa.Table.from_pandas(part, schema=EVENTS_SCHEMA, preserve_index=False))
+    finally:
+        for w in writers.values():
+            w.close()
+    return tmax, events
+
+
+def _reduce(task):
+    s, spill, cut, tmax, batch_rows = task
+    train, val = RunningAggregate(), RunningAggregate()
+    # arquivos na ordem dos intervalos = ordem de leitura da execução serial
+    for f in sorted((Path(spill) / f"shard-{s:05d}").glob("map-*.parquet")):
+        for batch in pq.ParquetFile(f).iter_batches(batch_size=batch_rows):
+            _split(batch.to_pandas(), cut, train, val)
+    ftrain, fval = base_features(train.result(), cut), base_features(val.result(), tmax)
+    ftrain.to_parquet(Path(spill) / f"base-train-{s:05d}.parquet", index=False)
+    fval.to_parquet(Path(spill) / f"base-val-{s:05d}.parquet", index=False)
+    return level_stats(ftrain), level_stats(fval)
+
+
+def _finish(task):
+    s, spill, name, stats, out = task
+    f = pd.read_parquet(Path(spill) / f"base-{name}-{s:05d}.parquet")
+    add_levels(f, stats).to_parquet(Path(out) / f"part-{s:05d}.parquet", index=False)
+
+
+def build_features_sharded(workers: int, chunk_bytes: int):
+    """
+    Gera FEATURES_TRAIN_PATH/FEATURES_VAL_PATH como diretórios de Parquet (um por shard)
+    Não altera o estado incremental (equivale a um --full)
+    """
+    batch_rows = max(1024, chunk_bytes // 200)
+    source = event_source()
+    if isinstance(source, JsonlSource):
+        tasks = [(m, rng, source.path) for m, rng in enumerate(line_ranges(source.path, workers, source.end))]
+    else:
+        tasks = [(0, None, None)]
+    out_dir = Path(FEATURES_TRAIN_PATH).parent
+    out_dir.mkdir(parents=True, exist_ok=True)
+    spill = tempfile.mkdtemp(prefix="feat-shards-", dir=out_dir)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            mapped = list(pool.map(_map, [(m, rng, path, workers, spill, chunk_bytes) for m, rng, path in tasks]))
+            tmax = max((t for t, _ in mapped if t is not None), default=None)
+            if tmax is None:
+                raise SystemExit(f"Nenhum evento encontrado em {DATA_EVENTS_PATH}")
+            cut = tmax - pd.Timedelta(days=2)
+
+            shards = sorted(int(p.name.split("-")[1]) for p in Path(spill).glob("shard-*"))
+            reduced = list(pool.map(_reduce, [(s, spill, cut, tmax, batch_rows) for s in shards]))
+            stats = {"train": combine_level_stats([r[0] for r in reduced]),
+                     "val": combine_level_stats([r[1] for r in reduced])}
+
+            outs = {"train": Path(FEATURES_TRAIN_PATH), "val": Path(FEATURES_VAL_PATH)}
+            tmp = {name: Path(spill) / f"out-{name}" for name in outs}
+            for d in tmp.values():
+                d.mkdir()
+            list(pool.map(_finish, [(s, spill, name, stats[name], tmp[name]) for name in outs for s in shards]))
+        for name, dst in outs.items():
+            replace_path(tmp[name], dst)
+    finally:
+        shutil.rmtree(spill, ignore_errors=True)
+    return {"events": sum(e for _, e in mapped), "cut": cut, "chunk_bytes": chunk_bytes,
+            "mode": f"full, {workers} processos", "shards": len(shards)}
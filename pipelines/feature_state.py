@@ -0,0 +1,163 @@
+"""
+Estado persistido do pipeline incremental de features
+
+Cada execução grava uma geração nova em FEATURES_STATE_DIR/gen-NNNNNN/:
+- settled.parquet: parciais User×Recipe já consolidados no treino (event_time <= corte)
+- recent.parquet: eventos (colunas projetadas) acima do corte, na ordem de leitura
+- watermark.json: até onde a fonte já foi consumida (offset do NDJSON ou event_time do store)
+e só então troca o ponteiro CURRENT, de forma atômica.
+"""
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from common.event_store import get_event_store, iter_event_chunks, last_complete_offset
+
+
+class JsonlSource:
+    """NDJSON legado; posição = offset em bytes da última linha completa lida"""
+    kind = "jsonl"
+
+    def __init__(self, path: str):
+        self.path = path
+        # fotografia do fim do arquivo: os dois passos leem exatamente o mesmo intervalo
+        self.end = last_complete_offset(path)
+
+    def _check(self, offset: int) -> str:
+        """Hash dos bytes que antecedem o offset (detecta arquivo reescrito)"""
+        with open(self.path, "rb") as f:
+            f.seek(max(0, offset - 4096))
+            return hashlib.md5(f.read(min(offset, 4096))).hexdigest()
+
+    def chunks(self, columns: List[str], chunk_bytes: int, after: Optional[dict] = None,
+               upto=None) -> Iterator[pd.DataFrame]:
+        start = after["offset"] if after else 0
+        return iter_event_chunks(columns, chunk_bytes, self.path, start, self.end)
+
+    def watermark(self) -> dict:
+        return {"kind": self.kind, "path": os.path.abspath(self.path),
+                "inode": os.stat(self.path).st_ino, "offset": self.end, "check": self._check(self.end)}
+
+    def valid(self, wm: dict) -> bool:
+        if wm.get("kind") != self.kind or wm.get("path") != os.path.abspath(self.path):
+            return False
+        if not Path(self.path).exists():
+            return False
+        st = os.stat(self.path)
+        return (st.st_ino == wm["inode"] and self.end >= wm["offset"]
+                and self._check(wm["offset"]) == wm["check"])
+
+
+class StoreSource:
+    """
+    Event store particionado; posição = maior event_time consumido
+    Eventos que chegarem atrasados (event_time <= watermark) só entram num --full
+    """
+    kind = "store"
+
+    def __init__(self, store):
+        self.store = store
+
+    def chunks(self, columns: List[str], chunk_bytes: int, after: Optional[dict] = None,
+               upto=None) -> Iterator[pd.DataFrame]:
+        start = pd.Timestamp(after["tmax"]) if after else None
+        for df in self.store.iter_batches(columns, start=start, end=upto,
+                                          batch_rows=max(1024, chunk_bytes // 200)):
+            if start is not None:
+                df = df[df["event_time"] > start]
+            yield df
+
+    def watermark(self) -> dict:
+        return {"kind": self.kind, "root": os.path.abspath(self.store.root)}
+
+    def valid(self, wm: dict) -> bool:
+        return wm.get("kind") == self.kind and wm.get("root") == os.path.abspath(self.store.root)
+
+
+def event_source():
+    """Fonte de eventos configurada (event store ou DATA_EVENTS_PATH)"""
+    from common.config import DATA_EVENTS_PATH
+    store = get_event_store()
+    return StoreSource(store) if store is not None else JsonlSource(DATA_EVENTS_PATH)
+
+
+class Generation:
+    """Geração em construção; só fica visível após commit()"""
+
+    def __init__(self, state: "FeatureState", path: Path, schema: pa.Schema):
+        self.state, self.path, self.schema = state, path, schema
+        self._writer: Optional[pq.ParquetWriter] = None
+        path.mkdir(parents=True, exist_ok=True)
+
+    def write_recent(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path / "recent.parquet", self.schema)
+        self._writer.write_table(pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+
+    def commit(self, settled: Optional[pd.DataFrame], watermark: dict):
+        if self._writer is not None:
+            self._writer.close()
+        if settled is not None:
+            settled.to_parquet(self.path / "settled.parquet", index=False)
+        with open(self.path / "watermark.json", "w") as f:
+            json.dump(watermark, f, indent=2, default=str)
+        self.state._publish(self.path.name)
+
+
+class FeatureState:
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _current(self) -> Optional[Path]:
+        try:
+            name = (self.root / "CURRENT").read_text().strip()
+        except FileNotFoundError:
+            return None
+        path = self.root / name
+        return path if path.exists() else None
+
+    def watermark(self) -> Optional[dict]:
+        cur = self._current()
+        if cur is None:
+            return None
+        with open(cur / "watermark.json") as f:
+            return json.load(f)
+
+    def settled(self) -> Optional[pd.DataFrame]:
+        cur = self._current()
+        if cur is None or not (cur / "settled.parquet").exists():
+            return None
+        return pd.read_parquet(cur / "settled.parquet")
+
+    def recent_chunks(self, batch_rows: int) -> Iterator[pd.DataFrame]:
+        cur = self._current()
+        if cur is None or not (cur / "recent.parquet").exists():
+            return
+        for batch in pq.ParquetFile(cur / "recent.parquet").iter_batches(batch_size=batch_rows):
+            yield batch.to_pandas()
+
+    def new_generation(self, schema: pa.Schema) -> Generation:
+        cur = self._current()
+        n = int(cur.name.split("-")[1]) + 1 if cur is not None else 1
+        path = self.root / f"gen-{n:06d}"
+        if path.exists():
+            shutil.rmtree(path)
+        return Generation(self, path, schema)
+
+    def _publish(self, name: str):
+        tmp = self.root / "CURRENT.tmp"
+        tmp.write_text(name)
+        os.replace(tmp, self.root / "CURRENT")
+        # gerações antigas não são mais necessárias
+        for p in self.root.glob("gen-*"):
+            if p.name != name:
+                shutil.rmtree(p, ignore_errors=True)
@@ -1,50 +1,158 @@
-import json, pandas as pd
+import argparse, os, shutil, sys, time, pandas as pd
 from pathlib import Path
-from common.config import DATA_EVENTS_PATH, FEATURES_TRAIN_PATH, FEATURES_VAL_PATH
-from datetime import datetime
-
-# 1) Carrega eventos NDJSON
-rows = []
-with open(DATA_EVENTS_PATH) as f:
-    for line in f:
-        rows.append(json.loads(line))
-df = pd.DataFrame(rows)
-df["event_time"] = pd.to_datetime(df["event_time"])
-
-# 2) Split temporal simples (últimos 2 dias = validação)
-cut = df["event_time"].max() - pd.Timedelta(days=2)
-train = df[df["event_time"] <= cut].copy()
-val   = df[df["event_time"]  > cut].copy()
-
-# 3) Labels (save_recipe = 1; view = 0)
-def to_label(x): return 1 if x == "save_recipe" else 0
-train["label"] = train["event_name"].apply(to_label)
-val["label"]   = val["event_name"].apply(to_label)
-
-# 4) Agregações mínimas User×Recipe (KISS)
-def build_feats(dd):
-    grp = dd.groupby(["user_id","recipe_id"])
-    out = grp.agg(
-        views=("event_name", lambda s: (s=="recipe_view").sum()),
-        saves=("event_name", lambda s: (s=="save_recipe").sum()),
-        last_ts=("event_time","max")
-    ).reset_index()
-    out["conv"] = out["saves"] / out["views"].clip(lower=1)
-    return out
-
-ftrain = build_feats(train)
-fval   = build_feats(val)
-
-# 5) Juntar label recente (se houve save)
-lbl = train.groupby(["user_id","recipe_id"])["label"].max().reset_index()
-ftrain = ftrain.merge(lbl, on=["user_id","recipe_id"], how="left").fillna({"label":0})
-
-lblv = val.groupby(["user_id","recipe_id"])["label"].max().reset_index()
-fval = fval.merge(lblv, on=["user_id","recipe_id"], how="left").fillna({"label":0})
-
-# 6) Salva Parquet
-Path(FEATURES_TRAIN_PATH).parent.mkdir(parents=True, exist_ok=True)
-ftrain.to_parquet(FEATURES_TRAIN_PATH, index=False)
-fval.to_parquet(FEATURES_VAL_PATH, index=False)
-print("ok: features ->", FEATURES_TRAIN_PATH, FEATURES_VAL_PATH)
+from common.config import DATA_EVENTS_PATH, FEATURES_TRAIN_PATH, FEATURES_VAL_PATH, FEATURES_MEMORY_MB, FEATURES_STATE_DIR, FEATURES_WORKERS
+from pipelines.feature_engine import COLUMNS, EVENTS_SCHEMA, PARTIAL_COLS, chunk_partial, merge_partials, finalize
+from pipelines.feature_state import FeatureState, event_source
+from common.recipe_ids import load_recipe_map
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def peak_rss_mb() -> float:
+    """Pico de memória residente do processo (MB)"""
+    if resource is None:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+def replace_path(tmp: Path, dst: Path):
+    """Troca o destino (arquivo ou diretório de shards) pelo recém-gravado"""
+    old = None
+    if dst.is_dir() or (dst.exists() and tmp.is_dir()):
+        old = dst.with_name(dst.name + ".old")
+        if old.is_dir():
+            shutil.rmtree(old)
+        os.replace(dst, old)
+    os.replace(tmp, dst)
+    if old is not None:
+        shutil.rmtree(old) if old.is_dir() else old.unlink()
+
+def write_features(df: pd.DataFrame, path: str):
+    tmp = Path(path).with_name(Path(path).name + ".tmp")
+    df.to_parquet(tmp, index=False)
+    replace_path(tmp, Path(path))
+
+# ==== Agregação em streaming (parciais definidos em pipelines/feature_engine.py) ====
+class RunningAggregate:
+    """Acumula parciais e compacta quando o pendente passa do tamanho já consolidado"""
+    def __init__(self, min_rows: int = 100_000):
+        self.merged, self.pending, self.pending_rows, self.min_rows = None, [], 0, min_rows
+
+    def add(self, part: pd.DataFrame):
+        self.pending.append(part)
+        self.pending_rows += len(part)
+        if self.pending_rows >= max(self.min_rows, 0 if self.merged is None else len(self.merged)):
+            self._compact()
+
+    def _compact(self):
+        parts = ([self.merged] if self.merged is not None else []) + self.pending
+        if parts:
+            self.merged = merge_partials(parts)
+        self.pending, self.pending_rows = [], 0
+
+    def result(self):
+        self._compact()
+        return self.merged
+
+def _split(ch: pd.DataFrame, cut, train: RunningAggregate, val: RunningAggregate, gen=None):
+    """Eventos <= corte vão para o treino; os demais para validação (e para o estado recente)"""
+    is_train = ch["event_time"] <= cut
+    is_val = ch["event_time"] > cut
+    if is_train.any():
+        train.add(chunk_partial(ch[is_train]))
+    if is_val.any():
+        rest = ch[is_val]
+        val.add(chunk_partial(rest))
+        if gen is not None:
+            gen.write_recent(rest)
+
+def _max_time(chunks, tmax=None):
+    for ch in chunks:
+        m = ch["event_time"].max()
+        if pd.notna(m) and (tmax is None or m > tmax):
+            tmax = m
+    return tmax
+
+def build_features(memory_mb: float = FEATURES_MEMORY_MB, full: bool = False):
+    """
+    Features de treino/validação em streaming, incrementais por padrão
+
+    Passo 1 lê só event_time para achar o corte temporal; passo 2 agrega
+    bloco a bloco em contadores User×Recipe. O tamanho do bloco sai do teto
+    de memória (~1/8 dele, folga para parse e agregação).
+
+    O teto limita só a leitura dos blocos: o parcial acumulado (grão
+    usuário × receita × sessão/dia) e a tabela final ficam inteiros em
+    memória e crescem com o número de chaves distintas, não com o de eventos.
+
+    Com estado válido em FEATURES_STATE_DIR, só os eventos após o watermark
+    são lidos: o treino parte dos parciais já consolidados e os eventos
+    recentes guardados são reclassificados com o novo corte. A saída é
+    idêntica à de uma reconstrução completa (--full).
+    """
+    chunk_bytes = max(1 << 20, int(memory_mb * 1024 * 1024 / 8))
+    batch_rows = max(1024, chunk_bytes // 200)
+    source, state = event_source(), FeatureState(FEATURES_STATE_DIR)
+    # IDs quase duplicados -> canônico (pipelines/recipe_dedup.py); parciais salvos usam o mapeamento da época
+    rmap = load_recipe_map()
+    rmap_digest = rmap.digest if rmap is not None else None
+    wm = None if full else state.watermark()
+    if wm is not None and (not source.valid(wm) or wm.get("partial_cols") != PARTIAL_COLS
+                           or wm.get("recipe_map") != rmap_digest):
+        wm = None  # fonte reescrita/trocada, features ou mapeamento de receitas alterados: reconstrói
+    mode = "incremental" if wm is not None else "full"
+
+    # 1) Corte temporal (últimos 2 dias = validação)
+    tmax = _max_time(source.chunks(["event_time"], chunk_bytes, after=wm),
+                     pd.Timestamp(wm["tmax"]) if wm is not None else None)
+    if tmax is None:
+        raise SystemExit(f"Nenhum evento encontrado em {DATA_EVENTS_PATH}")
+    cut = tmax - pd.Timedelta(days=2)
+
+    # 2) Agregação por blocos
+    gen = state.new_generation(EVENTS_SCHEMA)
+    train, val = RunningAggregate(), RunningAggregate()
+    events = 0
+    if wm is not None:
+        settled = state.settled()
+        if settled is not None:
+            train.add(settled)
+        # eventos recentes da execução anterior: os que ficaram <= novo corte são promovidos
+        for ch in state.recent_chunks(batch_rows):
+            _split(ch, cut, train, val, gen)
+    for ch in source.chunks(COLUMNS, chunk_bytes, after=wm, upto=tmax):
+        events += len(ch)
+        if rmap is not None:
+            rmap.apply(ch)
+        _split(ch, cut, train, val, gen)
+
+    ptrain = train.result()
+    gen.commit(ptrain, {**source.watermark(), "tmax": tmax.isoformat(), "cut": cut.isoformat(),
+                        "partial_cols": PARTIAL_COLS, "recipe_map": rmap_digest})
+    return finalize(ptrain, cut), finalize(val.result(), tmax), {"events": events, "cut": cut, "chunk_bytes": chunk_bytes, "mode": mode}
+
+def main():
+    ap = argparse.ArgumentParser(description="Feature engineering User×Recipe")
+    ap.add_argument("--memory-mb", type=float, default=FEATURES_MEMORY_MB, help="teto de memória só para os blocos de leitura (o parcial acumulado não é limitado)")
+    ap.add_argument("--full", action="store_true", help="ignora o estado salvo e relê todos os eventos")
+    ap.add_argument("--workers", type=int, default=FEATURES_WORKERS, help="processos (>1 = shards por hash do user_id, sempre completo)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    if args.workers > 1:
+        from pipelines.feature_shards import build_features_sharded
+        stats = build_features_sharded(args.workers, max(1 << 20, int(args.memory_mb * 1024 * 1024 / 8)))
+    else:
+        ftrain, fval, stats = build_features(args.memory_mb, args.full)
+        # Salva Parquet
+        Path(FEATURES_TRAIN_PATH).parent.mkdir(parents=True, exist_ok=True)
+        write_features(ftrain, FEATURES_TRAIN_PATH)
+        write_features(fval, FEATURES_VAL_PATH)
+    print(f"modo={stats['mode']} | eventos lidos={stats['events']} | bloco={stats['chunk_bytes'] / 2**20:.0f}MB | "
+          f"tempo={time.perf_counter() - t0:.1f}s | pico RSS={peak_rss_mb():.0f}MB")
+    print("ok: features ->", FEATURES_TRAIN_PATH, FEATURES_VAL_PATH)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Consolidação de receitas quase duplicadas (MinHash + LSH)
+
+O ID da receita vem do nome, então "Salada Caesar Vegetariana" e "Salada Caesar
+vegetariana com croutons" viram itens diferentes. Este estágio roda antes das
+features:
+
+1. lê dos eventos o último nome de cada recipe_id e quantos eventos ele tem;
+   receitas que já foram canônicas usam o nome com que viraram canônicas
+   (os eventos delas também trazem os nomes das variantes);
+2. conjunto de palavras do nome (minúsculas, sem acentos e sem preposições);
+3. assinatura MinHash de DEDUP_NUM_PERM hashes (a·x + b mod p) por receita,
+   com o mínimo por receita via `np.minimum.reduceat`;
+4. LSH: DEDUP_BANDS faixas; receitas com a mesma chave numa faixa viram
+   candidatas (cada uma ligada à primeira do balde, então os pares crescem
+   linearmente mesmo em baldes grandes);
+5. pares com Jaccard estimado >= DEDUP_THRESHOLD -> componentes conexos;
+   canônico = membro com mais eventos (empate: menor ID). Membros que não
+   passam do limiar contra o próprio canônico (efeito cadeia) ficam de fora.
+
+Grava em RECIPE_MAP_DIR só os IDs que mudam, mais o nome fixado de cada
+canônico (common/recipe_ids.py).
+
+Uso:
+    PYTHONPATH=. python pipelines/recipe_dedup.py --threshold 0.7
+"""
+import argparse
+import hashlib
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from common.config import RECIPE_MAP_DIR, DEDUP_THRESHOLD, DEDUP_NUM_PERM, DEDUP_BANDS
+from common.event_store import iter_event_chunks
+from common.recipe_ids import load_recipe_map
+from common.text import tokenize
+from models.item_neighbors import save_arrays
+
+# palavras que não distinguem receitas ("Bolo de banana" = "Bolo banana")
+STOPWORDS = {"a", "o", "as", "os", "e", "de", "da", "do", "das", "dos", "com", "em", "na", "no", "nas", "nos",
+             "ao", "aos", "para", "pra", "um", "uma"}
+PRIME = np.uint64(4294967291)  # maior primo < 2^32: hashes cabem em uint32
+BLOCK_TOKENS = 1 << 20  # tokens por bloco no cálculo das assinaturas (~256MB com 64 hashes)
+
+
+def load_names(chunk_bytes: int = 64 << 20, pinned: Optional[pd.Series] = None) -> pd.DataFrame:
+    """
+    Uma linha por recipe_id com nome: último nome não vazio e nº de eventos da receita
+    `pinned` (recipe_id -> nome) substitui o último nome dos IDs que já foram canônicos
+    """
+    names, counts = [], []
+    for ch in iter_event_chunks(["recipe_id", "recipe_name"], chunk_bytes):
+        ch = ch.dropna(subset=["recipe_id"])
+        counts.append(ch["recipe_id"].value_counts())
+        ch = ch[ch["recipe_name"].fillna("").str.strip() != ""]
+        names.append(ch.groupby("recipe_id", sort=False)["recipe_name"].last())
+    if not names:
+        return pd.DataFrame({"recipe_id": [], "recipe_name": [], "events": []})
+    df = pd.concat(names).groupby(level=0, sort=True).last().to_frame()
+    df["events"] = pd.concat(counts).groupby(level=0).sum().reindex(df.index).fillna(0).astype("int64")
+    if pinned is not None and len(pinned):
+        hit = df.index.isin(pinned.index)
+        df.loc[hit, "recipe_name"] = pinned.reindex(df.index[hit]).to_numpy()
+    return df.rename_axis("recipe_id").reset_index()
+
+
+def pin_names(names: pd.DataFrame, canonical: np.ndarray, pinned: Optional[pd.Series] = None) -> pd.Series:
+    """Nomes fixados: os anteriores mais o nome atual de cada canônico novo (ordenado por ID)"""
+    pinned = pinned if pinned is not None else pd.Series([], dtype=object)
+    ids = names["recipe_id"].to_numpy(dtype=str)
+    targets = np.unique(canonical[canonical != ids])
+    current = names.set_index("recipe_id")["recipe_name"]
+    new = current.reindex(targets[~np.isin(targets, pinned.index.to_numpy(dtype=str))])
+    return pd.concat([pinned, new]).sort_index()
+
+
+def shingles(names: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Conjunto de palavras de cada nome, em formato CSR
+
+    Returns:
+        (docs com pelo menos uma palavra, indptr, ids das palavras)
+    """
+    sets = [sorted({t for t in tokenize(n) if t not in STOPWORDS}) for n in names]
+    lens = np.fromiter((len(s) for s in sets), dtype=np.int64, count=len(sets))
+    codes, _ = pd.factorize(pd.Series([t for s in sets for t in s], dtype=object))
+    docs = np.flatnonzero(lens)
+    indptr = np.zeros(len(docs) + 1, dtype=np.int64)
+    np.cumsum(lens[docs], out=indptr[1:])
+    return docs, indptr, codes.astype(np.uint64)
+
+
+def minhash(indptr: np.ndarray, tokens: np.ndarray, num_perm: int, seed: int = 0) -> np.ndarray:
+    """Assinaturas MinHash uint32 (docs × num_perm); todo doc precisa de >= 1 token"""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, PRIME, num_perm, dtype=np.uint64)
+    b = rng.integers(0, PRIME, num_perm, dtype=np.uint64)
+    # tabela token -> hashes (vocabulário << tokens); x·a < 2^64 com x < 2^32
+    vocab = np.arange(int(tokens.max()) + 1 if len(tokens) else 0, dtype=np.uint64)
+    table = ((vocab[:, None] * a + b) % PRIME).astype(np.uint32)
+    n = len(indptr) - 1
+    sig = np.empty((n, num_perm), dtype=np.uint32)
+    start = 0
+    while start < n:
+        # bloco de docs com até BLOCK_TOKENS tokens (pelo menos um doc)
+        end = int(np.searchsorted(indptr, indptr[start] + BLOCK_TOKENS, side="right")) - 1
+        end = min(max(end, start + 1), n)
+        lo = indptr[start]
+        sig[start:end] = np.minimum.reduceat(table[tokens[lo:indptr[end]]], indptr[start:end] - lo, axis=0)
+        start = end
+    return sig
+
+
+def lsh_pairs(sig: np.ndarray, bands: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pares candidatos (i < j): mesma chave em alguma faixa, ligados ao primeiro do balde"""
+    n, num_perm = sig.shape
+    rows = num_perm // bands
+    left, right = [], []
+    for band in range(bands):
+        key = np.zeros(n, dtype=np.uint64)
+        for c in range(band * rows, (band + 1) * rows):
+            key = (key * np.uint64(1000003)) ^ sig[:, c].astype(np.uint64)
+        order = np.argsort(key, kind="stable")
+        k = key[order]
+        new = np.ones(n, dtype=bool)
+        new[1:] = k[1:] != k[:-1]
+        first = order[np.maximum.accumulate(np.where(new, np.arange(n), 0))]
+        keep = ~new
+        left.append(first[keep])
+        right.append(order[keep])
+    i, j = np.concatenate(left), np.concatenate(right)
+    pairs = np.unique(np.minimum(i, j).astype(np.int64) * n + np.maximum(i, j))
+    return pairs // n, pairs % n
+
+
+def similarity(sig: np.ndarray, i: np.ndarray, j: np.ndarray, block: int = 1 << 18) -> np.ndarray:
+    """Jaccard estimado (fração de hashes iguais) dos pares i×j"""
+    out = np.empty(len(i), dtype=np.float32)
+    for s in range(0, len(i), block):
+        out[s:s + block] = (sig[i[s:s + block]] == sig[j[s:s + block]]).mean(axis=1)
+    return out
+
+
+def dedup(names: pd.DataFrame, threshold: float = DEDUP_THRESHOLD, num_perm: int = DEDUP_NUM_PERM,
+          bands: int = DEDUP_BANDS) -> Tuple[np.ndarray, dict]:
+    """
+    ID canônico de cada linha de `names` (recipe_id, recipe_name, events)
+
+    Returns:
+        (canônicos alinhados a `names`, estatísticas)
+    """
+    t0 = time.perf_counter()
+    ids = names["recipe_id"].to_numpy(dtype=str)
+    canonical = ids.copy()
+    docs, indptr, tokens = shingles(names["recipe_name"].fillna(""))
+    t_tok = time.perf_counter() - t0
+    sig = minhash(indptr, tokens, num_perm)
+    t_sig = time.perf_counter() - t0 - t_tok
+    i, j = lsh_pairs(sig, bands)
+    sim = similarity(sig, i, j)
+    ok = sim >= threshold
+    t_lsh = time.perf_counter() - t0 - t_tok - t_sig
+
+    n = len(docs)
+    graph = coo_matrix((np.ones(int(ok.sum()), dtype=np.int8), (i[ok], j[ok])), shape=(n, n))
+    n_comp, comp = connected_components(graph, directed=False)
+    # canônico do componente: mais eventos, depois menor ID
+    events = names["events"].to_numpy()[docs]
+    order = np.lexsort((ids[docs], -events, comp))
+    head = np.zeros(n_comp, dtype=np.int64)
+    c = comp[order]
+    first = np.ones(n, dtype=bool)
+    first[1:] = c[1:] != c[:-1]
+    head[c[first]] = order[first]
+    canon = head[comp]
+    # efeito cadeia: só herda o canônico quem é parecido com ele
+    close = similarity(sig, np.arange(n), canon) >= threshold
+    canonical[docs[close]] = ids[docs[canon[close]]]
+    stats = {"recipes": len(ids), "with_words": n, "candidate_pairs": int(len(i)), "similar_pairs": int(ok.sum()),
+             "merged": int((canonical != ids).sum()), "canonical_recipes": int(len(np.unique(canonical))),
+             "tokenize_s": round(t_tok, 2), "minhash_s": round(t_sig, 2), "lsh_s": round(t_lsh, 2),
+             "total_s": round(time.perf_counter() - t0, 2)}
+    return canonical, stats
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Mapeamento de receitas quase duplicadas para o ID canônico")
+    ap.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD, help="Jaccard mínimo entre os nomes")
+    ap.add_argument("--num-perm", type=int, default=DEDUP_NUM_PERM)
+    ap.add_argument("--bands", type=int, default=DEDUP_BANDS)
+    ap.add_argument("--out", default=RECIPE_MAP_DIR)
+    args = ap.parse_args()
+    if args.num_perm % args.bands:
+        raise SystemExit("--num-perm precisa ser múltiplo de --bands")
+
+    t0 = time.perf_counter()
+    previous = load_recipe_map(args.out)
+    pinned = previous.names if previous is not None else None
+    names = load_names(pinned=pinned)
+    t_read = time.perf_counter() - t0
+    canonical, stats = dedup(names, args.threshold, args.num_perm, args.bands)
+    pinned = pin_names(names, canonical, pinned)
+    ids = names["recipe_id"].to_numpy(dtype=str)
+    changed = canonical != ids  # `names` já vem ordenado por recipe_id
+    ids, canonical = ids[changed], canonical[changed]
+    digest = hashlib.md5("\n".join(f"{a}\t{b}" for a, b in zip(ids, canonical)).encode()).hexdigest()
+    save_arrays(Path(args.out), {"ids": ids, "canonical": canonical,
+                                 "name_ids": pinned.index.to_numpy(dtype=str), "names": pinned.to_numpy(dtype=str)}, {
+        "threshold": args.threshold, "num_perm": args.num_perm, "bands": args.bands, "digest": digest,
+        **stats, "built_at": pd.Timestamp.now(tz="UTC").isoformat(),
+    })
+    print(f"{stats['recipes']:,} receitas com nome | {stats['candidate_pairs']:,} pares candidatos "
+          f"| {stats['merged']:,} IDs consolidados em {stats['canonical_recipes']:,} "
+          f"| leitura {t_read:.1f}s | dedup {stats['total_s']:.1f}s")
+    print("ok:", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Fixtures compartilhadas: log de eventos sintético e caminhos do pipeline de features isolados"""
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import common.config as config
+import pipelines.features as features
+
+T0 = datetime(2026, 10, 1)
+
+
+def make_events(n: int, seed: int = 0, start: datetime = T0, days: int = 14):
+    """Eventos no formato do simulate.py (ordem de event_time embaralhada, como no log real)"""
+    rng = np.random.default_rng(seed)
+    minutes = rng.integers(0, days * 24 * 60, n)
+    return [{
+        "event_time": (start + timedelta(minutes=int(m))).isoformat() + "Z",
+        "user_id": f"u_{rng.integers(40)}",
+        "event_name": "save_recipe" if rng.random() < 0.1 else "recipe_view",
+        "recipe_id": f"rec_{rng.integers(60)}",
+        "session_id": f"s_{rng.integers(200)}" if rng.random() < 0.8 else None,
+        "diet_selected": str(rng.choice(["low_carb", "veg", "none"])),
+        "platform": str(rng.choice(["android", "ios"])),
+    } for m in minutes]
+
+
+def append_events(path, events):
+    with open(path, "a") as f:
+        for ev in events:
+            f.write(json.dumps(ev) + "\n")
+
+
+@pytest.fixture
+def feature_env(tmp_path, monkeypatch):
+    """Log, estado incremental, saídas e mapeamento de receitas num diretório temporário"""
+    paths = {
+        "events": tmp_path / "events.jsonl",
+        "state": tmp_path / "feature_state",
+        "train": tmp_path / "feat_train.parquet",
+        "val": tmp_path / "feat_val.parquet",
+    }
+    monkeypatch.setattr(config, "DATA_EVENTS_PATH", str(paths["events"]))
+    monkeypatch.setattr(config, "EVENT_STORE_DIR", "")
+    monkeypatch.setattr(config, "RECIPE_MAP_DIR", str(tmp_path / "recipe_map"))
+    monkeypatch.setattr(features, "FEATURES_STATE_DIR", str(paths["state"]))
+    return paths
@@ -0,0 +1,74 @@
+"""Execução incremental de pipelines/features.py idêntica à reconstrução completa (--full)"""
+from datetime import datetime
+
+import pandas as pd
+
+from pipelines.features import build_features
+from tests.conftest import append_events, make_events
+
+
+def assert_same_as_full(train: pd.DataFrame, val: pd.DataFrame):
+    full_train, full_val, stats = build_features(full=True)
+    assert stats["mode"] == "full"
+    pd.testing.assert_frame_equal(train, full_train)
+    pd.testing.assert_frame_equal(val, full_val)
+
+
+def test_incremental_matches_full(feature_env):
+    append_events(feature_env["events"], make_events(3000, seed=0))
+    _, _, stats = build_features()
+    assert stats["mode"] == "full"
+    cut = stats["cut"]
+
+    # novos eventos: a maioria antes do corte anterior, alguns depois do tmax antigo (corte avança)
+    late = make_events(400, seed=1, start=datetime(2026, 10, 3), days=8)
+    fresh = make_events(300, seed=2, start=datetime(2026, 10, 14), days=3)
+    assert any(pd.Timestamp(e["event_time"]) <= cut for e in late)
+    append_events(feature_env["events"], late + fresh)
+
+    train, val, stats = build_features()
+    assert stats["mode"] == "incremental"
+    assert stats["events"] == len(late) + len(fresh)
+    assert stats["cut"] > cut
+    assert_same_as_full(train, val)
+
+    # segunda rodada incremental a partir do estado recém-gravado
+    append_events(feature_env["events"], make_events(200, seed=3, start=datetime(2026, 10, 15), days=3))
+    train, val, stats = build_features()
+    assert stats["mode"] == "incremental"
+    assert_same_as_full(train, val)
+
+
+def test_no_new_events_keeps_output(feature_env):
+    append_events(feature_env["events"], make_events(1000, seed=0))
+    train, val, _ = build_features()
+    again_train, again_val, stats = build_features()
+    assert stats["mode"] == "incremental" and stats["events"] == 0
+    pd.testing.assert_frame_equal(again_train, train)
+    pd.testing.assert_frame_equal(again_val, val)
+
+
+def test_rewritten_log_falls_back_to_full(feature_env):
+    path = feature_env["events"]
+    append_events(path, make_events(1000, seed=0))
+    build_features()
+
+    # mesmo arquivo (mesmo inode) reescrito com outro conteúdo e mais bytes
+    with open(path, "w"):
+        pass
+    append_events(path, make_events(1500, seed=4))
+    train, val, stats = build_features()
+    assert stats["mode"] == "full" and stats["events"] == 1500
+    assert_same_as_full(train, val)
+
+
+def test_truncated_log_falls_back_to_full(feature_env):
+    path = feature_env["events"]
+    append_events(path, make_events(1000, seed=0))
+    build_features()
+
+    lines = path.read_text().splitlines(keepends=True)
+    path.write_text("".join(lines[:600]))
+    train, val, stats = build_features()
+    assert stats["mode"] == "full" and stats["events"] == 600
+    assert_same_as_full(train, val)
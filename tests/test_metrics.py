@@ -0,0 +1,84 @@
+"""Paridade das métricas vetorizadas (models/metrics.py) com referências por grupo"""
+import numpy as np
+import pytest
+from sklearn.metrics import ndcg_score
+
+from models.metrics import group_offsets, ndcg_per_group, rank_metrics, topk_per_group
+
+
+def reference_ndcg(y: np.ndarray, score: np.ndarray, k: int) -> float:
+    """NDCG@k de um grupo: sklearn a partir de 2 itens; com 1 item, relevante = 1 e irrelevante = 0"""
+    if len(y) >= 2:
+        return ndcg_score(y[None], score[None], k=k)
+    return 1.0 if y[0] > 0 else 0.0
+
+
+def reference_topk(y: np.ndarray, score: np.ndarray, k: int) -> tuple:
+    """(MAP@k, recall@k, hit-rate@k) de um grupo, empates na ordem original"""
+    r = (y > 0)[np.argsort(-score, kind="stable")][:k]
+    n_rel = (y > 0).sum()
+    if n_rel == 0:
+        return 0.0, 0.0, 0.0
+    ap = sum(r[:j + 1].sum() / (j + 1) for j in range(len(r)) if r[j]) / min(n_rel, k)
+    return ap, r.sum() / n_rel, float(r.any())
+
+
+def make_groups(seed: int = 0):
+    """Grupos de tamanho 1, todos irrelevantes, com empates e maiores que k"""
+    rng = np.random.default_rng(seed)
+    groups = [
+        (np.array([1]), np.array([0.3])),                     # 1 item relevante
+        (np.array([0]), np.array([0.9])),                     # 1 item irrelevante
+        (np.zeros(6, int), rng.random(6)),                    # sem relevante
+        (np.array([1, 0, 2, 0]), np.array([0.5, 0.5, 0.5, 0.5])),  # todos empatados
+        (np.array([0, 1, 0, 1, 3]), np.array([2.0, 2.0, 1.0, 1.0, 0.0])),  # blocos de empate
+    ]
+    for size in rng.integers(1, 40, 200):
+        groups.append((rng.integers(0, 3, size) * (rng.random(size) < 0.3), rng.integers(0, 5, size).astype(float)))
+    y = np.concatenate([g[0] for g in groups])
+    score = np.concatenate([g[1] for g in groups])
+    offsets = np.concatenate([[0], np.cumsum([len(g[0]) for g in groups])])
+    return y, score, offsets
+
+
+@pytest.mark.parametrize("k", [1, 3, 10, 100])
+def test_ndcg_matches_reference(k):
+    y, score, offsets = make_groups()
+    got = ndcg_per_group(y, score, offsets, k)
+    want = [reference_ndcg(y[a:b], score[a:b], k) for a, b in zip(offsets[:-1], offsets[1:])]
+    np.testing.assert_allclose(got, want, atol=1e-12)
+
+
+@pytest.mark.parametrize("k", [1, 3, 10, 100])
+def test_topk_matches_reference(k):
+    y, score, offsets = make_groups(1)
+    got = topk_per_group(y, score, offsets, k)
+    want = np.array([reference_topk(y[a:b], score[a:b], k) for a, b in zip(offsets[:-1], offsets[1:])])
+    np.testing.assert_allclose(got["map"], want[:, 0], atol=1e-12)
+    np.testing.assert_allclose(got["recall"], want[:, 1], atol=1e-12)
+    np.testing.assert_allclose(got["hit_rate"], want[:, 2], atol=1e-12)
+
+
+def test_edge_groups():
+    # grupo de 1 item, grupo sem relevante e grupo empatado menor que k
+    y = np.array([1, 0, 0, 0, 2, 1])
+    score = np.array([0.1, 0.4, 0.2, 0.7, 0.7, 0.7])
+    offsets = np.array([0, 1, 3, 6])
+    np.testing.assert_allclose(ndcg_per_group(y, score, offsets, 10)[:2], [1.0, 0.0])
+    assert ndcg_per_group(y, score, offsets, 10)[2] == pytest.approx(ndcg_score(y[None, 3:], score[None, 3:], k=10))
+    m = topk_per_group(y, score, offsets, 10)
+    np.testing.assert_allclose(m["hit_rate"], [1.0, 0.0, 1.0])
+
+
+def test_rank_metrics_skips_small_groups():
+    y, score, offsets = make_groups()
+    sizes = np.diff(offsets)
+    out = rank_metrics(y, score, offsets, k=10, min_size=2)
+    keep = sizes >= 2
+    assert out["groups"] == int(keep.sum())
+    assert out["ndcg"] == pytest.approx(ndcg_per_group(y, score, offsets, 10)[keep].mean())
+
+
+def test_group_offsets():
+    np.testing.assert_array_equal(group_offsets(np.array(["a", "a", "b", "c", "c"])), [0, 2, 3, 5])
+    np.testing.assert_array_equal(group_offsets(np.array([])), [0])
@@ -0,0 +1,73 @@
+"""Mapeamento de receitas quase duplicadas estável depois que os eventos passam a usar o ID canônico"""
+import json
+import sys
+
+import numpy as np
+
+import pipelines.recipe_dedup as recipe_dedup
+from common.recipe_ids import load_recipe_map, recipe_id
+from pipelines.recipe_dedup import dedup, load_names, pin_names
+from tests.conftest import append_events
+
+BASE = "torta frango cremosa assada forno massa folhada caseira"
+NAMES = {
+    "canonical": BASE,
+    "variant": BASE + " catupiry milho",   # parecida com a canônica
+    "other": BASE + " light integral",     # parecida com a canônica, não com a variante
+}
+PARAMS = {"threshold": 0.75, "num_perm": 256, "bands": 32}
+
+
+def named_event(name: str, rid: str, i: int) -> dict:
+    return {"event_time": f"2026-10-{1 + i % 20:02d}T12:00:00Z", "user_id": f"u_{i}",
+            "event_name": "recipe_generate", "recipe_id": rid, "recipe_name": name}
+
+
+def seed_events(path):
+    """Canônica com mais eventos; variante e outra com um evento cada, todas no ID do próprio nome"""
+    events = [named_event(NAMES["canonical"], recipe_id(NAMES["canonical"]), i) for i in range(5)]
+    events += [named_event(NAMES[k], recipe_id(NAMES[k]), 10 + i) for i, k in enumerate(("variant", "other"))]
+    append_events(path, events)
+
+
+def canonical_map(names) -> dict:
+    canonical, _ = dedup(names, **PARAMS)
+    return dict(zip(names["recipe_id"], canonical))
+
+
+def test_pinned_name_keeps_the_clusters(feature_env):
+    seed_events(feature_env["events"])
+    names = load_names()
+    first = canonical_map(names)
+    canon = recipe_id(NAMES["canonical"])
+    assert first[recipe_id(NAMES["variant"])] == first[recipe_id(NAMES["other"])] == canon
+    pinned = pin_names(names, np.array([first[r] for r in names["recipe_id"]]))
+    assert pinned.to_dict() == {canon: NAMES["canonical"]}
+
+    # API grava a receita da variante no ID canônico, com o nome da variante
+    append_events(feature_env["events"], [named_event(NAMES["variant"], canon, 50 + i) for i in range(3)])
+
+    # sem o nome fixado, a canônica herda o nome da variante e "other" sai do grupo
+    drifted = canonical_map(load_names())
+    assert drifted[recipe_id(NAMES["other"])] != canon
+    # com o nome fixado, o mapeamento não muda
+    assert canonical_map(load_names(pinned=pinned)) == first
+
+
+def test_main_keeps_digest_across_runs(feature_env, monkeypatch):
+    out = str(feature_env["events"].parent / "recipe_map")
+    argv = ["recipe_dedup.py", "--out", out] + [f"--{k.replace('_', '-')}={v}" for k, v in PARAMS.items()]
+    monkeypatch.setattr(sys, "argv", argv)
+    seed_events(feature_env["events"])
+    recipe_dedup.main()
+    rmap = load_recipe_map(out)
+    canon = recipe_id(NAMES["canonical"])
+    assert rmap.get(recipe_id(NAMES["other"])) == canon
+    assert rmap.names.to_dict() == {canon: NAMES["canonical"]}
+
+    append_events(feature_env["events"], [named_event(NAMES["variant"], canon, 50 + i) for i in range(3)])
+    recipe_dedup.main()
+    again = load_recipe_map(out)
+    assert again.digest == rmap.digest
+    assert again.names.to_dict() == rmap.names.to_dict()
+    assert json.loads((again.path / "meta.json").read_text())["merged"] == 2
@@ -0,0 +1,72 @@
+"""Paridade do avaliador NumPy (models/tree_eval.py) com o Booster.predict do LightGBM"""
+import lightgbm as lgb
+import numpy as np
+import pytest
+
+from models.tree_eval import MISSING, TreeEnsemble, load_scorer
+
+
+def train_booster(params: dict, nan_rate: float = 0.0, rounds: int = 20, seed: int = 0) -> lgb.Booster:
+    """Lambdarank pequeno em dados sintéticos (zeros frequentes e, opcionalmente, NaN)"""
+    rng = np.random.default_rng(seed)
+    n, groups = 600, 30
+    X = rng.gamma(1.0, 3.0, size=(n, 5)).round()  # contagens: muitos zeros, como as features da API
+    y = np.clip((X[:, 0] > 2).astype(int) + (X[:, 1] == 0) + rng.integers(0, 2, n) * (X[:, 2] > 3), 0, 3)
+    if nan_rate:
+        X[rng.random(X.shape) < nan_rate] = np.nan
+    base = {"objective": "lambdarank", "num_leaves": 7, "min_data_in_leaf": 5, "verbose": -1, "seed": seed}
+    data = lgb.Dataset(X, y, group=[n // groups] * groups, feature_name=[f"f{i}" for i in range(5)])
+    return lgb.train({**base, **params}, data, num_boost_round=rounds)
+
+
+def probe_rows(seed: int = 1) -> np.ndarray:
+    """Linhas com valores comuns, zeros exatos, quase-zero, negativos e NaN"""
+    rng = np.random.default_rng(seed)
+    X = rng.gamma(1.0, 3.0, size=(500, 5)).round()
+    X[rng.random(X.shape) < 0.15] = 0.0
+    X[rng.random(X.shape) < 0.05] = 1e-40
+    X[rng.random(X.shape) < 0.05] = -1.0
+    X[rng.random(X.shape) < 0.15] = np.nan
+    return X
+
+
+@pytest.mark.parametrize("params, nan_rate, missing_type", [
+    ({}, 0.0, "None"),                         # sem ausentes no treino: NaN vira 0
+    ({}, 0.2, "NaN"),                          # NaN no treino: segue o lado default
+    ({"zero_as_missing": True}, 0.0, "Zero"),  # zero como ausente: |x| <= 1e-35 segue o default
+])
+def test_predict_matches_booster(params, nan_rate, missing_type):
+    booster = train_booster(params, nan_rate)
+    ens = TreeEnsemble.from_booster(booster)
+    assert (ens.missing == MISSING[missing_type]).any()
+    X = probe_rows()
+    assert np.allclose(ens.predict(X), booster.predict(X), rtol=0, atol=1e-9)
+    # só zeros e só NaN (todas as linhas pelo mesmo caminho)
+    for fill in (0.0, np.nan):
+        Xf = np.full((10, 5), fill)
+        assert np.allclose(ens.predict(Xf), booster.predict(Xf), rtol=0, atol=1e-9)
+
+
+def test_predict_empty_and_single_row():
+    booster = train_booster({})
+    ens = TreeEnsemble.from_booster(booster)
+    assert ens.predict(np.empty((0, 5))).shape == (0,)
+    x = probe_rows()[:1]
+    assert np.allclose(ens.predict(x), booster.predict(x), rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("kind, expected", [("lightgbm", lgb.Booster), ("numpy", TreeEnsemble)])
+def test_load_scorer_kinds(tmp_path, kind, expected):
+    path = str(tmp_path / "model.txt")
+    train_booster({}).save_model(path)
+    assert isinstance(load_scorer(path, kind), expected)
+
+
+def test_load_scorer_auto_returns_one_of_the_scorers(tmp_path):
+    path = str(tmp_path / "model.txt")
+    booster = train_booster({"zero_as_missing": True})
+    booster.save_model(path)
+    model = load_scorer(path, "auto")
+    assert isinstance(model, (lgb.Booster, TreeEnsemble))
+    X = probe_rows()
+    assert np.allclose(model.predict(X), booster.predict(X), rtol=0, atol=1e-9)